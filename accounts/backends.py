@@ -0,0 +1,48 @@
+"""
+ModelBackend з кешем користувача: AuthenticationMiddleware на кожному запиті викликає
+get_user(id) → SELECT з auth_user. Тут об'єкт User береться з кешу AUTH_USER_CACHE_ALIAS
+(той самий спільний, що й для сесій), тож з cached_db/signed_cookies сесіями запит
+автентифікованого користувача не робить жодного запиту до БД.
+
+Кеш скидається сигналами на User (accounts.models), тож він мусить бути спільним для всіх
+воркерів: з локальним (LocMem) деактивований користувач ще AUTH_USER_CACHE_TTL секунд
+проходив би в інших процесах. AUTH_USER_CACHE_ALIAS = None (так ставить crm.settings
+з LocMem) — кешу немає, поведінка як у ModelBackend.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+KEY_PREFIX = "crm:auth:user:"
+DEFAULT_TTL = 60
+
+
+def _cache():
+    alias = getattr(settings, "AUTH_USER_CACHE_ALIAS", None)
+    return caches[alias] if alias else None
+
+
+def user_cache_key(user_id):
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def forget_user(user_id):
+    cache = _cache()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """authenticate()/права — як у ModelBackend; кешується лише get_user()."""
+
+    def get_user(self, user_id):
+        cache = _cache()
+        if cache is None:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)  # None для неактивних — такого не кешуємо
+            if user is not None:
+                cache.set(key, user, getattr(settings, "AUTH_USER_CACHE_TTL", DEFAULT_TTL))
+        return user
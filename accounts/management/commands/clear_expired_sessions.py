@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+NO_DB_ENGINES = {"signed_cookies", "cache", "file"}   # останній сегмент SESSION_ENGINE
+
+
+class Command(BaseCommand):
+    help = ("Видаляє прострочені сесії з django_session пакетами (по індексу expire_date), "
+            "щоб не тримати довгий DELETE на всю таблицю, як clearsessions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Пауза між пакетами, секунд")
+
+    def handle(self, *args, **opts):
+        if settings.SESSION_ENGINE.rsplit(".", 1)[-1] in NO_DB_ENGINES:
+            self.stdout.write(self.style.WARNING(f"{settings.SESSION_ENGINE} не зберігає сесії в БД — нічого робити."))
+            return
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.order_by("expire_date").values_list("session_key", flat=True)[:opts["batch_size"]])
+            if not keys:
+                break
+            n, _ = Session.objects.filter(session_key__in=keys).delete()
+            deleted += n
+            self.stdout.write(f"… {deleted}")
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Готово: видалено {deleted} сесій."))
@@ -1,3 +1,13 @@
-from django.db import models
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
-# Create your models here.
+
+# Кеш користувача для AuthenticationMiddleware (accounts.backends.CachedModelBackend).
+# Будь-яке збереження User (вхід оновлює last_login, зміна пароля, is_active) скидає його.
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def on_user_change(sender, instance, **kwargs):
+    from .backends import forget_user
+    forget_user(instance.pk)
@@ -1,3 +1,25 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from accounts.backends import CachedModelBackend
+
+
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("anna")
+        self.backend = CachedModelBackend()
+
+    @override_settings(AUTH_USER_CACHE_ALIAS=None)
+    def test_without_cache_reads_database(self):
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)  # update() сигналів не шле
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    @override_settings(AUTH_USER_CACHE_ALIAS="default")
+    def test_save_drops_cached_user(self):
+        self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+        with self.assertNumQueries(0):
+            self.backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, DealLine, Booking, Resource
+from .models import Service, DealLine, Booking, BookingArchive, BookingSeries, Resource, WorkSchedule, ScheduleException
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -20,3 +20,27 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ("deal__title", "deal__client__name")
 
 admin.site.register(Resource)
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(admin.ModelAdmin):
+    list_display = ("original_id", "deal_id", "start_at", "end_at", "status", "archived_at")
+    list_filter = ("status",)
+    date_hierarchy = "start_at"
+
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    list_display = ("client", "service", "master", "start_at", "freq", "interval", "count", "until", "is_active")
+    list_filter = ("freq", "is_active", "master")
+    search_fields = ("client__name", "service__name")
+    raw_id_fields = ("client",)
+
+@admin.register(WorkSchedule)
+class WorkScheduleAdmin(admin.ModelAdmin):
+    list_display = ("employee", "resource", "weekday", "start_time", "end_time")
+    list_filter = ("weekday", "employee", "resource")
+
+@admin.register(ScheduleException)
+class ScheduleExceptionAdmin(admin.ModelAdmin):
+    list_display = ("employee", "resource", "date", "start_time", "end_time", "note")
+    list_filter = ("employee", "resource")
+    date_hierarchy = "date"
@@ -1,16 +1,30 @@
 # beauty/api.py
 from django.http import JsonResponse, HttpResponseNotAllowed, HttpResponseBadRequest
 from django.views.decorators.http import require_GET, require_POST
+from django.utils.cache import patch_cache_control
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import get_object_or_404
-from django.db import transaction
-from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
 import json
 
-from main.models import Deal, Employee, Client
-from beauty.models import Booking, Resource, Service, DealLine  # усе з beauty.models
+from main import aggregates
+from main.models import Deal, Client
+from main.conditional import versioned
+from main.dedup import find_matching_client
+from main.versioning import bump_version
+from beauty.models import Booking, BookingSeries, DealLine  # усе з beauty.models
+from beauty.refdata import get_refdata, master_or_404, resource_or_404, service_or_404
+from beauty import autocomplete as ac, availability, batch, recurrence, schedule
+from beauty.conflicts import conflict_payload, save_checked
+
+MAX_UTILIZATION_DAYS = 92
 
 # ---- helpers ----
 
@@ -37,7 +51,135 @@ def to_aware(dt_str):
 def iso(dt):
     return timezone.localtime(dt).isoformat() if dt else None
 
-def booking_to_event(b: Booking):
+def _int_param(request, name, default, lo, hi):
+    try:
+        value = int(request.GET.get(name) or default)
+    except ValueError:
+        value = default
+    return max(lo, min(hi, value))
+
+
+def _percent(part, whole):
+    return round(100.0 * part / whole, 1) if whole else None
+
+
+def parse_service_ids(request):
+    """service=3&service=5 або service=3,5 → [3, 5]; ValueError на сміття."""
+    return [int(x) for raw in request.GET.getlist("service") for x in raw.split(",") if x.strip()]
+
+
+def resolve_client(request, data):
+    """
+    Клієнт із JSON: client_id → існуючий (404, якщо нема); інакше client_name [+ phone/email] —
+    шукаємо вже відомого (телефон + схоже ім'я), щоб не плодити дублікати, або створюємо.
+    None — якщо не передано ні id, ні імені.
+    """
+    if data.get("client_id"):
+        return get_object_or_404(Client, pk=data["client_id"])
+    client_name = (data.get("client_name") or "").strip()
+    if not client_name:
+        return None
+    client_phone = (data.get("client_phone") or "").strip()
+    client_email = (data.get("client_email") or "").strip()
+    client = find_matching_client(client_name, client_phone, client_email)
+    if client is None:
+        # створюємо мінімального клієнта
+        client = Client.objects.create(
+            name=client_name,
+            phone=client_phone,
+            email=client_email,
+            owner=request.user  # якщо хочеш прив’язати
+        )
+    return client
+
+
+def create_deal(request, data, client, service):
+    """Угода з однією послугою під новий запис календаря."""
+    # Decimal("0.00") хибне: "or 0" дав би int, і DealLine.save() впав би на quantize
+    price = getattr(service, "base_price", None) or Decimal("0")
+    with transaction.atomic():
+        deal = Deal.objects.create(
+            client=client,
+            title=getattr(service, "name", "Послуга"),
+            amount=price,
+            status="in_progress",
+            owner=request.user,
+            notes=data.get("note", "")
+        )
+        DealLine.objects.create(
+            deal=deal,
+            service=service,
+            quantity=1,
+            unit_price=price,
+        )
+    return deal
+
+
+def create_booking_with_deal(request, data, service, booking):
+    """
+    resolve_client → create_deal → save_checked(booking) однією транзакцією: на конфлікті
+    відкочуються й угода з рядком послуги, і щойно створений клієнт — 409 не лишає сиріт.
+    Повертає множину конфліктів (порожня — збережено) або None, якщо клієнта не задано.
+    """
+    with transaction.atomic():
+        client = resolve_client(request, data)
+        if client is None:
+            return None
+        booking.deal = create_deal(request, data, client, service)
+        found = save_checked(booking)
+        if found:
+            transaction.set_rollback(True)
+    return found
+
+
+def apply_patch(b, data):
+    """
+    PATCH-поля (див. booking_update) → Booking у пам'яті, без збереження.
+    Повертає відповідь з помилкою (400/422) або None, якщо все гаразд.
+    """
+    start_at_str = data.get("start_at")
+    end_at_str   = data.get("end_at")
+    duration_min = data.get("duration_min")
+
+    if start_at_str:
+        b.start_at = to_aware(start_at_str)
+
+    if end_at_str:
+        b.end_at = to_aware(end_at_str)
+    elif duration_min and b.start_at:
+        b.end_at = b.start_at + timedelta(minutes=int(duration_min))
+    if not b.start_at or not b.end_at or not (b.start_at < b.end_at <= b.start_at + Booking.MAX_DURATION):
+        return HttpResponseBadRequest("Invalid start/end")
+
+    # master може бути None
+    if "master_id" in data:
+        master_id = data.get("master_id")
+        b.master = master_or_404(master_id) if master_id else None
+
+    if "resource_id" in data:
+        res_id = data.get("resource_id")
+        b.resource = resource_or_404(res_id) if res_id else None
+
+    if "note" in data:
+        b.note = data["note"] or ""
+
+    if "allow_unskilled" in data:
+        b.allow_unskilled = bool(data["allow_unskilled"])
+
+    if "status" in data:
+        if data["status"] in {"tentative", "confirmed", "cancelled"}:
+            b.status = data["status"]
+
+    # перевірка навички (якщо master є і є service у deal)
+    service_line = b.deal.lines.select_related("service").first()
+    service = service_line.service if service_line else None
+    if b.master_id and service and not b.allow_unskilled:
+        if not get_refdata().has_skill(b.master_id, service.pk):
+            return JsonResponse({"error": "skill", "message": "Майстер не має цієї навички"}, status=422)
+    return None
+
+
+def booking_to_event(b: Booking, service_name=None):
     """
     Перетворює Booking → FullCalendar event dict.
     """
@@ -45,12 +187,14 @@ def booking_to_event(b: Booking):
     deal_title = getattr(b.deal, "title", "") if b.deal_id else ""
     title = deal_title or client_name or "Запис"
 
-    # витягнемо першу послугу з угоди (якщо є)
-    first_line = None
-    try:
-        first_line = b.deal.lines.select_related("service").first()
-    except Exception:
-        pass
+    # перша послуга угоди (якщо є); список подій передає її готовою, без запиту на кожен запис
+    if service_name is None:
+        first_line = None
+        try:
+            first_line = b.deal.lines.select_related("service").first()
+        except Exception:
+            pass
+        service_name = first_line.service.name if first_line else ""
 
     master_name = None
     if b.master_id:
@@ -70,18 +214,68 @@ def booking_to_event(b: Booking):
             "resource": b.resource.name if b.resource_id else "",
             "status": b.status,
             "allow_unskilled": b.allow_unskilled,
-            "service": first_line.service.name if first_line else "",
+            "service": service_name,
+            "series": b.series_id,
+        },
+    }
+
+
+def occurrence_to_event(series, index, start_at, end_at):
+    """
+    Віртуальне (ще не створене) повторення серії → FullCalendar event.
+    Не редагується перетягуванням: спершу його треба матеріалізувати.
+    """
+    color = "#B8DDEB"
+    return {
+        "id": f"series-{series.pk}-{index}",
+        "title": series.client.name or series.service.name,
+        "start": iso(start_at),
+        "end": iso(end_at),
+        "backgroundColor": color,
+        "borderColor": color,
+        "url": None,
+        "editable": False,
+        "extendedProps": {
+            "client": series.client.name,
+            "master": series.master.full_name if series.master_id else None,
+            "resource": series.resource.name if series.resource_id else "",
+            "status": "tentative",
+            "allow_unskilled": series.allow_unskilled,
+            "service": series.service.name,
+            "series": series.pk,
+            "occurrence": index,
+            "virtual": True,
         },
     }
 
+
+def series_to_json(series, upcoming=()):
+    return {
+        "id": series.pk,
+        "client_id": series.client_id,
+        "service_id": series.service_id,
+        "master_id": series.master_id,
+        "resource_id": series.resource_id,
+        "start_at": iso(series.start_at),
+        "duration_min": series.duration_min,
+        "freq": series.freq,
+        "interval": series.interval,
+        "count": series.count,
+        "until": series.until.isoformat() if series.until else None,
+        "is_active": series.is_active,
+        "upcoming": [{"index": n, "start": iso(s), "end": iso(e)} for n, s, e in upcoming],
+    }
+
 # ---- endpoints ----
 
 @login_required
 @require_GET
+@versioned("bookings", "deals", "clients", "refdata", hourly=True)  # повторення серій — від "зараз"
 def calendar_events(request):
     """
-    GET /api/calendar/events?start=...&end=...&master=optional
-    FullCalendar дає ISO-інтервал для завантаження подій.
+    GET /api/calendar/events?start=...&end=...&master=optional[&series=0][&include_cancelled=1]
+    FullCalendar дає ISO-інтервал для завантаження подій. Скасовані — лише на вимогу.
+    Повторення серій, для яких ще нема Booking, розгортаються в це вікно на льоту.
     """
     start_str = request.GET.get("start")
     end_str   = request.GET.get("end")
@@ -99,12 +293,16 @@ def calendar_events(request):
 
     qs = (Booking.objects
           .select_related("deal__client", "master__user", "resource")
-          .filter(start_at__lt=end_dt, end_at__gt=start_dt))
+          .overlapping(start_dt, end_dt))
+    if request.GET.get("include_cancelled") not in ("1", "true"):
+        qs = qs.active()
 
     if master_id:
         qs = qs.filter(master_id=master_id)
 
     events = [booking_to_event(b) for b in qs]
+    if request.GET.get("series") not in ("0", "false"):
+        events += [occurrence_to_event(*occ) for occ in recurrence.virtual_occurrences(start_dt, end_dt, master_id)]
     return JsonResponse(events, safe=False)
 
 
@@ -138,61 +336,23 @@ def booking_create(request):
     # master може бути None (запис без майстра)
     master = None
     if "master_id" in data and data.get("master_id") not in (None, "", "null"):
-        master = get_object_or_404(Employee, pk=data["master_id"])
+        master = master_or_404(data["master_id"])
 
     resource = None
     if data.get("resource_id"):
-        resource = get_object_or_404(Resource, pk=data["resource_id"])
-
-    # ---- визначаємо угоду ----
-    deal = None
-    service = None
-
-    if not deal:
-        client_id = data.get("client_id")
-        client_name = (data.get("client_name") or "").strip()
-        client_phone = (data.get("client_phone") or "").strip()
-        service_id = data.get("service_id")
-
-        if not service_id:
-            return HttpResponseBadRequest("service_id required")
-
-        service = get_object_or_404(Service, pk=service_id)
-
-        # визначаємо клієнта:
-        if client_id:
-            client = get_object_or_404(Client, pk=client_id)
-        else:
-            if not client_name:
-                return HttpResponseBadRequest("client_id or client_name required")
-            # створюємо мінімального клієнта
-            client = Client.objects.create(
-                name=client_name,
-                phone=client_phone,
-                owner=request.user  # якщо хочеш прив’язати
-            )
+        resource = resource_or_404(data["resource_id"])
 
-        if duration_min <= 0:
-            duration_min = int(getattr(service, "duration_min", 30) or 30)
+    # ---- послуга (угоду з клієнтом створює create_booking_with_deal) ----
+    service_id = data.get("service_id")
+    if not service_id:
+        return HttpResponseBadRequest("service_id required")
+    service = service_or_404(service_id)
+    if duration_min <= 0:
+        duration_min = int(getattr(service, "duration_min", 30) or 30)
 
-        with transaction.atomic():
-            deal = Deal.objects.create(
-                client=client,
-                title=getattr(service, "name", "Послуга"),
-                amount=getattr(service, "base_price", 0) or 0,
-                status="in_progress",
-                owner=request.user,
-                notes=data.get("note", "")
-            )
-            DealLine.objects.create(
-                deal=deal,
-                service=service,
-                quantity=1,
-                unit_price=getattr(service, "base_price", 0) or 0,
-            )
     # ---- валідація навички майстра (якщо заданий і є service) ----
     if master and service and not allow_unskilled:
-        if not master.services.filter(pk=service.pk).exists():
+        if not get_refdata().has_skill(master.pk, service.pk):
             return JsonResponse({"error": "skill", "message": "Майстер не має цієї навички"}, status=422)
 
     # ---- статус за замовчуванням ----
@@ -202,27 +362,25 @@ def booking_create(request):
 
     # ---- кінець запису ----
     end_at = start_at + timedelta(minutes=duration_min) if duration_min > 0 else None
-
-    # ---- перевірка конфліктів (тільки якщо master заданий) ----
-    with transaction.atomic():
-        if master:
-            overlap = (Booking.objects
-                       .select_for_update()
-                       .filter(master=master, start_at__lt=end_at, end_at__gt=start_at))
-            if overlap.exists():
-                return JsonResponse({"error": "conflict", "message": "Час зайнято"}, status=409)
-
-        b = Booking.objects.create(
-            deal=deal,
-            start_at=start_at,
-            end_at=end_at,           # якщо None — порахується у Booking.save()
-            master=master,           # може бути None
-            resource=resource,
-            note=data.get("note", ""),
-            color="#88CCEE",
-            status=status,
-            allow_unskilled=allow_unskilled,
-        )
+    if end_at and end_at - start_at > Booking.MAX_DURATION:
+        return HttpResponseBadRequest("duration too long")
+
+    # ---- клієнт, угода, перевірка конфліктів і запис — одна транзакція ----
+    b = Booking(
+        start_at=start_at,
+        end_at=end_at,           # якщо None — порахується у Booking.save()
+        master=master,           # може бути None
+        resource=resource,
+        note=data.get("note", ""),
+        color="#88CCEE",
+        status=status,
+        allow_unskilled=allow_unskilled,
+    )
+    found = create_booking_with_deal(request, data, service, b)
+    if found is None:
+        return HttpResponseBadRequest("client_id or client_name required")
+    if found:
+        return JsonResponse(conflict_payload(found), status=409)
 
     return JsonResponse(booking_to_event(b), status=201)
 
@@ -258,54 +416,405 @@ def booking_update(request, pk):
     if not data:
         return HttpResponseBadRequest("Invalid JSON")
 
-    # оновлення базових полів
-    start_at_str = data.get("start_at")
-    end_at_str   = data.get("end_at")
-    duration_min = data.get("duration_min")
+    error = apply_patch(b, data)
+    if error is not None:
+        return error
 
-    if start_at_str:
-        b.start_at = to_aware(start_at_str)
+    # конфлікти: майстер і ресурс (скасований запис час не займає)
+    found = save_checked(b)
+    if found:
+        return JsonResponse(conflict_payload(found), status=409)
 
-    if end_at_str:
-        b.end_at = to_aware(end_at_str)
-    elif duration_min and b.start_at:
-        b.end_at = b.start_at + timedelta(minutes=int(duration_min))
+    return JsonResponse(booking_to_event(b), status=200)
 
-    # master може бути None
-    if "master_id" in data:
-        master_id = data.get("master_id")
-        b.master = get_object_or_404(Employee, pk=master_id) if master_id else None
 
-    if "resource_id" in data:
-        res_id = data.get("resource_id")
-        b.resource = get_object_or_404(Resource, pk=res_id) if res_id else None
+def _batch_op(raw):
+    """JSON-операція пакета → нормалізований dict для beauty.batch (ValueError/TypeError/KeyError на сміття)."""
+    op = {"id": int(raw["id"])}
+    if raw.get("shift_min"):
+        op["shift"] = timedelta(minutes=int(raw["shift_min"]))
+    for key in ("start_at", "end_at"):
+        if raw.get(key):
+            op[key] = to_aware(raw[key])
+            if op[key] is None:
+                raise ValueError(key)
+    if raw.get("duration_min"):
+        op["duration"] = timedelta(minutes=int(raw["duration_min"]))
+    for key in ("master_id", "resource_id"):
+        if key in raw:
+            op[key] = int(raw[key]) if raw[key] else None
+    for key in ("status", "allow_unskilled"):
+        if key in raw:
+            op[key] = raw[key]
+    return op
 
-    if "note" in data:
-        b.note = data["note"] or ""
 
-    if "allow_unskilled" in data:
-        b.allow_unskilled = bool(data["allow_unskilled"])
+@login_required
+@user_passes_test(staff_only)
+@require_POST
+def booking_batch(request):
+    """
+    POST /api/calendar/bookings/batch/
+      {"ops": [
+        {"id": 5, "shift_min": 30},                          # зсув у часі
+        {"id": 6, "start_at": "...", "end_at": "..."},       # перенос (end_at / duration_min — optional)
+        {"id": 7, "master_id": 3},                           # інший майстер (null → без майстра)
+        {"id": 8, "resource_id": null},
+        {"id": 9, "status": "cancelled"}
+      ]}
+    Все або нічого: 200 {"ok": true, "results": [...]}; інакше 409 (конфлікти) / 422 —
+    з результатом по кожній операції, і жодна не застосована.
+    """
+    data = parse_json(request)
+    raw_ops = data.get("ops") if isinstance(data, dict) else None
+    if not isinstance(raw_ops, list) or not raw_ops:
+        return HttpResponseBadRequest("ops required")
+    if len(raw_ops) > batch.MAX_OPS:
+        return HttpResponseBadRequest(f"Too many ops (max {batch.MAX_OPS})")
+    try:
+        ops = [_batch_op(raw) for raw in raw_ops]
+    except (TypeError, ValueError, KeyError):
+        return HttpResponseBadRequest("Invalid op")
 
-    if "status" in data:
-        if data["status"] in {"tentative", "confirmed", "cancelled"}:
-            b.status = data["status"]
+    try:
+        ok, results, bookings = batch.apply_batch(ops)
+    except IntegrityError:
+        return JsonResponse({"ok": False, "error": "conflict", "message": "Час зайнято"}, status=409)
 
-    # перевірка навички (якщо master є і є service у deal)
-    service_line = b.deal.lines.select_related("service").first()
-    service = service_line.service if service_line else None
-    if b.master_id and service and not b.allow_unskilled:
-        if not b.master.services.filter(pk=service.pk).exists():
+    if ok:
+        for r in results:
+            b = bookings[r["id"]]
+            r.update(start=iso(b.start_at), end=iso(b.end_at), master_id=b.master_id,
+                     resource_id=b.resource_id, status=b.status)
+        return JsonResponse({"ok": True, "results": results})
+    status = 409 if any(r.get("error") in ("conflict", "resource_conflict") for r in results) else 422
+    return JsonResponse({"ok": False, "results": results}, status=status)
+
+
+@login_required
+@require_GET
+def autocomplete(request, kind):
+    """
+    GET /api/autocomplete/<clients|services|masters|resources>/?q=...&limit=10
+    → [{"id", "label", ...}] — до limit найкращих збігів (спершу з початку назви).
+    """
+    source = ac.SOURCES.get(kind)
+    if source is None:
+        return HttpResponseBadRequest("Unknown kind")
+    q = (request.GET.get("q") or "")[:100]
+    limit = _int_param(request, "limit", ac.DEFAULT_LIMIT, 1, ac.MAX_LIMIT)
+    response = JsonResponse(source(q, limit), safe=False)
+    patch_cache_control(response, private=True, max_age=ac.CACHE_TTL)
+    return response
+
+
+@login_required
+@require_GET
+def masters_for_service(request):
+    """
+    GET /api/masters/?service=3[&service=5 | service=3,5][&start=ISO][&duration_min=60][&available=1]
+    Майстри, що вміють усі вказані послуги (матриця навичок, без запитів).
+    Якщо задано start — ще й чи вільні вони в [start, start + тривалість): 1 запит по Booking.
+    """
+    ref = get_refdata()
+    try:
+        service_ids = parse_service_ids(request)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid service")
+    if not service_ids:
+        return HttpResponseBadRequest("service required")
+    services = [ref.service(sid) for sid in service_ids]
+    if None in services:
+        return HttpResponseBadRequest("Unknown service")
+
+    skilled = ref.skills.masters_for(*service_ids)
+    masters = [m for m in ref.master_list() if m.pk in skilled]
+
+    busy = None
+    start_at = to_aware(request.GET["start"]) if request.GET.get("start") else None
+    if start_at:
+        # сміття/0 → сума тривалостей послуг; більше доби не шукаємо
+        duration = _int_param(request, "duration_min", 0, 0, 24 * 60) or sum(s.duration_min for s in services)
+        end_at = start_at + timedelta(minutes=duration)
+        busy = set(Booking.objects
+                   .active()
+                   .overlapping(start_at, end_at)
+                   .filter(master_id__in=[m.pk for m in masters])
+                   .values_list("master_id", flat=True))
+        if request.GET.get("available") in ("1", "true"):
+            masters = [m for m in masters if m.pk not in busy]
+
+    return JsonResponse([
+        {"id": m.pk, "name": m.full_name, "available": None if busy is None else m.pk not in busy}
+        for m in masters
+    ], safe=False)
+
+
+@login_required
+@require_GET
+def availability_search(request):
+    """
+    GET /api/availability/search?service=3[,5] | deal=<id>
+        [&master=<id>] [&resource=<id>] [&from=ISO] [&days=30] [&limit=10] [&step=15]
+        [&duration_min=...] [&allow_unskilled=1]
+    Найближчі limit стартів, де майстер (і ресурс) вільні на всю тривалість послуг.
+    """
+    ref = get_refdata()
+    try:
+        service_ids = parse_service_ids(request)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid service")
+
+    duration = 0
+    if request.GET.get("deal"):
+        if not request.GET["deal"].isdecimal():
+            return HttpResponseBadRequest("Invalid deal")
+        lines = DealLine.objects.filter(deal_id=request.GET["deal"]).values_list("service_id", "quantity")
+        for service_id, qty in lines:
+            service_ids.append(service_id)
+            svc = ref.service(service_id)
+            duration += int((svc.duration_min if svc else 0) * qty)
+    else:
+        services = [ref.service(sid) for sid in service_ids]
+        if None in services:
+            return HttpResponseBadRequest("Unknown service")
+        duration = sum(svc.duration_min for svc in services)
+    if not service_ids:
+        return HttpResponseBadRequest("service or deal required")
+    duration = _int_param(request, "duration_min", duration or 30, 5, 24 * 60)
+
+    allow_unskilled = request.GET.get("allow_unskilled") in ("1", "true")
+    if request.GET.get("master"):
+        master = master_or_404(request.GET["master"])
+        if not allow_unskilled and not ref.skills.can_all(master.pk, service_ids):
             return JsonResponse({"error": "skill", "message": "Майстер не має цієї навички"}, status=422)
+        masters = {master.pk: master}
+    else:
+        skilled = ref.skills.masters_for(*set(service_ids))
+        masters = {m.pk: m for m in ref.master_list() if m.pk in skilled}
+
+    resource_id = resource_or_404(request.GET["resource"]).pk if request.GET.get("resource") else None
+
+    start = to_aware(request.GET["from"]) if request.GET.get("from") else timezone.now()
+    if not start:
+        return HttpResponseBadRequest("Invalid from")
+    days = _int_param(request, "days", availability.DEFAULT_HORIZON_DAYS, 1, availability.MAX_HORIZON_DAYS)
+    limit = _int_param(request, "limit", availability.DEFAULT_LIMIT, 1, availability.MAX_LIMIT)
+    step = _int_param(request, "step", availability.DEFAULT_STEP_MIN, 5, 120)
+
+    found = availability.search(duration, list(masters), start, days=days, resource_id=resource_id,
+                                limit=limit, step_min=step) if masters else []
+    return JsonResponse({
+        "duration_min": duration,
+        "slots": [
+            {
+                "start": iso(availability.from_ts(ts)),
+                "end": iso(availability.from_ts(ts + duration * 60)),
+                "master_id": mid,
+                "master": masters[mid].full_name,
+                "resource_id": resource_id,
+            }
+            for ts, mid in found
+        ],
+    })
 
-    # конфлікти (тільки якщо master є)
-    with transaction.atomic():
-        if b.master_id:
-            overlap = (Booking.objects
-                       .select_for_update()
-                       .filter(master=b.master, start_at__lt=b.end_at, end_at__gt=b.start_at)
-                       .exclude(pk=b.pk))
-            if overlap.exists():
-                return JsonResponse({"error": "conflict", "message": "Час зайнято"}, status=409)
-        b.save()
 
-    return JsonResponse(booking_to_event(b), status=200)
+@login_required
+@require_GET
+def resource_utilization(request):
+    """
+    GET /api/resources/utilization?from=YYYY-MM-DD&to=YYYY-MM-DD[&resource=<id>]
+    Завантаженість ресурсів по днях, %: зайняті хвилини (1 GROUP BY по Booking, запис
+    рахується в день свого початку) / хвилини роботи ресурсу за графіком (beauty.schedule).
+    """
+    first = parse_date(request.GET.get("from") or "") or timezone.localdate()
+    last = parse_date(request.GET.get("to") or "") or first + timedelta(days=6)
+    if last < first or (last - first).days > MAX_UTILIZATION_DAYS:
+        return HttpResponseBadRequest("Invalid from/to")
+
+    if request.GET.get("resource"):
+        resources = [resource_or_404(request.GET["resource"])]
+    else:
+        resources = get_refdata().resource_list(active_only=True)
+    ids = [r.pk for r in resources]
+
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first, time.min), tz)
+    end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min), tz)
+    rows = (Booking.objects
+            .active()
+            .filter(resource_id__in=ids, start_at__gte=start, start_at__lt=end, end_at__isnull=False)
+            .annotate(day=TruncDate("start_at", tzinfo=tz))
+            .values("resource_id", "day")
+            .annotate(busy=Sum(F("end_at") - F("start_at")), bookings=Count("id")))
+    busy = {(r["resource_id"], r["day"]): r for r in rows}
+
+    open_min = {}
+    for rid, intervals in schedule.compile_intervals(schedule.RESOURCE, ids, first, last).items():
+        for s, e in intervals:
+            key = (rid, availability.from_ts(s).date())
+            open_min[key] = open_min.get(key, 0) + (e - s) // 60
+
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    out = []
+    for r in resources:
+        per_day, total_busy, total_open = [], 0, 0
+        for day in days:
+            row = busy.get((r.pk, day))
+            busy_min = int(row["busy"].total_seconds() // 60) if row else 0
+            day_open = open_min.get((r.pk, day), 0)
+            total_busy += busy_min
+            total_open += day_open
+            per_day.append({
+                "date": day.isoformat(),
+                "bookings": row["bookings"] if row else 0,
+                "busy_min": busy_min,
+                "open_min": day_open,
+                "percent": _percent(busy_min, day_open),
+            })
+        out.append({
+            "id": r.pk,
+            "name": r.name,
+            "busy_min": total_busy,
+            "open_min": total_open,
+            "percent": _percent(total_busy, total_open),
+            "days": per_day,
+        })
+    return JsonResponse({"from": first.isoformat(), "to": last.isoformat(), "resources": out})
+
+
+def _conflicts_json(conflicts):
+    return [{"index": n, "start": iso(start)} for n, start in conflicts]
+
+
+@login_required
+@user_passes_test(staff_only)
+@require_POST
+def series_create(request):
+    """
+    POST /api/calendar/series/
+      {
+        "client_id": 5 | "client_name": "...", "client_phone": "...",
+        "service_id": 3, "master_id": 7 | null, "resource_id": 2 | null,
+        "start_at": "2025-09-17T11:00:00+02:00",
+        "freq": "daily|weekly|monthly", "interval": 2,
+        "count": 10 | "until": "2025-12-31",            # optional; без обох — безстрокова
+        "duration_min": 60, "note": "...", "allow_unskilled": false,
+        "materialize_days": 56,                          # 0 → лише зберегти правило
+        "skip_conflicts": false
+      }
+    Конфлікти на горизонті матеріалізації → 409 і нічого не зберігається (якщо не skip_conflicts).
+    """
+    data = parse_json(request)
+    if not data:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    start_at = to_aware(data.get("start_at") or "")
+    if not start_at:
+        return HttpResponseBadRequest("start_at required")
+    if not data.get("service_id"):
+        return HttpResponseBadRequest("service_id required")
+    service = service_or_404(data["service_id"])
+
+    freq = data.get("freq") or BookingSeries.Freq.WEEKLY
+    if freq not in BookingSeries.Freq.values:
+        return HttpResponseBadRequest("Invalid freq")
+    until = parse_date(data["until"]) if data.get("until") else None
+    try:
+        interval = int(data.get("interval") or 1)
+        count = int(data["count"]) if data.get("count") else None
+        duration_min = int(data.get("duration_min") or service.duration_min or 30)
+        materialize_days = int(data.get("materialize_days", recurrence.MATERIALIZE_DAYS))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid number")
+    if not (1 <= interval <= 52) or (count is not None and not 1 <= count <= recurrence.MAX_OCCURRENCES) \
+            or not (5 <= duration_min <= 12 * 60) or (data.get("until") and not until):
+        return HttpResponseBadRequest("Invalid recurrence")
+
+    master = master_or_404(data["master_id"]) if data.get("master_id") else None
+    resource = resource_or_404(data["resource_id"]) if data.get("resource_id") else None
+    allow_unskilled = bool(data.get("allow_unskilled"))
+    if master and not allow_unskilled and not get_refdata().has_skill(master.pk, service.pk):
+        return JsonResponse({"error": "skill", "message": "Майстер не має цієї навички"}, status=422)
+
+    client = resolve_client(request, data)
+    if client is None:
+        return HttpResponseBadRequest("client_id or client_name required")
+
+    try:
+        with transaction.atomic():
+            series = BookingSeries.objects.create(
+                client=client, service=service, master=master, resource=resource,
+                start_at=start_at, duration_min=duration_min, freq=freq, interval=interval,
+                count=count, until=until, note=data.get("note", ""),
+                allow_unskilled=allow_unskilled, owner=request.user,
+            )
+            created, conflicts = [], []
+            if materialize_days > 0:
+                created, conflicts = recurrence.materialize(
+                    series, end=timezone.now() + timedelta(days=min(materialize_days, 366)),
+                    skip_conflicts=bool(data.get("skip_conflicts")))
+                if conflicts and not data.get("skip_conflicts"):
+                    transaction.set_rollback(True)
+                    return JsonResponse({"error": "conflict", "message": "Час зайнято",
+                                         "conflicts": _conflicts_json(conflicts)}, status=409)
+    except IntegrityError:
+        return JsonResponse({"error": "conflict", "message": "Час зайнято"}, status=409)
+
+    body = series_to_json(series)
+    body.update(created=len(created), skipped=_conflicts_json(conflicts))
+    return JsonResponse(body, status=201)
+
+
+@login_required
+@user_passes_test(staff_only)
+def series_detail(request, pk):
+    """
+    GET    /api/calendar/series/<id>/?limit=10 → правило + найближчі повторення
+    DELETE /api/calendar/series/<id>/          → серію зупинено, майбутні записи скасовано (1 UPDATE)
+    """
+    series = get_object_or_404(BookingSeries, pk=pk)
+
+    if request.method == "DELETE":
+        with transaction.atomic():
+            series.is_active = False
+            series.save(update_fields=["is_active"])
+            cancelled = (Booking.objects
+                         .filter(series=series, start_at__gte=timezone.now())
+                         .active()
+                         .update(status=Booking.CANCELLED))
+            aggregates.touch(client_ids=[series.client_id])
+            bump_version("bookings")
+        return JsonResponse({"ok": True, "cancelled": cancelled})
+
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET", "DELETE"])
+    limit = _int_param(request, "limit", 10, 1, recurrence.MAX_OCCURRENCES)
+    upcoming = list(islice(recurrence.iter_occurrences(series, timezone.now()), limit)) if series.is_active else []
+    return JsonResponse(series_to_json(series, upcoming))
+
+
+@login_required
+@user_passes_test(staff_only)
+@require_POST
+def series_materialize(request, pk):
+    """
+    POST /api/calendar/series/<id>/materialize/  {"days": 56, "skip_conflicts": false}
+    Створює Booking для повторень на горизонті (пакетно; 409 зі списком конфліктів).
+    """
+    series = get_object_or_404(BookingSeries.objects.select_related("service", "client"), pk=pk, is_active=True)
+    data = parse_json(request) or {}
+    try:
+        days = max(1, min(366, int(data.get("days") or recurrence.MATERIALIZE_DAYS)))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid days")
+    skip = bool(data.get("skip_conflicts"))
+    try:
+        created, conflicts = recurrence.materialize(series, end=timezone.now() + timedelta(days=days),
+                                                    skip_conflicts=skip)
+    except IntegrityError:
+        return JsonResponse({"error": "conflict", "message": "Час зайнято"}, status=409)
+    if conflicts and not skip:
+        return JsonResponse({"error": "conflict", "message": "Час зайнято",
+                             "conflicts": _conflicts_json(conflicts)}, status=409)
+    return JsonResponse({"created": len(created), "skipped": _conflicts_json(conflicts)})
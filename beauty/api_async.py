@@ -0,0 +1,252 @@
+# beauty/api_async.py
+"""
+Async-варіанти найгарячіших ендпоінтів beauty.api (календар, пошук вікон, запис/перенос)
+для ASGI (crm/asgi.py). Під WSGI працюють теж, але виграш дають лише під ASGI:
+воркер не стоїть на запиті до БД, а обслуговує інших клієнтів календаря.
+
+Читання — async ORM (aiterator/aget/afirst); кілька синхронних читань — одним переходом
+у sync-потік на з'єднанні запиту (availability.run_reads), а не по потоку й з'єднанню
+на кожне. Усе, що пише, лишається синхронним у транзакції (select_for_update async ORM
+не вміє) — через sync_to_async, з тими ж хелперами, що й у beauty.api, тож правила
+валідації й відповіді однакові; запис з новою угодою — один виклик create_booking_with_deal.
+"""
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import Http404, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+
+from beauty import availability, recurrence
+from beauty.api import (
+    _int_param, apply_patch, booking_to_event, create_booking_with_deal, iso, occurrence_to_event,
+    parse_json, parse_service_ids, staff_only, to_aware,
+)
+from beauty.conflicts import conflict_payload, save_checked
+from beauty.models import Booking, DealLine
+from beauty.refdata import get_refdata, master_or_404
+
+aget_refdata = sync_to_async(get_refdata)
+
+
+def _lookup_or_404(getter, pk, what):
+    obj = getter(pk)
+    if obj is None:
+        raise Http404(f"{what} not found")
+    return obj
+
+
+async def _first_services(deal_ids):
+    """
+    {deal_id: назва першої послуги} — один запит на всі угоди вікна.
+    values_list з кількома полями — через async for по QuerySet, не aiterator()
+    (у Django 5.2 ValuesListIterable.__iter__ виконує запит ще в async-контексті).
+    """
+    names = {}
+    async for deal_id, name in (DealLine.objects
+                                .filter(deal_id__in=deal_ids)
+                                .order_by("deal_id", "pk")
+                                .values_list("deal_id", "service__name")):
+        names.setdefault(deal_id, name)
+    return names
+
+
+async def _booking_events(qs):
+    bookings = [b async for b in qs.aiterator()]
+    names = await _first_services({b.deal_id for b in bookings if b.deal_id})
+    return [booking_to_event(b, service_name=names.get(b.deal_id, "")) for b in bookings]
+
+
+# ---- endpoints ----
+
+@login_required
+@require_GET
+async def calendar_events(request):
+    """
+    GET /api/async/calendar/events?start=...&end=...&master=optional[&series=0][&include_cancelled=1]
+    Те саме, що beauty.api.calendar_events; записи й віртуальні повторення серій — паралельно.
+    """
+    start_dt = to_aware(request.GET.get("start") or "")
+    end_dt = to_aware(request.GET.get("end") or "")
+    if not start_dt or not end_dt:
+        return HttpResponseBadRequest("start/end required")
+    master_id = request.GET.get("master")
+
+    qs = (Booking.objects
+          .select_related("deal__client", "master__user", "resource")
+          .overlapping(start_dt, end_dt))
+    if request.GET.get("include_cancelled") not in ("1", "true"):
+        qs = qs.active()
+    if master_id:
+        qs = qs.filter(master_id=master_id)
+
+    if request.GET.get("series") in ("0", "false"):
+        return JsonResponse(await _booking_events(qs), safe=False)
+    events, (virtual,) = await asyncio.gather(
+        _booking_events(qs),
+        availability.run_reads((recurrence.virtual_occurrences, start_dt, end_dt, master_id)),
+    )
+    return JsonResponse(events + [occurrence_to_event(*occ) for occ in virtual], safe=False)
+
+
+@login_required
+@require_GET
+async def availability_search(request):
+    """
+    GET /api/async/availability/search — параметри як у beauty.api.availability_search.
+    Графіки, зайнятість і години ресурсу вантажаться одним sync_to_async (availability.asearch).
+    """
+    ref = await aget_refdata()
+    try:
+        service_ids = parse_service_ids(request)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid service")
+
+    duration = 0
+    if request.GET.get("deal"):
+        if not request.GET["deal"].isdecimal():
+            return HttpResponseBadRequest("Invalid deal")
+        lines = DealLine.objects.filter(deal_id=request.GET["deal"]).values_list("service_id", "quantity")
+        async for service_id, qty in lines:
+            service_ids.append(service_id)
+            svc = ref.service(service_id)
+            duration += int((svc.duration_min if svc else 0) * qty)
+    else:
+        services = [ref.service(sid) for sid in service_ids]
+        if None in services:
+            return HttpResponseBadRequest("Unknown service")
+        duration = sum(svc.duration_min for svc in services)
+    if not service_ids:
+        return HttpResponseBadRequest("service or deal required")
+    duration = _int_param(request, "duration_min", duration or 30, 5, 24 * 60)
+
+    allow_unskilled = request.GET.get("allow_unskilled") in ("1", "true")
+    if request.GET.get("master"):
+        master = await sync_to_async(master_or_404)(request.GET["master"])
+        if not allow_unskilled and not ref.skills.can_all(master.pk, service_ids):
+            return JsonResponse({"error": "skill", "message": "Майстер не має цієї навички"}, status=422)
+        masters = {master.pk: master}
+    else:
+        skilled = ref.skills.masters_for(*set(service_ids))
+        masters = {m.pk: m for m in ref.master_list() if m.pk in skilled}
+
+    resource_id = None
+    if request.GET.get("resource"):
+        resource_id = _lookup_or_404(ref.resource, request.GET["resource"], "Resource").pk
+
+    start = to_aware(request.GET["from"]) if request.GET.get("from") else timezone.now()
+    if not start:
+        return HttpResponseBadRequest("Invalid from")
+    days = _int_param(request, "days", availability.DEFAULT_HORIZON_DAYS, 1, availability.MAX_HORIZON_DAYS)
+    limit = _int_param(request, "limit", availability.DEFAULT_LIMIT, 1, availability.MAX_LIMIT)
+    step = _int_param(request, "step", availability.DEFAULT_STEP_MIN, 5, 120)
+
+    found = await availability.asearch(duration, list(masters), start, days=days, resource_id=resource_id,
+                                       limit=limit, step_min=step) if masters else []
+    return JsonResponse({
+        "duration_min": duration,
+        "slots": [
+            {
+                "start": iso(availability.from_ts(ts)),
+                "end": iso(availability.from_ts(ts + duration * 60)),
+                "master_id": mid,
+                "master": masters[mid].full_name,
+                "resource_id": resource_id,
+            }
+            for ts, mid in found
+        ],
+    })
+
+
+@login_required
+@user_passes_test(staff_only)
+@require_POST
+async def booking_create(request):
+    """
+    POST /api/async/calendar/bookings/ — тіло й відповіді як у beauty.api.booking_create
+    (client_id | client_name, service_id, start_at, [master_id, resource_id, duration_min, note, allow_unskilled]).
+    """
+    data = parse_json(request)
+    if not data:
+        return HttpResponseBadRequest("Invalid JSON")
+    start_at = to_aware(data.get("start_at") or "")
+    if not start_at:
+        return HttpResponseBadRequest("start_at required")
+    if not data.get("service_id"):
+        return HttpResponseBadRequest("service_id required")
+    try:
+        duration_min = int(data.get("duration_min") or 0)
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid duration_min")
+    allow_unskilled = bool(data.get("allow_unskilled"))
+
+    ref = await aget_refdata()
+    service = _lookup_or_404(ref.service, data["service_id"], "Service")
+    master = None
+    if data.get("master_id") not in (None, "", "null"):
+        master = await sync_to_async(master_or_404)(data["master_id"])
+    resource = _lookup_or_404(ref.resource, data["resource_id"], "Resource") if data.get("resource_id") else None
+
+    # на відміну від sync-версії, все, що можна, перевіряємо до створення угоди
+    if master and not allow_unskilled and not ref.has_skill(master.pk, service.pk):
+        return JsonResponse({"error": "skill", "message": "Майстер не має цієї навички"}, status=422)
+    if duration_min <= 0:
+        duration_min = int(service.duration_min or 30)
+    end_at = start_at + timedelta(minutes=duration_min)
+    if end_at - start_at > Booking.MAX_DURATION:
+        return HttpResponseBadRequest("duration too long")
+
+    b = Booking(
+        start_at=start_at,
+        end_at=end_at,
+        master=master,
+        resource=resource,
+        note=data.get("note", ""),
+        color="#88CCEE",
+        status="tentative" if allow_unskilled or master is None else "confirmed",
+        allow_unskilled=allow_unskilled,
+    )
+    # клієнт, угода й запис — одним викликом в одній транзакції: 409 відкочує й угоду
+    found = await sync_to_async(create_booking_with_deal)(request, data, service, b)
+    if found is None:
+        return HttpResponseBadRequest("client_id or client_name required")
+    if found:
+        return JsonResponse(conflict_payload(found), status=409)
+    return JsonResponse(booking_to_event(b, service_name=service.name), status=201)
+
+
+@login_required
+@user_passes_test(staff_only)
+async def booking_update(request, pk):
+    """
+    PATCH  /api/async/calendar/bookings/<id> — поля як у beauty.api.booking_update
+    DELETE /api/async/calendar/bookings/<id>
+    """
+    if request.method == "DELETE":
+        deleted, _ = await Booking.objects.filter(pk=pk).adelete()
+        if not deleted:
+            raise Http404("Booking not found")
+        return JsonResponse({"ok": True})
+
+    if request.method not in ("PATCH", "POST"):  # деякі клієнти шлють POST як PATCH
+        return HttpResponseNotAllowed(["PATCH", "DELETE"])
+
+    data = parse_json(request)
+    if not data:
+        return HttpResponseBadRequest("Invalid JSON")
+    try:
+        b = await Booking.objects.select_related("deal__client", "master__user", "resource").aget(pk=pk)
+    except Booking.DoesNotExist:
+        raise Http404("Booking not found")
+
+    error = await sync_to_async(apply_patch)(b, data)
+    if error is not None:
+        return error
+    found = await sync_to_async(save_checked)(b)
+    if found:
+        return JsonResponse(conflict_payload(found), status=409)
+
+    line = await DealLine.objects.filter(deal_id=b.deal_id).select_related("service").order_by("pk").afirst()
+    return JsonResponse(booking_to_event(b, service_name=line.service.name if line else ""))
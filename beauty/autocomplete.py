@@ -0,0 +1,87 @@
+"""
+Підказки (typeahead) для форм запису: клієнти, послуги, майстри, ресурси.
+
+Послуги/майстри/ресурси — з довідника в пам'яті (beauty.refdata), без запитів.
+Клієнти — запит по триграмних GIN-індексах (UPPER(name), UPPER(email), phone_norm; див.
+Client.Meta.indexes), спершу збіги з початку імені. Відповідь — короткі {id, label}
+і коротко кешується з версією "clients" у ключі (сигнали в main.models бампають її).
+"""
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from main.dedup import phone_key
+from main.models import Client
+from main.versioning import get_version
+
+from .refdata import get_refdata
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+CACHE_TTL = 30             # секунд: нових клієнтів і так видно одразу (версія в ключі)
+CLIENTS_VERSION = "clients"
+
+
+def _rank(items, q, label):
+    """Фільтр по підрядку (casefold), збіги з початку — першими, далі за алфавітом."""
+    q = q.casefold()
+    hits = []
+    for obj in items:
+        text = label(obj).casefold()
+        pos = text.find(q) if q else 0
+        if pos >= 0:
+            hits.append((pos != 0, text, obj))
+    hits.sort(key=lambda h: (h[0], h[1]))
+    return [h[2] for h in hits]
+
+
+def services(q, limit=DEFAULT_LIMIT):
+    found = _rank(get_refdata().service_list(active_only=True), q, lambda s: s.name)
+    return [{"id": s.pk, "label": s.name, "duration_min": s.duration_min} for s in found[:limit]]
+
+
+def masters(q, limit=DEFAULT_LIMIT):
+    found = _rank(get_refdata().master_list(), q, lambda m: m.full_name)
+    return [{"id": m.pk, "label": m.full_name} for m in found[:limit]]
+
+
+def resources(q, limit=DEFAULT_LIMIT):
+    found = _rank(get_refdata().resource_list(active_only=True), q, lambda r: r.name)
+    return [{"id": r.pk, "label": r.name} for r in found[:limit]]
+
+
+def clients(q, limit=DEFAULT_LIMIT):
+    """Порожній q — останні створені; 1 символ — лише початок імені (триграмам замало)."""
+    q = q.strip()
+    digest = hashlib.md5(q.casefold().encode()).hexdigest()   # ключ без пробілів/кирилиці (memcached)
+    key = f"crm:ac:clients:{get_version(CLIENTS_VERSION)}:{limit}:{digest}"
+    found = cache.get(key)
+    if found is not None:
+        return found
+
+    qs = Client.objects.all()
+    if not q:
+        qs = qs.order_by("-created_at")
+    else:
+        if len(q) == 1:
+            cond = Q(name__istartswith=q)
+        else:
+            cond = Q(name__icontains=q) | Q(email__icontains=q)
+            digits = re.sub(r"\D", "", q)
+            if len(digits) >= 3:
+                cond |= Q(phone_norm__contains=phone_key(digits) or digits)
+        qs = (qs.filter(cond)
+              .annotate(prefix=Case(When(name__istartswith=q, then=Value(0)),
+                                    default=Value(1), output_field=IntegerField()))
+              .order_by("prefix", "name", "pk"))
+    found = [
+        {"id": pk, "label": name, "phone": phone}
+        for pk, name, phone in qs.values_list("pk", "name", "phone")[:limit]
+    ]
+    cache.set(key, found, CACHE_TTL)
+    return found
+
+
+SOURCES = {"clients": clients, "services": services, "masters": masters, "resources": resources}
@@ -0,0 +1,199 @@
+"""
+Пошук найближчих вільних вікон для послуг(и) по майстрах і ресурсах.
+
+Все зводиться до інтервалів у секундах epoch:
+  робочі інтервали майстра  −  (його записи ∪ записи ресурсу)  =  вільні інтервали,
+далі лінивий генератор стартів на сітці step і heapq.merge по майстрах —
+беремо перші N, решту горизонту навіть не обходимо.
+
+Дані вантажимо пакетно (load_*), обчислення (compute_slots) — чиста функція.
+asearch — те саме для async-view: усі load_* одним sync_to_async, на з'єднанні запиту.
+"""
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking
+from . import schedule
+
+DEFAULT_STEP_MIN = 15
+DEFAULT_LIMIT = 10
+DEFAULT_HORIZON_DAYS = 30
+MAX_HORIZON_DAYS = 60
+MAX_LIMIT = 100
+
+
+def _ts(dt):
+    return int(dt.timestamp())
+
+
+def from_ts(ts):
+    return timezone.localtime(datetime.fromtimestamp(ts, tz=timezone.get_current_timezone()))
+
+
+# ---- інтервальна арифметика (усе відсортоване, [s, e)) ----
+
+def merge_intervals(intervals):
+    out = []
+    for s, e in sorted(intervals):
+        if out and s <= out[-1][1]:
+            if e > out[-1][1]:
+                out[-1] = (out[-1][0], e)
+        else:
+            out.append((s, e))
+    return out
+
+
+def subtract_intervals(free, busy):
+    """free − busy за один прохід (обидва відсортовані, busy — злитий)."""
+    out = []
+    j, n = 0, len(busy)
+    for fs, fe in free:
+        while j < n and busy[j][1] <= fs:
+            j += 1
+        cur, k = fs, j
+        while k < n and busy[k][0] < fe:
+            bs, be = busy[k]
+            if bs > cur:
+                out.append((cur, bs))
+            if be > cur:
+                cur = be
+            k += 1
+        if cur < fe:
+            out.append((cur, fe))
+    return out
+
+
+def intersect_intervals(a, b):
+    """Перетин двох відсортованих списків інтервалів (напр. зміна майстра ∩ години ресурсу)."""
+    out = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        s, e = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if s < e:
+            out.append((s, e))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+def iter_starts(free, duration, step, not_before=0):
+    """Старти на сітці step (секунди), що повністю влазять у вільні інтервали."""
+    for s, e in free:
+        if s < not_before:
+            s = not_before
+        t = -(-s // step) * step
+        while t + duration <= e:
+            yield t
+            t += step
+
+
+# ---- завантаження ----
+
+def load_work_intervals(master_ids, start, end):
+    """Реальні зміни майстрів з урахуванням винятків (beauty.schedule)."""
+    first, last = schedule.local_date_range(start, end)
+    return schedule.compile_intervals(schedule.EMPLOYEE, master_ids, first, last)
+
+
+def load_resource_hours(resource_id, start, end):
+    first, last = schedule.local_date_range(start, end)
+    return schedule.compile_intervals(schedule.RESOURCE, [resource_id], first, last)[resource_id]
+
+
+def load_busy(master_ids, resource_id, start, end):
+    """Один запит: активні (не скасовані) записи цих майстрів і (опційно) ресурсу в горизонті."""
+    cond = Q(master_id__in=master_ids)
+    if resource_id:
+        cond |= Q(resource_id=resource_id)
+    rows = (Booking.objects
+            .active()
+            .overlapping(start, end)
+            .filter(cond)
+            .values_list("master_id", "resource_id", "start_at", "end_at"))
+
+    by_master = {mid: [] for mid in master_ids}
+    resource_busy = []
+    for master_id, res_id, s, e in rows:
+        iv = (_ts(s), _ts(e))
+        if master_id in by_master:
+            by_master[master_id].append(iv)
+        if resource_id and res_id == resource_id:
+            resource_busy.append(iv)
+    return by_master, resource_busy
+
+
+# ---- обчислення ----
+
+def _tagged(starts, master_id):
+    for t in starts:
+        yield t, master_id
+
+
+def compute_slots(duration_min, work, busy_by_master, resource_busy=(), not_before=None,
+                  limit=DEFAULT_LIMIT, step_min=DEFAULT_STEP_MIN, resource_hours=None):
+    """
+    work: {master_id: [(s, e), ...]}, busy_by_master: {master_id: [(s, e), ...]} (секунди).
+    resource_hours — години роботи ресурсу (None → ресурс не обмежує).
+    Повертає [(start_ts, master_id), ...] — перші limit за часом (при рівності — менший id).
+    """
+    duration, step = duration_min * 60, step_min * 60
+    not_before = not_before or 0
+    resource_busy = list(resource_busy)
+    streams = []
+    for mid, shifts in work.items():
+        if resource_hours is not None:
+            shifts = intersect_intervals(shifts, resource_hours)
+        busy = merge_intervals(busy_by_master.get(mid, []) + resource_busy)
+        free = subtract_intervals(shifts, busy)
+        streams.append(_tagged(iter_starts(free, duration, step, not_before), mid))
+    return list(islice(heapq.merge(*streams), limit))
+
+
+def search(duration_min, master_ids, start, days=DEFAULT_HORIZON_DAYS, resource_id=None,
+           limit=DEFAULT_LIMIT, step_min=DEFAULT_STEP_MIN):
+    """Синхронна обгортка: пакетне завантаження + compute_slots."""
+    end = start + timedelta(days=days)
+    work = load_work_intervals(master_ids, start, end)
+    busy_by_master, resource_busy = load_busy(master_ids, resource_id, start, end)
+    resource_hours = load_resource_hours(resource_id, start, end) if resource_id else None
+    return compute_slots(duration_min, work, busy_by_master, resource_busy,
+                         not_before=_ts(start), limit=limit, step_min=step_min,
+                         resource_hours=resource_hours)
+
+
+# ---- async ----
+
+def _run_all(calls):
+    return [fn(*args) for fn, *args in calls]
+
+
+async def run_reads(*calls):
+    """
+    calls: (fn, *args) — синхронні читання, послідовно, одним переходом у sync-потік.
+    Окремий потік на кожне читання (thread_sensitive=False) означав би нове з'єднання з БД
+    на кожен запит (з'єднання живуть у потоці) — дорожче за самі запити в кілька мс.
+    """
+    return await sync_to_async(_run_all)(calls)
+
+
+async def asearch(duration_min, master_ids, start, days=DEFAULT_HORIZON_DAYS, resource_id=None,
+                  limit=DEFAULT_LIMIT, step_min=DEFAULT_STEP_MIN):
+    """
+    search() для async-view: графіки майстрів, зайнятість і години ресурсу — одним
+    run_reads (event loop вільний, поки йдуть запити); compute_slots — чиста функція, рахуємо тут же.
+    """
+    end = start + timedelta(days=days)
+    calls = [(load_work_intervals, master_ids, start, end), (load_busy, master_ids, resource_id, start, end)]
+    if resource_id:
+        calls.append((load_resource_hours, resource_id, start, end))
+    work, (busy_by_master, resource_busy), *rest = await run_reads(*calls)
+    return compute_slots(duration_min, work, busy_by_master, resource_busy,
+                         not_before=_ts(start), limit=limit, step_min=step_min,
+                         resource_hours=rest[0] if rest else None)
@@ -0,0 +1,181 @@
+"""
+Пакетні зміни записів календаря: перенос/зсув, зміна майстра чи ресурсу, скасування.
+
+Все або нічого. Валідація одним проходом по всьому пакету:
+  блокування майстрів/ресурсів і самих записів, 1 запит — послуги їхніх угод (навички),
+  1 — зайнятість усіх зачеплених майстрів/ресурсів поза пакетом;
+перетини змін між собою й з БД шукаємо sweep'ом у пам'яті, запис — один bulk_update.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from main import aggregates, search
+from main.versioning import bump_version
+
+from .conflicts import MASTER, MESSAGES, RESOURCE, ERROR_CODES, check_deferred_constraints, lock_owners
+from .models import Booking, DealLine
+from .refdata import get_refdata
+
+MAX_OPS = 200
+STATUSES = {"tentative", "confirmed", "cancelled"}
+UPDATE_FIELDS = ["start_at", "end_at", "master", "resource", "status", "allow_unskilled"]
+
+
+class OpError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _apply(b, op, ref):
+    """Мутація одного запису в пам'яті. op уже нормалізований (datetime/timedelta, див. api)."""
+    duration = b.end_at - b.start_at
+    if op.get("shift"):
+        b.start_at += op["shift"]
+        b.end_at += op["shift"]
+    if op.get("start_at"):
+        b.start_at = op["start_at"]
+        b.end_at = op["start_at"] + duration
+    if op.get("end_at"):
+        b.end_at = op["end_at"]
+    elif op.get("duration"):
+        b.end_at = b.start_at + op["duration"]
+    if b.end_at <= b.start_at:
+        raise OpError("invalid", "Кінець раніше за початок")
+    if b.end_at - b.start_at > Booking.MAX_DURATION:
+        raise OpError("invalid", "Запис довший за добу")
+
+    if "master_id" in op:
+        mid = op["master_id"]
+        if mid and ref.master(mid) is None:
+            raise OpError("not_found", "Майстра не знайдено")
+        b.master_id = int(mid) if mid else None
+    if "resource_id" in op:
+        rid = op["resource_id"]
+        if rid and ref.resource(rid) is None:
+            raise OpError("not_found", "Ресурс не знайдено")
+        b.resource_id = int(rid) if rid else None
+    if "allow_unskilled" in op:
+        b.allow_unskilled = bool(op["allow_unskilled"])
+    if "status" in op:
+        if op["status"] not in STATUSES:
+            raise OpError("invalid", "Невідомий статус")
+        b.status = op["status"]
+
+
+def find_batch_clashes(bookings, busy_rows):
+    """
+    bookings — змінені записи пакета, busy_rows — (master_id, resource_id, start, end) з БД поза пакетом.
+    Повертає {booking_pk: {"master", "resource"}} для записів пакета, що з кимось перетинаються.
+    """
+    by_owner = defaultdict(list)
+    for b in bookings:
+        if b.status == Booking.CANCELLED:
+            continue
+        if b.master_id:
+            by_owner[(MASTER, b.master_id)].append((b.start_at, b.end_at, b.pk))
+        if b.resource_id:
+            by_owner[(RESOURCE, b.resource_id)].append((b.start_at, b.end_at, b.pk))
+    for master_id, resource_id, s, e in busy_rows:
+        for key in ((MASTER, master_id), (RESOURCE, resource_id)):
+            if key in by_owner:
+                by_owner[key].append((s, e, None))
+
+    clashes = defaultdict(set)
+    for (kind, _), intervals in by_owner.items():
+        intervals.sort(key=lambda iv: (iv[0], iv[1]))
+        reach_end, reach_tag = None, None
+        for s, e, tag in intervals:
+            # той, що тягнеться найдалі, гарантовано містить s → перетин
+            if reach_end is not None and s < reach_end:
+                for t in (tag, reach_tag):
+                    if t is not None:
+                        clashes[t].add(kind)
+            if reach_end is None or e > reach_end:
+                reach_end, reach_tag = e, tag
+    return clashes
+
+
+def apply_batch(ops):
+    """
+    ops: [{"id": pk, ...зміни}] (нормалізовані). Повертає (ok, results, bookings_by_pk).
+    results — по одному dict на операцію в тому ж порядку; при ok=False нічого не змінено.
+    """
+    ref = get_refdata()
+    ids = [op["id"] for op in ops]
+    results = [{"id": pk, "ok": True} for pk in ids]
+
+    def fail(i, code, message):
+        results[i].update(ok=False, error=code, message=message)
+
+    with transaction.atomic():
+        # спершу майстри/ресурси (поточні й нові), потім записи — той самий порядок, що в booking_update
+        current = Booking.objects.filter(pk__in=ids).values_list("master_id", "resource_id")
+        lock_owners({m for m, _ in current} | {op["master_id"] for op in ops if op.get("master_id")},
+                    {r for _, r in current} | {op["resource_id"] for op in ops if op.get("resource_id")})
+        locked = {b.pk: b for b in (Booking.objects
+                                    .select_for_update(of=("self",))
+                                    .filter(pk__in=ids)
+                                    .order_by("pk"))}
+        seen = set()
+        changed = []
+        for i, op in enumerate(ops):
+            b = locked.get(op["id"])
+            if b is None:
+                fail(i, "not_found", "Запис не знайдено")
+                continue
+            if op["id"] in seen:
+                fail(i, "duplicate", "Запис уже є в пакеті")
+                continue
+            seen.add(op["id"])
+            if b.end_at is None:
+                fail(i, "invalid", "Запис без часу завершення")
+                continue
+            try:
+                _apply(b, op, ref)
+            except OpError as e:
+                fail(i, e.code, e.message)
+                continue
+            changed.append((i, b))
+
+        # навички: послуги всіх угод пакета одним запитом
+        services = defaultdict(set)
+        for deal_id, service_id in DealLine.objects.filter(
+                deal_id__in=[b.deal_id for _, b in changed]).values_list("deal_id", "service_id"):
+            services[deal_id].add(service_id)
+        for i, b in changed:
+            if b.master_id and not b.allow_unskilled and not ref.skills.can_all(b.master_id, services[b.deal_id]):
+                fail(i, "skill", "Майстер не має цієї навички")
+
+        active = [b for _, b in changed if b.status != Booking.CANCELLED]
+        masters = sorted({b.master_id for b in active if b.master_id})
+        resources = sorted({b.resource_id for b in active if b.resource_id})
+        busy = []
+        if masters or resources:
+            busy = list(Booking.objects
+                        .active()
+                        .overlapping(min(b.start_at for b in active), max(b.end_at for b in active))
+                        .filter(Q(master_id__in=masters) | Q(resource_id__in=resources))
+                        .exclude(pk__in=ids)
+                        .values_list("master_id", "resource_id", "start_at", "end_at"))
+        clashes = find_batch_clashes(active, busy)
+        for i, b in changed:
+            if b.pk in clashes and results[i]["ok"]:
+                kind = MASTER if MASTER in clashes[b.pk] else RESOURCE
+                fail(i, ERROR_CODES[kind], MESSAGES[kind])
+                results[i]["conflicts"] = sorted(clashes[b.pk])
+
+        if not all(r["ok"] for r in results):
+            return False, results, locked
+
+        Booking.objects.bulk_update([b for _, b in changed], UPDATE_FIELDS)
+        check_deferred_constraints()
+        # bulk_update сигналів не шле
+        aggregates.touch(deal_ids={b.deal_id for _, b in changed})
+        search.touch("booking", [b.pk for _, b in changed])
+        bump_version("bookings")
+    return True, results, locked
+
@@ -0,0 +1,232 @@
+"""
+Синхронізація каталогу послуг із зовнішніх файлів (CSV / JSON / JSON Lines / YAML).
+
+Файл читаємо потоково, порівнюємо з таблицею Service у пам'яті і застосовуємо
+зміни пакетно: bulk_create(update_conflicts=True) по code + один UPDATE на деактивацію.
+"""
+import csv
+import json
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.db import transaction
+
+from main import search
+
+from .models import Service
+from .refdata import invalidate_refdata
+
+BATCH_SIZE = 1000
+SYNC_FIELDS = ("name", "group", "base_price", "duration_min", "is_active")
+
+CatalogItem = namedtuple("CatalogItem", "name code group base_price duration_min")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+# ---- читання файлів ----
+
+def _iter_grouped(data):
+    # {"hair": [{...}, ...], ...} — формат словника DATA з seed_services
+    if isinstance(data, dict):
+        for grp, items in data.items():
+            for item in items:
+                yield {"group": grp, **item}
+    elif isinstance(data, list):
+        yield from data
+    else:
+        raise CatalogError("Очікується список послуг або словник {група: [послуги]}")
+
+
+def read_catalog_file(path):
+    """
+    Генератор сирих рядків-словників з файлу; формат визначаємо за розширенням.
+    Биті JSON/YAML/CSV і не-UTF-8 файли → CatalogError з іменем файлу (а не traceback).
+    """
+    path = Path(path)
+    try:
+        yield from _read(path)
+    except CatalogError:
+        raise
+    except UnicodeDecodeError as e:
+        raise CatalogError(f"{path.name}: файл не в UTF-8 ({e.reason}, байт {e.start})")
+    except (ValueError, csv.Error) as e:  # json.JSONDecodeError — підклас ValueError
+        raise CatalogError(f"{path.name}: {e}")
+
+
+def _read(path):
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        with path.open(newline="", encoding="utf-8-sig") as fh:
+            yield from csv.DictReader(fh)
+    elif ext in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        raise CatalogError(f"{path.name}:{lineno}: {e}")
+    elif ext == ".json":
+        with path.open(encoding="utf-8") as fh:
+            yield from _iter_grouped(json.load(fh))
+    elif ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise CatalogError("Для YAML-каталогів потрібен пакет PyYAML (pip install pyyaml)")
+        with path.open(encoding="utf-8") as fh:
+            try:
+                data = yaml.safe_load(fh)
+            except yaml.YAMLError as e:
+                raise CatalogError(f"{path.name}: {e}")
+        yield from _iter_grouped(data or [])
+    else:
+        raise CatalogError(f"Невідомий формат каталогу: {path.name}")
+
+
+def _text(raw, key):
+    """Скаляр → рядок: у YAML/JSON code буває числом (code: 101); списки/словники — помилка."""
+    value = raw.get(key)
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, tuple, set)):
+        raise CatalogError(f"Поле {key!r} має бути рядком або числом: {raw!r}")
+    return str(value).strip()
+
+
+def parse_item(raw, default_group=None):
+    if not isinstance(raw, dict):
+        raise CatalogError(f"Очікується об'єкт послуги, отримано: {raw!r}")
+    name = _text(raw, "name")
+    if not name:
+        raise CatalogError(f"Послуга без назви: {raw!r}")
+    code = _text(raw, "code") or None
+    group = _text(raw, "group") or default_group or Service.Group.HAIR
+    if group not in Service.Group.values:
+        raise CatalogError(f"{name}: невідома група {group!r}")
+    try:
+        price = Decimal(str(raw.get("base_price", raw.get("price")) or 0)).quantize(Decimal("0.01"))
+        duration = int(raw.get("duration_min", raw.get("duration")) or 30)
+    except (InvalidOperation, ValueError, TypeError):
+        raise CatalogError(f"{name}: некоректна ціна або тривалість")
+    return CatalogItem(name, code, group, price, duration)
+
+
+# ---- diff ----
+
+class CatalogDiff:
+    def __init__(self):
+        self.create = []        # нові Service (ще без pk)
+        self.update = []        # (Service, {поле: (старе, нове)})
+        self.deactivate = []    # Service
+        self.unchanged = 0
+
+    @property
+    def has_changes(self):
+        return bool(self.create or self.update or self.deactivate)
+
+
+def diff_catalog(items, groups=None, deactivate_missing=False):
+    """
+    items — ітерабельне CatalogItem. Ключ: code, а для послуг без коду — (група, назва).
+    groups — обмеження на групи (None → групи, що зустрілись у каталозі).
+    """
+    existing = Service.objects.all()
+    if groups:
+        existing = existing.filter(group__in=groups)
+    by_pk, by_code, by_name = {}, {}, {}
+    for s in existing:
+        by_pk[s.pk] = s
+        if s.code:
+            by_code[s.code] = s
+        by_name.setdefault((s.group, s.name), s)
+
+    diff = CatalogDiff()
+    seen_pks, seen_codes, seen_groups = set(), set(), set()
+    for item in items:
+        if groups and item.group not in groups:
+            continue
+        if item.code:
+            if item.code in seen_codes:
+                raise CatalogError(f"Код {item.code} повторюється у каталозі")
+            seen_codes.add(item.code)
+        seen_groups.add(item.group)
+
+        obj = by_code.get(item.code) if item.code else None
+        if obj is None:
+            obj = by_name.get((item.group, item.name))
+            if obj is not None and obj.code and item.code and obj.code != item.code:
+                obj = None  # однакова назва, але інша послуга
+        if obj is None:
+            diff.create.append(Service(
+                name=item.name, code=item.code, group=item.group,
+                base_price=item.base_price, duration_min=item.duration_min, is_active=True,
+            ))
+            continue
+
+        seen_pks.add(obj.pk)
+        wanted = {
+            "name": item.name, "code": item.code or obj.code, "group": item.group,
+            "base_price": item.base_price, "duration_min": item.duration_min, "is_active": True,
+        }
+        changes = {f: (getattr(obj, f), v) for f, v in wanted.items() if getattr(obj, f) != v}
+        if changes:
+            for f, (_, v) in changes.items():
+                setattr(obj, f, v)
+            diff.update.append((obj, changes))
+        else:
+            diff.unchanged += 1
+
+    if deactivate_missing:
+        scope = set(groups) if groups else seen_groups
+        diff.deactivate = [
+            s for s in by_pk.values()
+            if s.is_active and s.group in scope and s.pk not in seen_pks
+        ]
+    return diff
+
+
+# ---- застосування ----
+
+@transaction.atomic
+def apply_diff(diff):
+    # оновлення з кодом і нові з кодом — одним upsert-ом по унікальному code
+    upserts = [obj for obj, changes in diff.update if obj.code and "code" not in changes]
+    upserts += [obj for obj in diff.create if obj.code]
+    upserts = [Service(code=obj.code, **{f: getattr(obj, f) for f in SYNC_FIELDS}) for obj in upserts]
+    if upserts:
+        Service.objects.bulk_create(
+            upserts, batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=["code"], update_fields=list(SYNC_FIELDS),
+        )
+
+    # послуги, які зіставили за назвою (код з'явився вперше або його нема) — по pk
+    by_pk = [obj for obj, changes in diff.update if not obj.code or "code" in changes]
+    if by_pk:
+        Service.objects.bulk_update(by_pk, [*SYNC_FIELDS, "code"], batch_size=BATCH_SIZE)
+
+    plain = [obj for obj in diff.create if not obj.code]
+    if plain:
+        Service.objects.bulk_create(plain, batch_size=BATCH_SIZE)
+
+    if diff.deactivate:
+        Service.objects.filter(pk__in=[s.pk for s in diff.deactivate]).update(is_active=False)
+
+    # bulk-операції не шлють post_save — інвалідовуємо довідник і пошук вручну
+    transaction.on_commit(invalidate_refdata)
+    search.rebuild(kinds=["service"])  # каталог невеликий — простіше переіндексувати весь
+
+
+def describe_diff(diff, write):
+    """Людиночитний dry-run: write(str, style) для кожної зміни."""
+    for obj in diff.create:
+        write(f"[+] {obj.group}: {obj.name} ({obj.code or '—'}) {obj.base_price} / {obj.duration_min} хв", "SUCCESS")
+    for obj, changes in diff.update:
+        details = ", ".join(f"{f}: {old} → {new}" for f, (old, new) in changes.items())
+        write(f"[~] {obj.group}: {obj.name} ({details})", "WARNING")
+    for obj in diff.deactivate:
+        write(f"[-] деактивовано: {obj.group} / {obj.name}", "NOTICE")
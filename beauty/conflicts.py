@@ -0,0 +1,107 @@
+"""
+Перевірка зайнятості запису: майстер і ресурс (крісло/кабінет/мийка) одним запитом.
+
+Порядок у транзакції: lock_owners() → find_conflicts() → insert/update.
+Блокування рядків майстра й ресурсу серіалізує паралельні записи на них
+(select_for_update по самих Booking не бачить ще не вставлених рядків).
+Останній рубіж — exclusion-констрейнти в БД (Booking.Meta.constraints). Вони відкладені
+(DEFERRABLE INITIALLY DEFERRED), тож без check_deferred_constraints() порушення вилізло б
+лише на COMMIT зовнішньої транзакції, повз except IntegrityError.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+
+from main.models import Employee
+
+from .models import Booking, Resource
+
+MASTER = "master"
+RESOURCE = "resource"
+
+MESSAGES = {
+    MASTER: "Час зайнято",
+    RESOURCE: "Ресурс зайнято",
+}
+ERROR_CODES = {MASTER: "conflict", RESOURCE: "resource_conflict"}
+
+
+def _ids(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sorted({v for v in value if v})
+    return [value] if value else []
+
+
+def lock_owners(master_id=None, resource_id=None):
+    """
+    SELECT ... FOR UPDATE на майстрів і ресурси (id або колекція id).
+    Порядок завжди той самий (майстри → ресурси, за pk) — без дедлоків між паралельними записами.
+    """
+    for model, pks in ((Employee, _ids(master_id)), (Resource, _ids(resource_id))):
+        if pks:
+            list(model.objects.select_for_update().filter(pk__in=pks).order_by("pk").values_list("pk", flat=True))
+
+
+def check_deferred_constraints():
+    """Exclusion-констрейнти відкладені (щоб пакет міг поміняти записи місцями) — перевіряємо тут же."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS booking_master_no_overlap, booking_resource_no_overlap IMMEDIATE")
+
+
+def find_conflicts(start_at, end_at, master_id=None, resource_id=None, exclude_pk=None):
+    """
+    Що саме перетинається з [start_at, end_at): {"master", "resource"} або порожня множина.
+    Скасовані записи час не займають (так само, як в exclusion-констрейнтах).
+    """
+    cond = Q()
+    if master_id:
+        cond |= Q(master_id=master_id)
+    if resource_id:
+        cond |= Q(resource_id=resource_id)
+    if not cond or not start_at or not end_at:
+        return set()
+
+    qs = Booking.objects.active().overlapping(start_at, end_at).filter(cond)
+    if exclude_pk:
+        qs = qs.exclude(pk=exclude_pk)
+
+    found = set()
+    for m_id, r_id in qs.values_list("master_id", "resource_id"):
+        if master_id and m_id == master_id:
+            found.add(MASTER)
+        if resource_id and r_id == resource_id:
+            found.add(RESOURCE)
+    return found
+
+
+def owner_kinds(master_id=None, resource_id=None):
+    """Для IntegrityError від констрейнта: який саме спрацював, не знаємо — підозрюємо обидва."""
+    return {kind for kind, pk in ((MASTER, master_id), (RESOURCE, resource_id)) if pk}
+
+
+def save_checked(booking):
+    """
+    lock_owners() → find_conflicts() → save() в одній транзакції.
+    Повертає множину конфліктів; порожня — запис збережено. Скасований запис час не займає.
+    Синхронна: async API (beauty.api_async) викликає її через sync_to_async.
+    """
+    try:
+        with transaction.atomic():
+            if booking.status != Booking.CANCELLED:
+                lock_owners(booking.master_id, booking.resource_id)
+                found = find_conflicts(booking.start_at, booking.end_at, booking.master_id,
+                                       booking.resource_id, exclude_pk=booking.pk)
+                if found:
+                    return found
+            booking.save()
+            check_deferred_constraints()
+    except IntegrityError:
+        # exclusion-констрейнт у БД спіймав гонку, яку не побачила перевірка вище
+        return owner_kinds(booking.master_id, booking.resource_id)
+    return set()
+
+
+def conflict_payload(found):
+    """JSON-тіло відповіді 409; майстер важливіший за ресурс."""
+    kind = MASTER if MASTER in found else RESOURCE
+    return {"error": ERROR_CODES[kind], "message": MESSAGES[kind], "conflicts": sorted(found)}
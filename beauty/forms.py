@@ -1,5 +1,6 @@
 from django import forms
 from .models import DealLine, Booking, Service
+from .conflicts import MASTER, MESSAGES, find_conflicts
 from django.utils import timezone
 from datetime import timedelta
 from django.utils.translation import gettext_lazy as _
@@ -28,7 +29,22 @@ class DealLineForm(forms.ModelForm):
         return cd
 
 
-class BookingForm(forms.ModelForm):
+class BookingConflictMixin:
+    """Перетин по майстру/ресурсу → помилка на відповідному полі (а не IntegrityError від БД)."""
+
+    def check_conflicts(self, cleaned):
+        start_at, end_at = cleaned.get("start_at"), cleaned.get("end_at")
+        master, resource = cleaned.get("master"), cleaned.get("resource")
+        found = find_conflicts(start_at, end_at,
+                               master.pk if master else None,
+                               resource.pk if resource else None,
+                               exclude_pk=self.instance.pk)
+        for kind in found:
+            field = "master" if kind == MASTER else "resource"
+            self.add_error(field, forms.ValidationError(MESSAGES[kind], code="conflict"))
+
+
+class BookingForm(BookingConflictMixin, forms.ModelForm):
     """Основна форма для редагування запису у календарі."""
     class Meta:
         model = Booking
@@ -37,7 +53,24 @@ class BookingForm(forms.ModelForm):
             "start_at": forms.DateTimeInput(attrs={"type": "datetime-local"}),
         }
 
-class BookingQuickForm(forms.ModelForm):
+    def clean(self):
+        cleaned = super().clean()
+        b, start_at = self.instance, cleaned.get("start_at")
+        # перенос існуючого запису зберігає його тривалість; для нового end_at
+        # порахує Booking.save() з послуг угоди (там перевірку робить констрейнт БД)
+        if start_at and b.pk and b.start_at and b.end_at:
+            cleaned["end_at"] = start_at + (b.end_at - b.start_at)
+            if b.status != Booking.CANCELLED:
+                self.check_conflicts(cleaned)
+        return cleaned
+
+    def save(self, commit=True):
+        if self.cleaned_data.get("end_at"):
+            self.instance.end_at = self.cleaned_data["end_at"]
+        return super().save(commit)
+
+
+class BookingQuickForm(BookingConflictMixin, forms.ModelForm):
     """
     Швидке бронювання під час створення угоди.
     Додаємо поле тривалості, щоб прорахувати end_at
@@ -73,4 +106,5 @@ class BookingQuickForm(forms.ModelForm):
                 start_at = timezone.make_aware(start_at, timezone.get_current_timezone())
                 cleaned["start_at"] = start_at
             cleaned["end_at"] = start_at + timedelta(minutes=duration)
+            self.check_conflicts(cleaned)
         return cleaned
\ No newline at end of file
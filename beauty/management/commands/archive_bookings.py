@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from beauty.models import Booking, BookingArchive
+from main import aggregates, search
+
+FIELDS = ("id", "deal_id", "master_id", "resource_id", "series_id", "series_index", "start_at", "end_at",
+          "status", "color", "note", "allow_unskilled", "created_at")
+
+
+class Command(BaseCommand):
+    help = ("Переносить скасовані й давно минулі записи в архів (beauty.BookingArchive) пакетами: "
+            "INSERT в архів + DELETE з робочої таблиці в одній транзакції на пакет.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cancelled-days", type=int, default=30,
+                            help="Скасовані записи, що почалися раніше ніж N днів тому")
+        parser.add_argument("--past-days", type=int, default=365,
+                            help="Будь-які записи, що завершилися раніше ніж N днів тому")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Лише порахувати")
+
+    def handle(self, *args, **opts):
+        now = timezone.now()
+        qs = Booking.objects.filter(
+            Q(status=Booking.CANCELLED, start_at__lt=now - timedelta(days=opts["cancelled_days"]))
+            | Q(end_at__lt=now - timedelta(days=opts["past_days"]))
+        )
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Dry-run: до архіву пішло б {qs.count()} записів."))
+            return
+
+        moved = 0
+        while True:
+            # delete() шле post_delete на кожен запис; агрегати й пошук — раз на пакет
+            with transaction.atomic(), aggregates.deferred(), search.deferred():
+                rows = list(qs.order_by("pk").select_for_update(skip_locked=True).values(*FIELDS)[:opts["batch_size"]])
+                if not rows:
+                    break
+                ids = [r["id"] for r in rows]
+                BookingArchive.objects.bulk_create(
+                    [BookingArchive(original_id=r.pop("id"), **r) for r in rows], ignore_conflicts=True)
+                Booking.objects.filter(pk__in=ids).delete()
+            moved += len(rows)
+            self.stdout.write(f"… {moved}")
+        self.stdout.write(self.style.SUCCESS(f"Готово: в архів перенесено {moved} записів."))
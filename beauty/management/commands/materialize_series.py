@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from beauty.models import BookingSeries
+from beauty.recurrence import MATERIALIZE_DAYS, materialize
+
+
+class Command(BaseCommand):
+    help = "Створює Booking для повторень активних серій на горизонт N днів (для cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=MATERIALIZE_DAYS, help="Горизонт, днів")
+
+    def handle(self, *args, **opts):
+        end = timezone.now() + timedelta(days=opts["days"])
+        total = 0
+        for series in BookingSeries.objects.filter(is_active=True).select_related("client", "service"):
+            created, conflicts = materialize(series, end=end, skip_conflicts=True)
+            total += len(created)
+            for index, start in conflicts:
+                self.stdout.write(self.style.WARNING(
+                    f"Серія #{series.pk} ({series}): повторення {index} на "
+                    f"{timezone.localtime(start):%Y-%m-%d %H:%M} пропущено — час зайнято"))
+        self.stdout.write(self.style.SUCCESS(f"Готово: створено записів {total}."))
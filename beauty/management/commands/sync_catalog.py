@@ -0,0 +1,42 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+
+from beauty.catalog import CatalogError, apply_diff, describe_diff, diff_catalog, parse_item, read_catalog_file
+from beauty.models import Service
+
+
+def run_sync(command, raw_items, opts):
+    """Спільна частина sync_catalog / seed_services: diff → (dry-run | apply) → підсумок."""
+    groups = [opts["group"]] if opts.get("group") else None
+    try:
+        items = (parse_item(raw, default_group=opts.get("group")) for raw in raw_items)
+        diff = diff_catalog(items, groups=groups, deactivate_missing=opts["deactivate_missing"])
+    except (CatalogError, OSError) as e:
+        raise CommandError(str(e))
+
+    describe_diff(diff, lambda msg, style: command.stdout.write(getattr(command.style, style)(msg)))
+    summary = (f"створено {len(diff.create)}, оновлено {len(diff.update)}, "
+               f"без змін {diff.unchanged}, деактивовано {len(diff.deactivate)}")
+
+    if opts["dry_run"]:
+        command.stdout.write(command.style.WARNING(f"Dry-run (нічого не змінено): {summary}."))
+        return
+    if diff.has_changes:
+        apply_diff(diff)
+    command.stdout.write(command.style.SUCCESS(f"Готово: {summary}."))
+
+
+class Command(BaseCommand):
+    help = "Синхронізує каталог послуг з файлів CSV/JSON/JSONL/YAML (upsert по code, bulk-деактивація)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Файли каталогу (.csv, .json, .jsonl, .yaml)")
+        parser.add_argument("--group", choices=Service.Group.values,
+                            help="Обмежити однією групою (і група за замовчуванням для рядків без group)")
+        parser.add_argument("--deactivate-missing", action="store_true",
+                            help="Деактивувати послуги, яких нема в каталозі (в межах груп каталогу)")
+        parser.add_argument("--dry-run", action="store_true", help="Лише показати зміни")
+
+    def handle(self, *args, **opts):
+        run_sync(self, chain.from_iterable(read_catalog_file(f) for f in opts["files"]), opts)
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:39
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def blank_codes_to_null(apps, schema_editor):
+    Service = apps.get_model("beauty", "Service")
+    Service.objects.filter(code="").update(code=None)
+    # якщо код уже повторювався — лишаємо його за найстарішою послугою,
+    # решта зіставиться за (група, назва) при наступному sync_catalog
+    dupes = (
+        Service.objects.exclude(code=None)
+        .values("code").annotate(n=Count("id")).filter(n__gt=1)
+        .values_list("code", flat=True)
+    )
+    for code in list(dupes):
+        keep = Service.objects.filter(code=code).order_by("id").values_list("id", flat=True).first()
+        Service.objects.filter(code=code).exclude(id=keep).update(code=None)
+
+
+def null_codes_to_blank(apps, schema_editor):
+    Service = apps.get_model("beauty", "Service")
+    Service.objects.filter(code=None).update(code="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beauty", "0004_service_group"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="service",
+            name="code",
+            field=models.CharField(
+                blank=True, max_length=40, null=True, verbose_name="Код/артикул"
+            ),
+        ),
+        migrations.RunPython(blank_codes_to_null, null_codes_to_blank),
+        migrations.AlterField(
+            model_name="service",
+            name="code",
+            field=models.CharField(
+                blank=True,
+                max_length=40,
+                null=True,
+                unique=True,
+                verbose_name="Код/артикул",
+            ),
+        ),
+    ]
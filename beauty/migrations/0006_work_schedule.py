@@ -0,0 +1,171 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beauty", "0005_service_code_unique"),
+        ("main", "0011_client_phone_norm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleException",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(db_index=True, verbose_name="Дата")),
+                (
+                    "start_time",
+                    models.TimeField(blank=True, null=True, verbose_name="Початок"),
+                ),
+                (
+                    "end_time",
+                    models.TimeField(blank=True, null=True, verbose_name="Кінець"),
+                ),
+                (
+                    "note",
+                    models.CharField(
+                        blank=True, max_length=200, verbose_name="Нотатка"
+                    ),
+                ),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule_exceptions",
+                        to="main.employee",
+                        verbose_name="Майстер",
+                    ),
+                ),
+                (
+                    "resource",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule_exceptions",
+                        to="beauty.resource",
+                        verbose_name="Ресурс",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Виняток з графіка",
+                "verbose_name_plural": "Винятки з графіка",
+                "ordering": ["date", "start_time"],
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(
+                                ("employee__isnull", False), ("resource__isnull", True)
+                            ),
+                            models.Q(
+                                ("employee__isnull", True), ("resource__isnull", False)
+                            ),
+                            _connector="OR",
+                        ),
+                        name="schedule_exception_one_owner",
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(
+                                ("end_time__isnull", True), ("start_time__isnull", True)
+                            ),
+                            ("start_time__lt", models.F("end_time")),
+                            _connector="OR",
+                        ),
+                        name="schedule_exception_valid_interval",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="WorkSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Пн"),
+                            (1, "Вт"),
+                            (2, "Ср"),
+                            (3, "Чт"),
+                            (4, "Пт"),
+                            (5, "Сб"),
+                            (6, "Нд"),
+                        ],
+                        verbose_name="День тижня",
+                    ),
+                ),
+                ("start_time", models.TimeField(verbose_name="Початок")),
+                ("end_time", models.TimeField(verbose_name="Кінець")),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="work_schedule",
+                        to="main.employee",
+                        verbose_name="Майстер",
+                    ),
+                ),
+                (
+                    "resource",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="work_schedule",
+                        to="beauty.resource",
+                        verbose_name="Ресурс",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Робочий графік",
+                "verbose_name_plural": "Робочі графіки",
+                "ordering": ["weekday", "start_time"],
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(
+                                ("employee__isnull", False), ("resource__isnull", True)
+                            ),
+                            models.Q(
+                                ("employee__isnull", True), ("resource__isnull", False)
+                            ),
+                            _connector="OR",
+                        ),
+                        name="work_schedule_one_owner",
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("start_time__lt", models.F("end_time"))),
+                        name="work_schedule_start_before_end",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:40
+
+import beauty.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+def check_overlaps(apps, schema_editor):
+    """Констрейнт не створиться поверх уже наявних перетинів — покажемо, які записи розвести."""
+    Booking = apps.get_model("beauty", "Booking")
+    active = Booking.objects.exclude(status="cancelled").filter(end_at__isnull=False)
+    problems = []
+    for field in ("master", "resource"):
+        clash = active.filter(
+            **{f"{field}_id": models.OuterRef(f"{field}_id")},
+            start_at__lt=models.OuterRef("end_at"),
+            end_at__gt=models.OuterRef("start_at"),
+        ).exclude(pk=models.OuterRef("pk"))
+        ids = list(
+            active.filter(**{f"{field}__isnull": False})
+            .filter(models.Exists(clash))
+            .values_list("pk", flat=True)[:50]
+        )
+        if ids:
+            problems.append(f"{field}: {ids}")
+    if problems:
+        raise RuntimeError(
+            "Записи перетинаються по майстру/ресурсу — розведіть або скасуйте їх "
+            "перед міграцією: " + "; ".join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beauty", "0006_work_schedule"),
+        ("main", "0011_client_phone_norm"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.RunPython(check_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("end_at__isnull", False),
+                    models.Q(("status", "cancelled"), _negated=True),
+                ),
+                expressions=[
+                    (
+                        beauty.models.TsTzRange(
+                            "start_at",
+                            "end_at",
+                            django.contrib.postgres.fields.ranges.RangeBoundary(),
+                        ),
+                        "&&",
+                    ),
+                    ("master", "="),
+                ],
+                name="booking_master_no_overlap",
+                violation_error_message="Майстер уже зайнятий у цей час",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("end_at__isnull", False),
+                    models.Q(("status", "cancelled"), _negated=True),
+                ),
+                expressions=[
+                    (
+                        beauty.models.TsTzRange(
+                            "start_at",
+                            "end_at",
+                            django.contrib.postgres.fields.ranges.RangeBoundary(),
+                        ),
+                        "&&",
+                    ),
+                    ("resource", "="),
+                ],
+                name="booking_resource_no_overlap",
+                violation_error_message="Ресурс уже зайнятий у цей час",
+            ),
+        ),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beauty", "0007_booking_no_overlap"),
+        ("main", "0011_client_phone_norm"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="series_index",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="BookingSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_at", models.DateTimeField(verbose_name="Перший запис")),
+                (
+                    "duration_min",
+                    models.PositiveIntegerField(
+                        default=30, verbose_name="Тривалість, хв"
+                    ),
+                ),
+                (
+                    "freq",
+                    models.CharField(
+                        choices=[
+                            ("daily", "Щодня"),
+                            ("weekly", "Щотижня"),
+                            ("monthly", "Щомісяця"),
+                        ],
+                        default="weekly",
+                        max_length=8,
+                        verbose_name="Повторення",
+                    ),
+                ),
+                (
+                    "interval",
+                    models.PositiveSmallIntegerField(default=1, verbose_name="Кожні N"),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Кількість повторень"
+                    ),
+                ),
+                (
+                    "until",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="До дати (включно)"
+                    ),
+                ),
+                (
+                    "note",
+                    models.CharField(
+                        blank=True, max_length=200, verbose_name="Нотатка"
+                    ),
+                ),
+                (
+                    "allow_unskilled",
+                    models.BooleanField(
+                        default=False, verbose_name="Призначено без навички"
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="Активна"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="booking_series",
+                        to="main.client",
+                        verbose_name="Клієнт",
+                    ),
+                ),
+                (
+                    "master",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="booking_series",
+                        to="main.employee",
+                        verbose_name="Майстер",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="booking_series",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "resource",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="booking_series",
+                        to="beauty.resource",
+                        verbose_name="Ресурс",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="booking_series",
+                        to="beauty.service",
+                        verbose_name="Послуга",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Серія записів",
+                "verbose_name_plural": "Серії записів",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="occurrences",
+                to="beauty.bookingseries",
+                verbose_name="Серія",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=models.UniqueConstraint(
+                fields=("series", "series_index"),
+                name="booking_series_occurrence_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="bookingseries",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("interval__gte", 1)),
+                name="booking_series_interval_positive",
+            ),
+        ),
+    ]
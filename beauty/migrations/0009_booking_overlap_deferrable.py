@@ -0,0 +1,72 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:40
+
+import beauty.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.db.models.constraints
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beauty", "0008_booking_series"),
+        ("main", "0011_client_phone_norm"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="booking",
+            name="booking_master_no_overlap",
+        ),
+        migrations.RemoveConstraint(
+            model_name="booking",
+            name="booking_resource_no_overlap",
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("end_at__isnull", False),
+                    models.Q(("status", "cancelled"), _negated=True),
+                ),
+                deferrable=django.db.models.constraints.Deferrable["DEFERRED"],
+                expressions=[
+                    (
+                        beauty.models.TsTzRange(
+                            "start_at",
+                            "end_at",
+                            django.contrib.postgres.fields.ranges.RangeBoundary(),
+                        ),
+                        "&&",
+                    ),
+                    ("master", "="),
+                ],
+                name="booking_master_no_overlap",
+                violation_error_message="Майстер уже зайнятий у цей час",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("end_at__isnull", False),
+                    models.Q(("status", "cancelled"), _negated=True),
+                ),
+                deferrable=django.db.models.constraints.Deferrable["DEFERRED"],
+                expressions=[
+                    (
+                        beauty.models.TsTzRange(
+                            "start_at",
+                            "end_at",
+                            django.contrib.postgres.fields.ranges.RangeBoundary(),
+                        ),
+                        "&&",
+                    ),
+                    ("resource", "="),
+                ],
+                name="booking_resource_no_overlap",
+                violation_error_message="Ресурс уже зайнятий у цей час",
+            ),
+        ),
+    ]
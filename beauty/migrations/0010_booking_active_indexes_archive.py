@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beauty", "0009_booking_overlap_deferrable"),
+        ("main", "0011_client_phone_norm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("original_id", models.BigIntegerField(unique=True)),
+                ("deal_id", models.BigIntegerField(db_index=True)),
+                ("master_id", models.BigIntegerField(blank=True, null=True)),
+                ("resource_id", models.BigIntegerField(blank=True, null=True)),
+                ("series_id", models.BigIntegerField(blank=True, null=True)),
+                ("series_index", models.PositiveIntegerField(blank=True, null=True)),
+                ("start_at", models.DateTimeField(db_index=True)),
+                ("end_at", models.DateTimeField(blank=True, null=True)),
+                ("status", models.CharField(max_length=16)),
+                ("color", models.CharField(blank=True, max_length=7)),
+                ("note", models.CharField(blank=True, max_length=200)),
+                ("allow_unskilled", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Архівний запис",
+                "verbose_name_plural": "Архів записів",
+                "ordering": ["-start_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "cancelled"), _negated=True),
+                fields=["master", "start_at", "end_at"],
+                name="booking_active_master_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "cancelled"), _negated=True),
+                fields=["resource", "start_at", "end_at"],
+                name="booking_active_resource_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("status", "cancelled"), _negated=True),
+                fields=["start_at", "end_at"],
+                name="booking_active_period_idx",
+            ),
+        ),
+    ]
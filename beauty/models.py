@@ -1,8 +1,13 @@
-from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
 from datetime import timedelta
-from main.models import Deal, Employee
+from django.contrib.auth.models import User
+from main.models import Client, Deal, Employee
 
 class Service(models.Model):
     class Group(models.TextChoices):
@@ -12,7 +17,8 @@ class Service(models.Model):
         BARBER = "barber", "Барбер"
     """Послуга салону (каталог)."""
     name = models.CharField(max_length=160, db_index=True, verbose_name=_("Назва"))
-    code = models.CharField(max_length=40, blank=True, verbose_name=_("Код/артикул"))
+    # унікальний ключ каталогу (sync_catalog робить upsert по ньому); порожній код зберігаємо як NULL
+    code = models.CharField(max_length=40, blank=True, null=True, unique=True, verbose_name=_("Код/артикул"))
     group = models.CharField(max_length=12, choices=Group.choices, default=Group.HAIR, verbose_name=_("Група"))
     base_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name=_("Базова ціна"))
     duration_min = models.PositiveIntegerField(default=30, verbose_name=_("Тривалість, хв"))
@@ -83,11 +89,33 @@ class Resource(models.Model):
         return self.name
 
 
+class TsTzRange(models.Func):
+    """tstzrange(start, end, '[)') — для exclusion-констрейнтів по часу."""
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        """Без скасованих: лише такі займають майстра/ресурс (і їх покривають часткові індекси)."""
+        return self.exclude(status=Booking.CANCELLED)
+
+    def overlapping(self, start, end):
+        """
+        Записи, що перетинаються з [start, end). Нижня межа по start_at (запис не довший
+        за MAX_DURATION) обмежує діапазон індексу по start_at з обох боків, а не «усе минуле».
+        """
+        return self.filter(start_at__lt=end, start_at__gt=start - Booking.MAX_DURATION, end_at__gt=start)
+
+
 class Booking(models.Model):
     """
     Деталі бронювання поверх Deal.
     Не чіпаємо структуру Deal: додаємо start/end, майстра, ресурс, колір для календаря.
     """
+    CANCELLED = "cancelled"
+    MAX_DURATION = timedelta(hours=24)
+
     deal = models.OneToOneField(Deal, on_delete=models.CASCADE, related_name="booking", verbose_name=_("Угода"))
     start_at = models.DateTimeField(db_index=True, verbose_name=_("Початок"))
     end_at = models.DateTimeField(db_index=True, verbose_name=_("Кінець"), null=True, blank=True)
@@ -98,11 +126,54 @@ class Booking(models.Model):
     note = models.CharField(max_length=200, blank=True, verbose_name=_("Нотатка"))
     created_at = models.DateTimeField(auto_now_add=True)
     allow_unskilled = models.BooleanField(default=False, verbose_name=_("Призначено без навички"))
+    # матеріалізоване повторення серії: (series, series_index) — унікальна пара
+    series = models.ForeignKey("BookingSeries", null=True, blank=True, on_delete=models.SET_NULL,
+                               related_name="occurrences", verbose_name=_("Серія"))
+    series_index = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Запис")
         verbose_name_plural = _("Записи")
-        indexes = [models.Index(fields=["start_at"]), models.Index(fields=["end_at"])]
+        indexes = [
+            models.Index(fields=["start_at"]),
+            models.Index(fields=["end_at"]),
+            # часткові індекси лише по активних записах: перевірки зайнятості й календар
+            # не ходять по скасованих рядках, скільки б їх не накопичилось
+            models.Index(fields=["master", "start_at", "end_at"], condition=~models.Q(status="cancelled"),
+                         name="booking_active_master_idx"),
+            models.Index(fields=["resource", "start_at", "end_at"], condition=~models.Q(status="cancelled"),
+                         name="booking_active_resource_idx"),
+            models.Index(fields=["start_at", "end_at"], condition=~models.Q(status="cancelled"),
+                         name="booking_active_period_idx"),
+        ]
+        # один майстер / один ресурс — не більше одного активного запису в момент часу
+        # (потребує btree_gist; скасовані записи час не займають). DEFERRED — щоб пакетні
+        # зміни (beauty.batch) могли поміняти записи місцями в одному UPDATE.
+        constraints = [
+            ExclusionConstraint(
+                name="booking_master_no_overlap",
+                expressions=[
+                    (TsTzRange("start_at", "end_at", RangeBoundary()), RangeOperators.OVERLAPS),
+                    ("master", RangeOperators.EQUAL),
+                ],
+                condition=models.Q(end_at__isnull=False) & ~models.Q(status="cancelled"),
+                deferrable=models.Deferrable.DEFERRED,
+                violation_error_message=_("Майстер уже зайнятий у цей час"),
+            ),
+            ExclusionConstraint(
+                name="booking_resource_no_overlap",
+                expressions=[
+                    (TsTzRange("start_at", "end_at", RangeBoundary()), RangeOperators.OVERLAPS),
+                    ("resource", RangeOperators.EQUAL),
+                ],
+                condition=models.Q(end_at__isnull=False) & ~models.Q(status="cancelled"),
+                deferrable=models.Deferrable.DEFERRED,
+                violation_error_message=_("Ресурс уже зайнятий у цей час"),
+            ),
+            models.UniqueConstraint(fields=["series", "series_index"], name="booking_series_occurrence_unique"),
+        ]
 
     def __str__(self):
         return f"{self.deal} @ {self.start_at:%Y-%m-%d %H:%M}"
@@ -119,3 +190,230 @@ class Booking(models.Model):
         super().save(*args, **kwargs)
 
 
+class BookingArchive(models.Model):
+    """
+    Холодне сховище старих записів (скасованих і давно минулих), див. archive_bookings.
+    Без FK: угода/майстер можуть бути видалені пізніше, а архів не повинен гальмувати їхні зміни.
+    """
+    original_id = models.BigIntegerField(unique=True)
+    deal_id = models.BigIntegerField(db_index=True)
+    master_id = models.BigIntegerField(null=True, blank=True)
+    resource_id = models.BigIntegerField(null=True, blank=True)
+    series_id = models.BigIntegerField(null=True, blank=True)
+    series_index = models.PositiveIntegerField(null=True, blank=True)
+    start_at = models.DateTimeField(db_index=True)
+    end_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=16)
+    color = models.CharField(max_length=7, blank=True)
+    note = models.CharField(max_length=200, blank=True)
+    allow_unskilled = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Архівний запис")
+        verbose_name_plural = _("Архів записів")
+        ordering = ["-start_at"]
+
+    def __str__(self):
+        return f"#{self.original_id} @ {self.start_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class BookingSeries(models.Model):
+    """
+    Повторюваний запис (підмножина RRULE: FREQ + INTERVAL + COUNT/UNTIL).
+    Зберігається один раз; календар розгортає його ліниво (beauty.recurrence),
+    конкретні Booking створюються пакетно лише на найближчий горизонт.
+    """
+    class Freq(models.TextChoices):
+        DAILY = "daily", _("Щодня")
+        WEEKLY = "weekly", _("Щотижня")
+        MONTHLY = "monthly", _("Щомісяця")
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="booking_series", verbose_name=_("Клієнт"))
+    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name="booking_series", verbose_name=_("Послуга"))
+    master = models.ForeignKey(Employee, null=True, blank=True, on_delete=models.PROTECT,
+                               related_name="booking_series", verbose_name=_("Майстер"))
+    resource = models.ForeignKey(Resource, null=True, blank=True, on_delete=models.SET_NULL,
+                                 related_name="booking_series", verbose_name=_("Ресурс"))
+    start_at = models.DateTimeField(verbose_name=_("Перший запис"))
+    duration_min = models.PositiveIntegerField(default=30, verbose_name=_("Тривалість, хв"))
+    freq = models.CharField(max_length=8, choices=Freq.choices, default=Freq.WEEKLY, verbose_name=_("Повторення"))
+    interval = models.PositiveSmallIntegerField(default=1, verbose_name=_("Кожні N"))
+    count = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("Кількість повторень"))
+    until = models.DateField(null=True, blank=True, verbose_name=_("До дати (включно)"))
+    note = models.CharField(max_length=200, blank=True, verbose_name=_("Нотатка"))
+    allow_unskilled = models.BooleanField(default=False, verbose_name=_("Призначено без навички"))
+    is_active = models.BooleanField(default=True, verbose_name=_("Активна"))
+    owner = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="booking_series")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Серія записів")
+        verbose_name_plural = _("Серії записів")
+        ordering = ["-created_at"]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(interval__gte=1), name="booking_series_interval_positive"),
+        ]
+
+    def __str__(self):
+        return f"{self.client} · {self.service} · {self.get_freq_display()} ×{self.interval}"
+
+
+class WorkSchedule(models.Model):
+    """
+    Тижневий графік майстра або ресурсу. Кілька рядків на один день = розділена зміна.
+    Якщо в майстра/ресурсу немає жодного рядка — діє стандарт 09:00–18:00 щодня.
+    """
+    WEEKDAYS = [(0, _("Пн")), (1, _("Вт")), (2, _("Ср")), (3, _("Чт")), (4, _("Пт")), (5, _("Сб")), (6, _("Нд"))]
+
+    employee = models.ForeignKey(Employee, null=True, blank=True, on_delete=models.CASCADE,
+                                 related_name="work_schedule", verbose_name=_("Майстер"))
+    resource = models.ForeignKey(Resource, null=True, blank=True, on_delete=models.CASCADE,
+                                 related_name="work_schedule", verbose_name=_("Ресурс"))
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS, verbose_name=_("День тижня"))
+    start_time = models.TimeField(verbose_name=_("Початок"))
+    end_time = models.TimeField(verbose_name=_("Кінець"))
+
+    class Meta:
+        verbose_name = _("Робочий графік")
+        verbose_name_plural = _("Робочі графіки")
+        ordering = ["weekday", "start_time"]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(employee__isnull=False, resource__isnull=True)
+                | models.Q(employee__isnull=True, resource__isnull=False),
+                name="work_schedule_one_owner",
+            ),
+            models.CheckConstraint(condition=models.Q(start_time__lt=models.F("end_time")),
+                                   name="work_schedule_start_before_end"),
+        ]
+
+    def __str__(self):
+        return f"{self.employee or self.resource} · {self.get_weekday_display()} {self.start_time:%H:%M}–{self.end_time:%H:%M}"
+
+
+class ScheduleException(models.Model):
+    """
+    Виняток з графіка на конкретну дату: рядок без часу — вихідний,
+    рядки з часом повністю замінюють тижневий графік цього дня.
+    """
+    employee = models.ForeignKey(Employee, null=True, blank=True, on_delete=models.CASCADE,
+                                 related_name="schedule_exceptions", verbose_name=_("Майстер"))
+    resource = models.ForeignKey(Resource, null=True, blank=True, on_delete=models.CASCADE,
+                                 related_name="schedule_exceptions", verbose_name=_("Ресурс"))
+    date = models.DateField(db_index=True, verbose_name=_("Дата"))
+    start_time = models.TimeField(null=True, blank=True, verbose_name=_("Початок"))
+    end_time = models.TimeField(null=True, blank=True, verbose_name=_("Кінець"))
+    note = models.CharField(max_length=200, blank=True, verbose_name=_("Нотатка"))
+
+    class Meta:
+        verbose_name = _("Виняток з графіка")
+        verbose_name_plural = _("Винятки з графіка")
+        ordering = ["date", "start_time"]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(employee__isnull=False, resource__isnull=True)
+                | models.Q(employee__isnull=True, resource__isnull=False),
+                name="schedule_exception_one_owner",
+            ),
+            models.CheckConstraint(
+                condition=models.Q(start_time__isnull=True, end_time__isnull=True)
+                | models.Q(start_time__lt=models.F("end_time")),
+                name="schedule_exception_valid_interval",
+            ),
+        ]
+
+    @property
+    def is_day_off(self):
+        return self.start_time is None
+
+    def __str__(self):
+        when = _("вихідний") if self.is_day_off else f"{self.start_time:%H:%M}–{self.end_time:%H:%M}"
+        return f"{self.employee or self.resource} · {self.date} · {when}"
+
+
+# ---- інвалідація кешу довідкових даних (beauty.refdata) ----
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def on_refdata_change(sender, **kwargs):
+    # після коміту: інакше інший запит перебудує знімок з незакомічених даних під новим токеном
+    from .refdata import invalidate_refdata
+    transaction.on_commit(invalidate_refdata)
+
+
+@receiver(m2m_changed, sender=Employee.services.through)
+def on_employee_skills_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # дельту до знімка й нову версію — лише після коміту: відкат не лишить матрицю хибною,
+    # а інші воркери не перебудуються з незакомічених навичок
+    from .refdata import apply_skill_change, invalidate_refdata
+    from .skills import pairs_from_m2m
+    if action in ("post_add", "post_remove") and pk_set:
+        pairs = pairs_from_m2m(instance, reverse, pk_set)
+        transaction.on_commit(lambda: apply_skill_change(action, pairs))
+    elif action == "post_clear":
+        transaction.on_commit(invalidate_refdata)
+
+
+@receiver(post_save, sender=WorkSchedule)
+@receiver(post_delete, sender=WorkSchedule)
+@receiver(post_save, sender=ScheduleException)
+@receiver(post_delete, sender=ScheduleException)
+def on_schedule_change(sender, **kwargs):
+    # після коміту: відкат не скине знімок даремно, а інші воркери не підхоплять незакомічене
+    from .schedule import invalidate_schedule
+    transaction.on_commit(invalidate_schedule)
+
+
+# ---- агрегати клієнта (main.aggregates) ----
+
+@receiver(post_save, sender=Booking)
+def on_booking_save(sender, instance, update_fields=None, **kwargs):
+    from main.aggregates import BOOKING_FIELDS, touch
+    if update_fields is None or BOOKING_FIELDS & set(update_fields):
+        touch(deal_ids=[instance.deal_id])
+
+
+@receiver(post_delete, sender=Booking)
+def on_booking_delete(sender, instance, origin=None, **kwargs):
+    from main.aggregates import touch
+    if not isinstance(origin, (Deal, Client)):  # каскад від угоди/клієнта — перерахує сигнал угоди
+        touch(deal_ids=[instance.deal_id])
+
+
+# ---- глобальний пошук (main.search) ----
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def on_service_search(sender, instance, **kwargs):
+    from main.search import touch
+    touch("service", [instance.pk])
+
+
+@receiver(post_save, sender=Booking)
+def on_booking_search(sender, instance, update_fields=None, **kwargs):
+    from main.search import touch
+    if update_fields is None or {"note", "start_at", "deal"} & set(update_fields):
+        touch("booking", [instance.pk])
+
+
+@receiver(post_delete, sender=Booking)
+def on_booking_search_delete(sender, instance, **kwargs):
+    from main.search import touch
+    touch("booking", [instance.pk])
+
+
+# ---- версія "bookings": фрагменти шаблонів (дашборд, картка угоди), ETag календаря ----
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=BookingSeries)   # календар розгортає активні серії на льоту
+@receiver(post_delete, sender=BookingSeries)
+def on_booking_change(sender, **kwargs):
+    from main.versioning import bump_version
+    bump_version("bookings")
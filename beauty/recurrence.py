@@ -0,0 +1,171 @@
+"""
+Розгортання BookingSeries у повторення і пакетна матеріалізація в Booking.
+
+Правило — підмножина RRULE: FREQ=DAILY|WEEKLY|MONTHLY; INTERVAL=n; COUNT=k | UNTIL=дата.
+Крок рахуємо в локальному часі (10:00 лишається 10:00 після переходу на літній час),
+до початку вікна стрибаємо арифметикою — попередні повторення не обходимо.
+MONTHLY з 29–31 числа в коротких місяцях переноситься на останній день місяця.
+"""
+import calendar
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from main import aggregates, search
+from main.models import Deal, recalc_client_deal_status
+from main.versioning import bump_version
+
+from .availability import merge_intervals
+from .conflicts import lock_owners
+from .models import Booking, BookingSeries, DealLine
+
+MATERIALIZE_DAYS = 56          # горизонт, на який створюємо реальні Booking
+MAX_OCCURRENCES = 500          # запобіжник для одного виклику materialize()
+
+
+def _nth(series, first, n):
+    """n-те повторення (naive local datetime)."""
+    if series.freq == BookingSeries.Freq.MONTHLY:
+        y, m = divmod(first.month - 1 + n * series.interval, 12)
+        y += first.year
+        return first.replace(year=y, month=m + 1, day=min(first.day, calendar.monthrange(y, m + 1)[1]))
+    step = 7 if series.freq == BookingSeries.Freq.WEEKLY else 1
+    return first + timedelta(days=n * step * series.interval)
+
+
+def _first_index(series, first, window_start):
+    """Індекс, з якого варто починати обхід для вікна (з запасом униз, ніколи не більший)."""
+    if window_start <= first:
+        return 0
+    if series.freq == BookingSeries.Freq.MONTHLY:
+        months = (window_start.year - first.year) * 12 + window_start.month - first.month
+        return max(0, months // series.interval - 1)
+    step = (7 if series.freq == BookingSeries.Freq.WEEKLY else 1) * series.interval
+    return max(0, (window_start - first).days // step - 1)
+
+
+def iter_occurrences(series, start=None, end=None):
+    """(index, start_at, end_at) повторень серії, що перетинають [start, end)."""
+    tz = timezone.get_current_timezone()
+    first = timezone.localtime(series.start_at, tz).replace(tzinfo=None)
+    duration = timedelta(minutes=series.duration_min)
+    n = _first_index(series, first, timezone.localtime(start, tz).replace(tzinfo=None)) if start else 0
+    while series.count is None or n < series.count:
+        local = _nth(series, first, n)
+        if series.until and local.date() > series.until:
+            return
+        s = timezone.make_aware(local, tz)
+        if end and s >= end:
+            return
+        if start is None or s + duration > start:
+            yield n, s, s + duration
+        n += 1
+
+
+# ---- календар: віртуальні повторення ----
+
+def virtual_occurrences(start, end, master_id=None):
+    """
+    Повторення активних серій у вікні, для яких ще нема Booking: [(series, index, s, e), ...].
+    Лише майбутні (минулі без Booking не відбулися; архівовані записи теж не «воскресають»).
+    2 запити незалежно від кількості серій і повторень.
+    """
+    start = max(start, timezone.now())
+    if start >= end:
+        return []
+    qs = (BookingSeries.objects
+          .filter(is_active=True, start_at__lt=end)
+          .filter(Q(until__isnull=True) | Q(until__gte=timezone.localtime(start).date()))
+          .select_related("client", "service", "master__user", "resource"))
+    if master_id:
+        qs = qs.filter(master_id=master_id)
+
+    pending = [(series, n, s, e) for series in qs for n, s, e in iter_occurrences(series, start, end)]
+    if not pending:
+        return []
+    done = set(Booking.objects
+               .filter(series_id__in={p[0].pk for p in pending}, series_index__in={p[1] for p in pending})
+               .values_list("series_id", "series_index"))
+    return [p for p in pending if (p[0].pk, p[1]) not in done]
+
+
+# ---- матеріалізація ----
+
+def find_series_conflicts(series, occurrences):
+    """
+    Один запит на зайнятість майстра/ресурсу в усьому діапазоні серії + sweep у пам'яті.
+    occurrences відсортовані за часом; повертає [(index, start_at), ...] тих, що перетинаються.
+    """
+    cond = Q()
+    if series.master_id:
+        cond |= Q(master_id=series.master_id)
+    if series.resource_id:
+        cond |= Q(resource_id=series.resource_id)
+    if not cond or not occurrences:
+        return []
+
+    busy = merge_intervals(Booking.objects
+                           .active()
+                           .overlapping(occurrences[0][1], occurrences[-1][2])
+                           .filter(cond)
+                           .values_list("start_at", "end_at"))
+    conflicts, j = [], 0
+    for n, s, e in occurrences:
+        while j < len(busy) and busy[j][1] <= s:
+            j += 1
+        if j < len(busy) and busy[j][0] < e:
+            conflicts.append((n, s))
+    return conflicts
+
+
+def materialize(series, end=None, skip_conflicts=False):
+    """
+    Створює Deal + DealLine + Booking для ще не створених повторень у [зараз, end).
+    bulk_create на кожну таблицю; перевірка конфліктів — один запит на всю серію.
+    Повертає (bookings, conflicts). Якщо є конфлікти і skip_conflicts=False — не створює нічого.
+    """
+    now = timezone.now()
+    end = end or now + timedelta(days=MATERIALIZE_DAYS)
+    with transaction.atomic():
+        lock_owners(series.master_id, series.resource_id)
+        occurrences = list(islice(iter_occurrences(series, now, end), MAX_OCCURRENCES))
+        done = set(Booking.objects
+                   .filter(series=series, series_index__in=[n for n, _, _ in occurrences])
+                   .values_list("series_index", flat=True))
+        occurrences = [o for o in occurrences if o[0] not in done]
+
+        conflicts = find_series_conflicts(series, occurrences)
+        if conflicts and not skip_conflicts:
+            return [], conflicts
+        clashing = {n for n, _ in conflicts}
+        occurrences = [o for o in occurrences if o[0] not in clashing]
+        if not occurrences:
+            return [], conflicts
+
+        service, price = series.service, series.service.base_price or 0
+        deals = Deal.objects.bulk_create([
+            Deal(client_id=series.client_id, title=service.name, amount=price,
+                 status="in_progress", owner_id=series.owner_id, notes=series.note)
+            for _ in occurrences
+        ])
+        DealLine.objects.bulk_create([
+            DealLine(deal=deal, service=service, quantity=1, unit_price=price, subtotal=price)
+            for deal in deals
+        ])
+        status = "tentative" if series.allow_unskilled or not series.master_id else "confirmed"
+        bookings = Booking.objects.bulk_create([
+            Booking(deal=deal, start_at=s, end_at=e, master_id=series.master_id,
+                    resource_id=series.resource_id, note=series.note, status=status,
+                    allow_unskilled=series.allow_unskilled, series=series, series_index=n)
+            for deal, (n, s, e) in zip(deals, occurrences)
+        ])
+        # bulk_create не шле post_save → статус і агрегати клієнта перераховуємо один раз
+        recalc_client_deal_status(series.client_id)
+        aggregates.touch(client_ids=[series.client_id])
+        search.touch("deal", [d.pk for d in deals])
+        search.touch("booking", [b.pk for b in bookings])
+        bump_version("deals", "bookings")
+    return bookings, conflicts
@@ -0,0 +1,133 @@
+"""
+Довідкові дані (послуги, ресурси, активні майстри, навички) у пам'яті процесу.
+
+Таблиці змінюються рідко, тож тримаємо знімок на процес і звіряємо його з
+версією "refdata" у спільному кеші (1 звернення до кешу, 0 запитів до БД).
+Сигнали в beauty.models інвалідовують версію при будь-якій зміні.
+"""
+import copy
+import threading
+
+from django.http import Http404
+
+from main.models import Employee
+from main.versioning import bump_version, get_version
+
+from .models import Resource, Service
+from .skills import SkillMatrix
+
+VERSION_NAME = "refdata"
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class RefData:
+    def __init__(self, version):
+        self.version = version
+        self.services = {s.pk: s for s in Service.objects.all().order_by("name")}
+        self.resources = {r.pk: r for r in Resource.objects.all().order_by("name")}
+        self.masters = {
+            e.pk: e for e in Employee.objects.filter(is_active=True).select_related("user")
+        }
+        self.skills = SkillMatrix.load()
+
+    # ---- lookups ----
+
+    def service(self, pk):
+        return self.services.get(_int(pk))
+
+    def resource(self, pk):
+        return self.resources.get(_int(pk))
+
+    def master(self, pk):
+        return self.masters.get(_int(pk))
+
+    def has_skill(self, master_id, service_id):
+        return self.skills.can(master_id, service_id)
+
+    # ---- списки для форм / селектів ----
+
+    def service_list(self, active_only=False):
+        return [s for s in self.services.values() if s.is_active or not active_only]
+
+    def resource_list(self, active_only=False):
+        return [r for r in self.resources.values() if r.is_active or not active_only]
+
+    def master_list(self):
+        return list(self.masters.values())
+
+    def service_choices(self):
+        return [(s.pk, s.name) for s in self.service_list(active_only=True)]
+
+
+def _int(pk):
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_refdata():
+    global _snapshot
+    version = get_version(VERSION_NAME)
+    snap = _snapshot
+    if snap is None or snap.version != version:
+        with _lock:
+            snap = _snapshot
+            if snap is None or snap.version != version:
+                snap = _snapshot = RefData(version)
+    return snap
+
+
+def invalidate_refdata():
+    global _snapshot
+    _snapshot = None
+    bump_version(VERSION_NAME)
+
+
+def apply_skill_change(action, pairs):
+    """
+    m2m_changed для Employee.services: свій знімок оновлюємо дельтою без перечитування,
+    іншим процесам — нова версія (вони перебудуються при наступному запиті).
+    """
+    global _snapshot
+    with _lock:
+        snap = _snapshot
+        fresh = snap is not None and snap.version == get_version(VERSION_NAME)
+        token = bump_version(VERSION_NAME)[VERSION_NAME]
+        if not fresh:
+            # знімок уже застарів з інших причин — дельта не врятує, перебудуємо повністю
+            _snapshot = None
+            return
+        updated = copy.copy(snap)
+        updated.skills = snap.skills.with_change(action, pairs)
+        updated.version = token
+        _snapshot = updated
+
+
+# ---- get_object_or_404 поверх знімка ----
+# Неактивних майстрів у знімку нема — для них (рідкісний випадок) падаємо на запит до БД.
+
+def service_or_404(pk):
+    obj = get_refdata().service(pk)
+    if obj is None:
+        raise Http404("Service not found")
+    return obj
+
+
+def resource_or_404(pk):
+    obj = get_refdata().resource(pk)
+    if obj is None:
+        raise Http404("Resource not found")
+    return obj
+
+
+def master_or_404(pk):
+    obj = get_refdata().master(pk)
+    if obj is None:
+        try:
+            obj = Employee.objects.select_related("user").get(pk=pk)
+        except (Employee.DoesNotExist, ValueError, TypeError):
+            raise Http404("Employee not found")
+    return obj
@@ -0,0 +1,103 @@
+"""
+Компіляція графіків (WorkSchedule + ScheduleException) у денні масиви інтервалів.
+
+Результат — {owner_id: [(start_ts, end_ts), ...]} у секундах epoch, відсортовано,
+як і в beauty.availability. Тижневі шаблони тримаємо в пам'яті процесу, скомпільовані
+дні — теж; усе скидається разом із версією "schedule" (сигнали в beauty.models).
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from main.versioning import bump_version, get_version
+
+from .models import ScheduleException, WorkSchedule
+
+VERSION_NAME = "schedule"
+DEFAULT_HOURS = ((time(9, 0), time(18, 0)),)   # без жодного рядка графіка
+MAX_CACHED_DAYS = 50_000
+
+EMPLOYEE = "employee"
+RESOURCE = "resource"
+
+_lock = threading.Lock()
+_state = {"version": None, "weekly": None, "days": {}}
+
+
+def invalidate_schedule():
+    with _lock:
+        _state.update(version=None, weekly=None, days={})
+    bump_version(VERSION_NAME)
+
+
+def _current():
+    version = get_version(VERSION_NAME)
+    with _lock:
+        if _state["version"] != version:
+            _state.update(version=version, weekly=None, days={})
+        if _state["weekly"] is None:
+            weekly = {EMPLOYEE: defaultdict(lambda: defaultdict(list)),
+                      RESOURCE: defaultdict(lambda: defaultdict(list))}
+            rows = WorkSchedule.objects.values_list("employee_id", "resource_id", "weekday", "start_time", "end_time")
+            for emp_id, res_id, weekday, start, end in rows:
+                kind, owner = (EMPLOYEE, emp_id) if emp_id else (RESOURCE, res_id)
+                weekly[kind][owner][weekday].append((start, end))
+            _state["weekly"] = weekly
+        if len(_state["days"]) > MAX_CACHED_DAYS:
+            _state["days"] = {}
+        return _state
+
+
+def _day_intervals(day, spans, tz):
+    out = []
+    for start, end in sorted(spans):
+        s = datetime.combine(day, start, tzinfo=tz)
+        e = datetime.combine(day, end, tzinfo=tz)
+        out.append((int(s.timestamp()), int(e.timestamp())))
+    return tuple(out)
+
+
+def compile_intervals(kind, owner_ids, start_date, end_date):
+    """
+    Робочі інтервали для кожного owner_id (employee або resource) на дні [start_date, end_date].
+    Максимум 1 запит (винятки для днів, яких ще нема в кеші); тижневий шаблон — з пам'яті.
+    """
+    state = _current()
+    tz = timezone.get_current_timezone()
+    days = []
+    d = start_date
+    while d <= end_date:
+        days.append(d)
+        d += timedelta(days=1)
+
+    cache = state["days"]
+    missing = {oid for oid in owner_ids for day in days if (kind, oid, day) not in cache}
+    if missing:
+        exceptions = defaultdict(list)
+        rows = (ScheduleException.objects
+                .filter(date__gte=start_date, date__lte=end_date, **{f"{kind}_id__in": missing})
+                .values_list(f"{kind}_id", "date", "start_time", "end_time"))
+        for oid, day, start, end in rows:
+            exceptions[(oid, day)].append((start, end))
+
+        weekly = state["weekly"][kind]
+        for oid in missing:
+            template = weekly.get(oid)
+            for day in days:
+                if (oid, day) in exceptions:
+                    spans = [(s, e) for s, e in exceptions[(oid, day)] if s is not None]
+                elif template is not None:
+                    spans = template.get(day.weekday(), ())
+                else:
+                    spans = DEFAULT_HOURS
+                cache[(kind, oid, day)] = _day_intervals(day, spans, tz)
+
+    return {oid: [iv for day in days for iv in cache[(kind, oid, day)]] for oid in owner_ids}
+
+
+def local_date_range(start, end):
+    """(перша, остання) локальні дати, які зачіпає [start, end)."""
+    tz = timezone.get_current_timezone()
+    return timezone.localtime(start, tz).date(), timezone.localtime(end - timedelta(microseconds=1), tz).date()
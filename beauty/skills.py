@@ -0,0 +1,72 @@
+"""
+Матриця навичок майстрів: service_id → frozenset(employee_id) і навпаки.
+
+Будується одним запитом по таблиці Employee.services, далі лише O(1)-перевірки.
+Об'єкт незмінний: m2m_changed створює нову матрицю з дельтою (copy-on-write),
+тож потоки, які вже тримають стару, бачать узгоджений стан.
+"""
+from collections import defaultdict
+
+from main.models import Employee
+
+EMPTY = frozenset()
+
+
+class SkillMatrix:
+    __slots__ = ("by_service", "by_master")
+
+    def __init__(self, pairs=()):
+        by_service, by_master = defaultdict(set), defaultdict(set)
+        for emp_id, service_id in pairs:
+            by_service[service_id].add(emp_id)
+            by_master[emp_id].add(service_id)
+        self.by_service = {k: frozenset(v) for k, v in by_service.items()}
+        self.by_master = {k: frozenset(v) for k, v in by_master.items()}
+
+    @classmethod
+    def load(cls):
+        return cls(Employee.services.through.objects.values_list("employee_id", "service_id"))
+
+    # ---- запити ----
+
+    def can(self, master_id, service_id):
+        return master_id in self.by_service.get(service_id, EMPTY)
+
+    def can_all(self, master_id, service_ids):
+        return self.by_master.get(master_id, EMPTY).issuperset(service_ids)
+
+    def masters_for(self, *service_ids):
+        """Майстри, що вміють УСІ передані послуги (перетин множин)."""
+        if not service_ids:
+            return EMPTY
+        sets = sorted((self.by_service.get(sid, EMPTY) for sid in service_ids), key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def services_of(self, master_id):
+        return self.by_master.get(master_id, EMPTY)
+
+    # ---- інкрементальні зміни (m2m_changed) ----
+
+    def with_change(self, action, pairs):
+        """Нова матриця з доданими (post_add) або прибраними (post_remove) парами."""
+        op = frozenset.union if action == "post_add" else frozenset.difference
+        delta_s, delta_m = defaultdict(set), defaultdict(set)
+        for emp_id, service_id in pairs:
+            delta_s[service_id].add(emp_id)
+            delta_m[emp_id].add(service_id)
+
+        new = SkillMatrix()
+        new.by_service = dict(self.by_service)
+        new.by_master = dict(self.by_master)
+        for service_id, emp_ids in delta_s.items():
+            new.by_service[service_id] = op(new.by_service.get(service_id, EMPTY), emp_ids)
+        for emp_id, service_ids in delta_m.items():
+            new.by_master[emp_id] = op(new.by_master.get(emp_id, EMPTY), service_ids)
+        return new
+
+
+def pairs_from_m2m(instance, reverse, pk_set):
+    """Пари (employee_id, service_id) з аргументів m2m_changed для Employee.services."""
+    if reverse:  # service.employees.add(...)
+        return [(emp_id, instance.pk) for emp_id in pk_set]
+    return [(instance.pk, service_id) for service_id in pk_set]
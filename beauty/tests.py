@@ -1,3 +1,402 @@
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from beauty import availability, batch, recurrence, schedule
+from beauty.conflicts import MASTER, RESOURCE, find_conflicts, save_checked
+from beauty.models import Booking, BookingArchive, BookingSeries, Resource, ScheduleException, Service, WorkSchedule
+from beauty.skills import SkillMatrix
+from main.models import Client, Deal, Employee
+from main.versioning import get_version
+
+
+def at(day, hour, minute=0):
+    """aware-datetime у поточній TZ: at(date(2030, 1, 7), 10)."""
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour, minute))
+
+
+class BookingTestCase(TestCase):
+    """Клієнт, майстер і ресурс; book() — запис на окрему угоду (Booking.deal — OneToOne)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_obj = Client.objects.create(name="Olena")
+        cls.master = Employee.objects.create(user=User.objects.create_user("master"))
+        cls.other_master = Employee.objects.create(user=User.objects.create_user("other"))
+        cls.resource = Resource.objects.create(name="Крісло 1")
+        cls.service = Service.objects.create(name="Манікюр", duration_min=60)
+        cls.day = timezone.localdate() + timedelta(days=7)
+
+    def book(self, start, minutes=60, master=None, resource=None, **kwargs):
+        deal = Deal.objects.create(client=self.client_obj, title="Манікюр")
+        return Booking.objects.create(deal=deal, start_at=start, end_at=start + timedelta(minutes=minutes),
+                                      master=master, resource=resource, **kwargs)
+
+
+class BookingVersionTests(TestCase):
+    def test_booking_change_bumps_after_commit(self):
+        deal = Deal.objects.create(client=Client.objects.create(name="Olena"), title="Манікюр")
+        start = at(timezone.localdate() + timedelta(days=1), 10)
+        before = get_version("bookings")
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(deal=deal, start_at=start, end_at=start + timedelta(hours=1))
+            self.assertEqual(get_version("bookings"), before)
+        self.assertNotEqual(get_version("bookings"), before)
+
+
+class ConflictTests(BookingTestCase):
+    def setUp(self):
+        # 23:30 останнього дня місяця → 00:30 першого: запис перетинає межу місяця
+        self.month_end = date(self.day.year + 1, 1, 31)
+        self.night = self.book(at(self.month_end, 23, 30), master=self.master, resource=self.resource)
+
+    def test_across_month_boundary(self):
+        next_month = self.month_end + timedelta(days=1)
+        self.assertEqual(find_conflicts(at(next_month, 0, 0), at(next_month, 0, 15), self.master.pk),
+                         {MASTER})
+        self.assertEqual(find_conflicts(at(self.month_end, 23, 0), at(self.month_end, 23, 45),
+                                        self.other_master.pk, self.resource.pk), {RESOURCE})
+        self.assertEqual(find_conflicts(at(next_month, 0, 30), at(next_month, 1, 0), self.master.pk), set())
+
+    def test_cancelled_and_self_do_not_conflict(self):
+        start, end = self.night.start_at, self.night.end_at
+        self.assertEqual(find_conflicts(start, end, self.master.pk, exclude_pk=self.night.pk), set())
+        self.night.status = Booking.CANCELLED
+        self.night.save()
+        self.assertEqual(find_conflicts(start, end, self.master.pk), set())
+
+    def test_save_checked_refuses_overlap(self):
+        deal = Deal.objects.create(client=self.client_obj, title="Педикюр")
+        late = Booking(deal=deal, start_at=at(self.month_end, 23, 0), end_at=at(self.month_end, 23, 45),
+                       master=self.master)
+        self.assertEqual(save_checked(late), {MASTER})
+        self.assertIsNone(late.pk)
+
+    def test_save_checked_reports_constraint_race(self):
+        # перевірку обійшла паралельна транзакція — спрацював констрейнт; зовнішня транзакція жива
+        deal = Deal.objects.create(client=self.client_obj, title="Педикюр")
+        late = Booking(deal=deal, start_at=at(self.month_end, 23, 0), end_at=at(self.month_end, 23, 45),
+                       master=self.master, resource=self.resource)
+        with transaction.atomic(), mock.patch("beauty.conflicts.find_conflicts", return_value=set()), \
+                mock.patch("beauty.conflicts.check_deferred_constraints", side_effect=IntegrityError):
+            self.assertEqual(save_checked(late), {MASTER, RESOURCE})
+        self.assertFalse(Booking.objects.filter(deal=deal).exists())
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "exclusion-констрейнти — лише PostgreSQL")
+    def test_save_checked_catches_deferred_constraint(self):
+        # без SET CONSTRAINTS ... IMMEDIATE порушення вилізло б на COMMIT зовнішньої транзакції
+        deal = Deal.objects.create(client=self.client_obj, title="Педикюр")
+        late = Booking(deal=deal, start_at=at(self.month_end, 23, 0), end_at=at(self.month_end, 23, 45),
+                       master=self.master)
+        with transaction.atomic(), mock.patch("beauty.conflicts.find_conflicts", return_value=set()):
+            self.assertEqual(save_checked(late), {MASTER})
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "exclusion-констрейнти — лише PostgreSQL")
+    def test_exclusion_constraint_across_month_boundary(self):
+        deal = Deal.objects.create(client=self.client_obj, title="Педикюр")
+        next_month = self.month_end + timedelta(days=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET CONSTRAINTS booking_master_no_overlap IMMEDIATE")
+            Booking.objects.create(deal=deal, start_at=at(next_month, 0, 0), end_at=at(next_month, 1, 0),
+                                   master=self.master)
+
+
+class ApplyBatchTests(BookingTestCase):
+    def setUp(self):
+        self.a = self.book(at(self.day, 10), master=self.master)
+        self.b = self.book(at(self.day, 12), master=self.master)
+        self.c = self.book(at(self.day, 14), master=self.master)
+
+    def test_clash_rolls_back_whole_batch(self):
+        ok, results, _ = batch.apply_batch([
+            {"id": self.a.pk, "shift": timedelta(hours=1)},
+            {"id": self.b.pk, "start_at": at(self.day, 14, 30)},  # на запис c, що поза пакетом
+        ])
+        self.assertFalse(ok)
+        self.assertTrue(results[0]["ok"])
+        self.assertEqual(results[1]["error"], "conflict")
+        self.assertEqual(results[1]["conflicts"], [MASTER])
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.start_at, at(self.day, 10))
+
+    def test_clash_inside_batch(self):
+        ok, results, _ = batch.apply_batch([
+            {"id": self.a.pk, "start_at": at(self.day, 16)},
+            {"id": self.b.pk, "start_at": at(self.day, 16, 30)},
+        ])
+        self.assertFalse(ok)
+        self.assertEqual([r["ok"] for r in results], [False, False])
+
+    def test_swap_applies(self):
+        ok, results, _ = batch.apply_batch([
+            {"id": self.a.pk, "start_at": at(self.day, 12)},
+            {"id": self.b.pk, "start_at": at(self.day, 10)},
+        ])
+        self.assertTrue(ok, results)
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.start_at, self.b.start_at), (at(self.day, 12), at(self.day, 10)))
+
+    def test_invalid_and_missing_ops(self):
+        ok, results, _ = batch.apply_batch([
+            {"id": self.a.pk, "duration": timedelta(hours=25)},
+            {"id": 0, "shift": timedelta(hours=1)},
+            {"id": self.c.pk, "shift": timedelta(hours=1)},
+        ])
+        self.assertFalse(ok)
+        self.assertEqual([r.get("error") for r in results], ["invalid", "not_found", None])
+        self.c.refresh_from_db()
+        self.assertEqual(self.c.start_at, at(self.day, 14))
+
+
+class MaterializeTests(BookingTestCase):
+    def setUp(self):
+        self.series = BookingSeries.objects.create(
+            client=self.client_obj, service=self.service, master=self.master,
+            start_at=at(self.day, 9), duration_min=60, freq=BookingSeries.Freq.WEEKLY, count=4,
+        )
+        # друге повторення (через тиждень) перетинається з уже наявним записом
+        self.busy = self.book(at(self.day + timedelta(days=7), 9, 30), master=self.master)
+        self.end = at(self.day + timedelta(days=60), 0)
+
+    def test_conflict_creates_nothing(self):
+        bookings, conflicts = recurrence.materialize(self.series, end=self.end)
+        self.assertEqual(bookings, [])
+        self.assertEqual([n for n, _ in conflicts], [1])
+        self.assertFalse(Booking.objects.filter(series=self.series).exists())
+
+    def test_skip_conflicts(self):
+        bookings, conflicts = recurrence.materialize(self.series, end=self.end, skip_conflicts=True)
+        self.assertEqual([n for n, _ in conflicts], [1])
+        self.assertEqual(sorted(b.series_index for b in bookings), [0, 2, 3])
+        self.assertEqual(Deal.objects.filter(booking__series=self.series).count(), 3)
+        # повторний запуск не дублює вже створені
+        again, _ = recurrence.materialize(self.series, end=self.end, skip_conflicts=True)
+        self.assertEqual(again, [])
+
+
+class AvailabilityTests(BookingTestCase):
+    def setUp(self):
+        # скомпільовані графіки живуть у пам'яті процесу, а відкат тесту сигналів не шле
+        schedule.invalidate_schedule()
+        self.addCleanup(schedule.invalidate_schedule)
+
+    def slots(self, start, days=1, resource=None, limit=3):
+        found = availability.search(60, [self.master.pk, self.other_master.pk], start, days=days,
+                                    resource_id=resource and resource.pk, limit=limit, step_min=60)
+        return [(availability.from_ts(ts), mid) for ts, mid in found]
+
+    def test_earliest_slots_across_masters(self):
+        # без рядків графіка — стандарт 09:00–18:00
+        self.book(at(self.day, 9), master=self.master)
+        self.assertEqual(self.slots(at(self.day, 9)), [
+            (at(self.day, 9), self.other_master.pk),
+            (at(self.day, 10), self.master.pk),
+            (at(self.day, 10), self.other_master.pk),
+        ])
+
+    def test_resource_busy_blocks_every_master(self):
+        self.book(at(self.day, 9), master=self.master)
+        self.book(at(self.day, 10), resource=self.resource)
+        self.assertEqual(self.slots(at(self.day, 9), resource=self.resource), [
+            (at(self.day, 9), self.other_master.pk),
+            (at(self.day, 11), self.master.pk),
+            (at(self.day, 11), self.other_master.pk),
+        ])
+
+    def test_split_shift_and_day_off(self):
+        for start, end in ((10, 12), (14, 15)):
+            WorkSchedule.objects.create(employee=self.master, weekday=self.day.weekday(),
+                                        start_time=f"{start}:00", end_time=f"{end}:00")
+        ScheduleException.objects.create(employee=self.other_master, date=self.day, note="вихідний")
+        self.assertEqual(self.slots(at(self.day, 0), limit=5), [
+            (at(self.day, 10), self.master.pk),
+            (at(self.day, 11), self.master.pk),
+            (at(self.day, 14), self.master.pk),
+        ])
+
+    def test_exception_hours_replace_weekly_schedule(self):
+        WorkSchedule.objects.create(employee=self.master, weekday=self.day.weekday(),
+                                    start_time="10:00", end_time="12:00")
+        ScheduleException.objects.create(employee=self.master, date=self.day, start_time="16:00", end_time="17:00")
+        ScheduleException.objects.create(employee=self.other_master, date=self.day)
+        self.assertEqual(self.slots(at(self.day, 0)), [(at(self.day, 16), self.master.pk)])
+
+
+class SkillMatrixTests(BookingTestCase):
+    def test_lookups_and_copy_on_write(self):
+        matrix = SkillMatrix([(1, 10), (1, 11), (2, 10)])
+        self.assertTrue(matrix.can(1, 11))
+        self.assertFalse(matrix.can(2, 11))
+        self.assertEqual(matrix.masters_for(10, 11), {1})
+        self.assertEqual(matrix.masters_for(10), {1, 2})
+        self.assertEqual(matrix.masters_for(), set())
+
+        added = matrix.with_change("post_add", [(2, 11)])
+        self.assertTrue(added.can_all(2, [10, 11]))
+        removed = matrix.with_change("post_remove", [(1, 11)])
+        self.assertEqual(removed.masters_for(10, 11), set())
+        self.assertEqual(matrix.masters_for(10, 11), {1})  # стара матриця не змінилась
+
+    def test_masters_endpoint_follows_m2m_changes(self):
+        self.client.force_login(self.master.user)
+        url = reverse("masters_for_service")
+        with self.captureOnCommitCallbacks(execute=True):  # дельта до знімка — після коміту
+            self.master.services.add(self.service)
+        self.assertEqual([m["id"] for m in self.client.get(url, {"service": self.service.pk}).json()],
+                         [self.master.pk])
+
+        self.book(at(self.day, 10), master=self.master)
+        busy = self.client.get(url, {"service": self.service.pk, "start": at(self.day, 10, 30).isoformat(),
+                                     "available": "1"})
+        self.assertEqual(busy.json(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.employees.remove(self.master)
+        self.assertEqual(self.client.get(url, {"service": self.service.pk}).json(), [])
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class ResourceUtilizationTests(BookingTestCase):
+    def setUp(self):
+        schedule.invalidate_schedule()
+        self.addCleanup(schedule.invalidate_schedule)
+        self.client.force_login(self.master.user)
+
+    def test_busy_minutes_against_resource_hours(self):
+        self.book(at(self.day, 10), minutes=90, resource=self.resource)
+        self.book(at(self.day, 12), resource=self.resource, status=Booking.CANCELLED)  # час не займає
+        self.book(at(self.day, 14), master=self.master)  # без ресурсу
+        response = self.client.get(reverse("resource_utilization"), {
+            "from": self.day.isoformat(), "to": (self.day + timedelta(days=1)).isoformat(),
+            "resource": self.resource.pk})
+        resource, = response.json()["resources"]
+        self.assertEqual((resource["busy_min"], resource["open_min"]), (90, 2 * 9 * 60))
+        self.assertEqual([(d["bookings"], d["busy_min"]) for d in resource["days"]], [(1, 90), (0, 0)])
+        self.assertEqual(resource["days"][0]["percent"], round(100 * 90 / 540, 1))
+
+
+class ArchiveBookingsTests(BookingTestCase):
+    def test_moves_old_and_cancelled_keeping_visits(self):
+        today = timezone.localdate()
+        old = self.book(at(today - timedelta(days=400), 10), master=self.master)
+        cancelled = self.book(at(today - timedelta(days=40), 10), status=Booking.CANCELLED)
+        recent = self.book(at(today - timedelta(days=5), 10), status=Booking.CANCELLED)
+        upcoming = self.book(at(self.day, 10), master=self.master)
+
+        call_command("archive_bookings", "--dry-run", stdout=StringIO())
+        self.assertEqual(Booking.objects.count(), 4)
+        call_command("archive_bookings", stdout=StringIO())
+        self.assertEqual(set(Booking.objects.values_list("pk", flat=True)), {recent.pk, upcoming.pk})
+        self.assertEqual(set(BookingArchive.objects.values_list("original_id", flat=True)), {old.pk, cancelled.pk})
+        # архівний минулий запис і далі рахується візитом (main.aggregates)
+        self.client_obj.refresh_from_db()
+        self.assertEqual((self.client_obj.visit_count, self.client_obj.last_booking_at), (1, old.start_at))
+
+
+class AutocompleteTests(BookingTestCase):
+    def setUp(self):
+        cache.clear()  # підказки клієнтів кешуються з версією, а відкат тесту її не бампає
+        self.client.force_login(self.master.user)
+
+    def labels(self, kind, q, **params):
+        response = self.client.get(reverse("autocomplete", args=[kind]), {"q": q, **params})
+        return [item["label"] for item in response.json()]
+
+    def test_clients_prefix_first_and_phone_digits(self):
+        Client.objects.create(name="Anna Olenko")
+        Client.objects.create(name="Olena Nováková", phone="+420 777 123 456")
+        self.assertEqual(self.labels("clients", "ole"), ["Olena", "Olena Nováková", "Anna Olenko"])
+        self.assertEqual(self.labels("clients", "ole", limit=1), ["Olena"])
+        self.assertEqual(self.labels("clients", "123 45"), ["Olena Nováková"])
+
+    def test_refdata_sources(self):
+        Service.objects.create(name="Педикюр")
+        self.assertEqual(self.labels("services", "кюр"), ["Манікюр", "Педикюр"])
+        self.assertEqual(self.labels("services", "пед"), ["Педикюр"])
+        self.assertEqual(self.labels("resources", ""), ["Крісло 1"])
+        self.assertEqual(self.client.get(reverse("autocomplete", args=["deals"])).status_code, 400)
+
+
+class CatalogSyncTests(TestCase):
+    def setUp(self):
+        Service.objects.create(name="Стрижка", group=Service.Group.HAIR)
+        Service.objects.create(name="Манікюр", code="N1", group=Service.Group.NAILS)
+        Service.objects.create(name="Укладка", group=Service.Group.HAIR)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def sync(self, name, content, *args):
+        path = self.dir / name
+        path.write_text(content, encoding="utf-8")
+        call_command("sync_catalog", str(path), *args, stdout=StringIO())
+
+    def test_upsert_by_code_and_name(self):
+        self.sync("catalog.csv", "name,code,group,price,duration\n"
+                                 "Стрижка,H1,hair,500,45\n"
+                                 "Манікюр класичний,N1,nails,400,60\n"
+                                 "Борода,B1,barber,300,30\n", "--deactivate-missing")
+        rows = dict(Service.objects.values_list("name", "code"))
+        self.assertEqual(rows, {"Стрижка": "H1", "Манікюр класичний": "N1", "Борода": "B1", "Укладка": None})
+        self.assertEqual(Service.objects.get(code="H1").duration_min, 45)
+        # Укладки в каталозі нема, а її група (hair) є — деактивована, не видалена
+        self.assertFalse(Service.objects.get(name="Укладка").is_active)
+
+    def test_dry_run_and_errors(self):
+        self.sync("catalog.json", '{"barber": [{"name": "Борода", "code": 7}]}', "--dry-run")
+        self.assertFalse(Service.objects.filter(group=Service.Group.BARBER).exists())
+        with self.assertRaisesMessage(CommandError, "невідома група"):
+            self.sync("bad.jsonl", '{"name": "Пірсинг", "group": "tattoo"}\n')
+        with self.assertRaisesMessage(CommandError, "повторюється"):
+            self.sync("dup.jsonl", '{"name": "A", "code": "X"}\n{"name": "B", "code": "X"}\n')
+
+
+class AsyncApiTests(BookingTestCase):
+    def setUp(self):
+        schedule.invalidate_schedule()
+        self.addCleanup(schedule.invalidate_schedule)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.master.services.add(self.service)
+        self.book(at(self.day, 9), master=self.master)
+        self.user = User.objects.create_user("admin", is_staff=True)
+
+    async def test_availability(self):
+        await self.async_client.aforce_login(self.user)
+        params = {"service": self.service.pk, "from": at(self.day, 9).isoformat(), "step": 60, "limit": 2}
+        response = await self.async_client.get(reverse("async_availability_search"), params)
+        self.assertEqual([(s["start"][11:16], s["master_id"]) for s in response.json()["slots"]],
+                         [("10:00", self.master.pk), ("11:00", self.master.pk)])
+
+    async def test_conflict_rolls_back_deal(self):
+        await self.async_client.aforce_login(self.user)
+        deals = await Deal.objects.acount()
+        response = await self.async_client.post(
+            reverse("async_booking_create"), content_type="application/json",
+            data={"client_id": self.client_obj.pk, "service_id": self.service.pk, "master_id": self.master.pk,
+                  "start_at": at(self.day, 9, 30).isoformat()})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["conflicts"], [MASTER])
+        self.assertEqual(await Deal.objects.acount(), deals)
 
-# Create your tests here.
+    async def test_create_for_free_service(self):
+        # base_price = 0.00 — угода й рядок з нульовою ціною, а не 500
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse("async_booking_create"), content_type="application/json",
+            data={"client_id": self.client_obj.pk, "service_id": self.service.pk, "master_id": self.master.pk,
+                  "start_at": at(self.day, 11).isoformat()})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(await Booking.objects.filter(pk=response.json()["id"], master=self.master).acount(), 1)
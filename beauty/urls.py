@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views, api
+from . import views, api, api_async
 
 urlpatterns = [
     path("deal/<int:pk>/beauty/", views.deal_lines_manage, name="deal_beauty"),
@@ -7,5 +7,19 @@ urlpatterns = [
     path("calendar/feed/", views.calendar_feed, name="calendar_feed"),
     path("calendar/events/", api.calendar_events, name="calendar_events"),       # GET
     path("calendar/bookings/", api.booking_create, name="booking_create"),       # POST
+    path("calendar/bookings/batch/", api.booking_batch, name="booking_batch"),   # POST
     path("calendar/bookings/<int:pk>/", api.booking_update, name="booking_update"),  # PATCH / DELETE
+    path("calendar/series/", api.series_create, name="series_create"),           # POST
+    path("calendar/series/<int:pk>/", api.series_detail, name="series_detail"),  # GET / DELETE
+    path("calendar/series/<int:pk>/materialize/", api.series_materialize, name="series_materialize"),  # POST
+    path("autocomplete/<slug:kind>/", api.autocomplete, name="autocomplete"),  # GET ?q=
+    path("masters/", api.masters_for_service, name="masters_for_service"),       # GET ?service=
+    path("availability/search", api.availability_search, name="availability_search"),  # GET
+    path("resources/utilization/", api.resource_utilization, name="resource_utilization"),  # GET
+
+    # async-варіанти (ASGI, crm/asgi.py): ті самі параметри й відповіді
+    path("async/calendar/events/", api_async.calendar_events, name="async_calendar_events"),        # GET
+    path("async/calendar/bookings/", api_async.booking_create, name="async_booking_create"),        # POST
+    path("async/calendar/bookings/<int:pk>/", api_async.booking_update, name="async_booking_update"),  # PATCH / DELETE
+    path("async/availability/search", api_async.availability_search, name="async_availability_search"),  # GET
 ]
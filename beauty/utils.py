@@ -1,6 +1,8 @@
 from datetime import datetime, time, timedelta
 from django.utils import timezone
 from .models import Booking
+from . import schedule
+from .availability import from_ts, iter_starts, merge_intervals, subtract_intervals
 from main.models import Employee
 
 def daterange(start: datetime, end: datetime, step_min: int = 60):
@@ -10,29 +12,36 @@ def daterange(start: datetime, end: datetime, step_min: int = 60):
         yield cur
         cur += delta
 
-def free_slots_for_employee(day: datetime, employee: Employee, start_hour=9, end_hour=18, slot_min=60):
+def free_slots_for_employees(day: datetime, employees, slot_min=60):
     """
-    Повертає список вільних слотів (datetime початку) для конкретного майстра на конкретний день.
-    Для zoneinfo не використовуємо .localize(), а задаємо tzinfo напряму.
+    Вільні слоти (datetime початку) для кількох майстрів на конкретний день.
+    Робочі інтервали беремо з графіка (WorkSchedule/ScheduleException), записи — одним запитом,
+    і віднімаємо їх за один прохід, замість перебору фіксованої сітки 9–18.
     """
     tz = timezone.get_current_timezone()
-    day = timezone.localtime(day, tz)
-
-    day_start = datetime.combine(day.date(), time(hour=start_hour, minute=0), tzinfo=tz)
-    day_end   = datetime.combine(day.date(), time(hour=end_hour,   minute=0), tzinfo=tz)
+    date = timezone.localtime(day, tz).date()
+    ids = [e.pk for e in employees]
+    shifts = schedule.compile_intervals(schedule.EMPLOYEE, ids, date, date)
 
-    bookings = Booking.objects.filter(
-        master=employee,
-        start_at__lt=day_end,
-        end_at__gt=day_start
-    ).only("start_at", "end_at")
+    day_start = datetime.combine(date, time.min, tzinfo=tz)
+    busy = {pk: [] for pk in ids}
+    rows = (Booking.objects
+            .active()
+            .overlapping(day_start, day_start + timedelta(days=1))
+            .filter(master_id__in=ids)
+            .values_list("master_id", "start_at", "end_at"))
+    for master_id, s, e in rows:
+        busy[master_id].append((int(s.timestamp()), int(e.timestamp())))
 
-    busy_intervals = [(b.start_at, b.end_at) for b in bookings]
+    step = slot_min * 60
+    result = {}
+    for pk in ids:
+        free = subtract_intervals(shifts[pk], merge_intervals(busy[pk]))
+        result[pk] = [from_ts(t) for t in iter_starts(free, step, step)]
+    return result
 
-    slots = []
-    for s in daterange(day_start, day_end, slot_min):
-        e = s + timedelta(minutes=slot_min)
-        intersects = any(not (e <= b_start or s >= b_end) for b_start, b_end in busy_intervals)
-        if not intersects:
-            slots.append(s)
-    return slots
+def free_slots_for_employee(day: datetime, employee: Employee, slot_min=60):
+    """
+    Повертає список вільних слотів (datetime початку) для конкретного майстра на конкретний день.
+    """
+    return free_slots_for_employees(day, [employee], slot_min=slot_min)[employee.pk]
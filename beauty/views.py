@@ -1,10 +1,12 @@
 from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.translation import gettext as _
 from django.views.decorators.http import require_http_methods
+from main.conditional import versioned
 from main.models import Deal  # твої існуючі моделі
 from .models import DealLine, Booking
 from .forms import DealLineForm, BookingForm
@@ -64,17 +66,21 @@ def deal_lines_manage(request, pk):
 
 
 @login_required
+@versioned("bookings", "deals", "clients", "refdata")
 def calendar_feed(request):
     """
     FullCalendar запитує події в діапазоні [start, end).
     Повертаємо масив {title, start, end, color, url}.
     """
-    start = request.GET.get("start")
-    end = request.GET.get("end")
+    start = parse_datetime(request.GET.get("start") or "")
+    end = parse_datetime(request.GET.get("end") or "")
 
-    qs = Booking.objects.select_related("deal", "deal__client", "master")
+    qs = Booking.objects.active().select_related("deal", "deal__client", "master")
     if start and end:
-        qs = qs.filter(start_at__lt=end, end_at__gt=start)
+        tz = timezone.get_current_timezone()
+        if timezone.is_naive(start):
+            start, end = timezone.make_aware(start, tz), timezone.make_aware(end, tz)
+        qs = qs.overlapping(start, end)
 
     events = []
     for b in qs:
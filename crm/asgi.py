@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Під ASGI (uvicorn/daphne) async-ендпоінти /api/async/... (beauty.api_async) не тримають
+воркер на час запиту до БД; решта view — синхронні, Django виконує їх у пулі потоків.
 """
 
 import os
@@ -14,3 +17,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crm.settings')
 
 application = get_asgi_application()
+
+# каталоги перекладів і підписи choices — до fork воркерів (main.i18n)
+from main.i18n import warmup  # noqa: E402
+
+warmup()
@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -34,6 +37,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.StaticFilesMiddleware',  # зібрана статика з STATIC_ROOT (вимкнено з DEBUG)
+    'main.middleware.CompressionMiddleware',  # gzip / brotli (br — лише без CSRF-токена)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,13 +54,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # скомпільовані шаблони тримаються в пам'яті процесу; runserver скидає їх при зміні файлу
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
+                'django.template.context_processors.i18n',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'main.context_processors.data_versions',
             ],
         },
     },
@@ -79,6 +92,62 @@ DATABASES = {
 }
 
 
+# Cache
+# Локальний кеш на процес за замовчуванням. Для кількох воркерів задайте спільний бекенд
+# (напр. CRM_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CRM_CACHE_LOCATION=redis://127.0.0.1:6379/1) — через нього ходять версії даних (main.versioning).
+# З локальним кешем токени версій живуть DATA_VERSION_TTL секунд (None → 60; 0 → безстроково),
+# тож зміни доходять до інших воркерів із такою затримкою.
+DATA_VERSION_TTL = int(os.environ["CRM_DATA_VERSION_TTL"]) if os.environ.get("CRM_DATA_VERSION_TTL") else None
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CRM_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CRM_CACHE_LOCATION", "crm-default"),
+    },
+    # сесії й користувач для AuthenticationMiddleware — окремий аліас, щоб їх не витісняли
+    # знімки/довідники з "default"
+    "sessions": {
+        "BACKEND": os.environ.get("CRM_SESSION_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CRM_SESSION_CACHE_LOCATION", "crm-sessions"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+
+# Sessions / auth
+# CRM_SESSION_MODE:
+#   cached_db      — (за замовчуванням зі спільним кешем "sessions") читання з кешу, запис і в кеш,
+#                    і в django_session; промах кешу (рестарт) — один SELECT, дані не губляться
+#   signed_cookies — сесія в підписаній cookie, БД і кеш не потрібні (дані сесії малі: id, backend, hash)
+#   db             — (за замовчуванням з локальним кешем) django_session на кожен запит
+# Прострочені рядки django_session чистить команда clear_expired_sessions (cron).
+#
+# Кеш сесій і користувача має бути спільним (Redis/memcached): з LocMem logout, зміна пароля
+# чи деактивація скидають запис лише у воркері, що обробив запит, а решта ще пускають зі
+# старою сесією. Тому cached_db з LocMem — помилка конфігурації, а кеш користувача вимкнено.
+SESSION_CACHE_SHARED = CACHES["sessions"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache"
+SESSION_MODE = os.environ.get("CRM_SESSION_MODE", "cached_db" if SESSION_CACHE_SHARED else "db")
+if SESSION_MODE == "cached_db" and not SESSION_CACHE_SHARED:
+    raise ImproperlyConfigured(
+        "CRM_SESSION_MODE=cached_db потребує спільного CRM_SESSION_CACHE_BACKEND (Redis/memcached), не LocMem"
+    )
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+SESSION_CACHE_ALIAS = "sessions"
+
+# користувач з кешу замість SELECT з auth_user на кожен запит (див. accounts/backends.py);
+# None — без кешу (локальний кеш сесій, див. вище)
+AUTHENTICATION_BACKENDS = ["accounts.backends.CachedModelBackend"]
+AUTH_USER_CACHE_ALIAS = "sessions" if SESSION_CACHE_SHARED else None
+AUTH_USER_CACHE_TTL = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -123,9 +192,14 @@ LOCALE_PATHS = [BASE_DIR / "locale"]  # тут лежатимуть перекл
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]  # глобальна папка зі стилями
-# у продакшені додай:
-# STATIC_ROOT = BASE_DIR / "staticfiles"
-# STATICFILES_STORAGE = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+# збирання: python manage.py collectstatic --noinput → бандли CSS (main.assets), хеші в іменах,
+# .gz/.br поруч; віддає main.middleware.StaticFilesMiddleware (після збирання — перезапуск)
+STATIC_ROOT = BASE_DIR / "staticfiles"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "main.storage.BundledManifestStaticFilesStorage"},
+}
+CSS_BUNDLES = not DEBUG  # {% css_bundle %}: один бандл замість окремих файлів
 
 
 # Default primary key field type
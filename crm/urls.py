@@ -11,9 +11,11 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
     path('admin-panel/', main_views.admin_panel, name='admin_panel'),
+    path('admin-panel/reviews/', main_views.review_analytics, name='review_analytics'),
     path("admin-panel/employees/<int:user_id>/", main_views.employee_detail, name="employee_detail"),
     path("admin-panel/employees/<int:user_id>/edit/", main_views.employee_edit, name="employee_edit"),
     path('activities/new/', main_views.activity_create, name='activity_create'),
+    path('activities/import/', main_views.activity_import, name='activity_import'),
     path("activities/<int:pk>/edit/", main_views.activity_edit, name="activity_edit"),
     path("activities/<int:pk>/delete/", main_views.activity_delete, name="activity_delete"),
     path("clients/", main_views.client_list, name="client_list"),
@@ -29,6 +31,10 @@ urlpatterns = [
     path("deals/<int:pk>/upload/", main_views.deal_attachment_upload, name="deal_attachment_upload"),
     path("attachments/<int:att_id>/delete/", main_views.deal_attachment_delete, name="deal_attachment_delete"),
     path("deals/<int:pk>/status/", main_views.deal_change_status, name="deal_change_status"),
+    path("deals/<int:pk>/move/", main_views.deal_move, name="deal_move"),
+    path("deals/pipeline/", main_views.pipeline_board, name="pipeline_board"),
+    path("deals/pipeline/<slug:status>/", main_views.pipeline_column, name="pipeline_column"),
+    path("search/", main_views.global_search, name="global_search"),
     path("i18n/", include("django.conf.urls.i18n")),
     path("api/", include("beauty.urls")),
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crm.settings')
 
 application = get_wsgi_application()
+
+# каталоги перекладів і підписи choices — до fork воркерів (main.i18n)
+from main.i18n import warmup  # noqa: E402
+
+warmup()
@@ -0,0 +1,194 @@
+"""
+Активності: масовий імпорт (JSON lines з телефонії) і денні лічильники.
+
+ActivityDailyCounter — (user, локальний день) → кількість. Одиничні зміни ведуть сигнали
+в main.models, імпорт — сам (bulk_create сигналів не шле): одна upsert-вставка на пакет.
+Дашборд і топ активних читають лише лічильники.
+"""
+import json
+import math
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Activity, ActivityDailyCounter
+from .versioning import bump_version
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 50          # далі помилки лише рахуємо
+MAX_NOTES = 2000
+KINDS = {k for k, _ in Activity.TYPE_CHOICES}
+
+
+# ---- лічильники ----
+
+def counter_key(user_id, created_at):
+    return user_id, timezone.localdate(created_at)
+
+
+def add_counts(deltas):
+    """
+    deltas: {(user_id, day): +n/−n}. Додатні — одним INSERT ... ON CONFLICT DO UPDATE
+    (атомарний інкремент, без читання), від'ємні — UPDATE існуючих рядків
+    (вставка тут не потрібна, а при каскадному видаленні користувача й шкідлива).
+    """
+    plus = [(uid, day, n) for (uid, day), n in deltas.items() if n > 0]
+    table = ActivityDailyCounter._meta.db_table
+    with connection.cursor() as cursor:
+        for i in range(0, len(plus), BATCH_SIZE):
+            chunk = plus[i:i + BATCH_SIZE]
+            params = []
+            for uid, day, n in chunk:
+                params += [uid, connection.ops.adapt_datefield_value(day), n]
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, day, count) VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT (user_id, day) DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                params,
+            )
+    for (uid, day), n in deltas.items():
+        if n < 0:
+            ActivityDailyCounter.objects.filter(user_id=uid, day=day).update(count=F("count") + n)
+
+
+def rebuild_counters():
+    """Перерахунок з нуля (після ручних правок у БД): 1 GROUP BY + bulk_create."""
+    rows = (Activity.objects
+            .order_by()
+            .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+            .values("user_id", "day")
+            .annotate(n=Count("id")))
+    with transaction.atomic():
+        ActivityDailyCounter.objects.all().delete()
+        ActivityDailyCounter.objects.bulk_create(
+            (ActivityDailyCounter(user_id=r["user_id"], day=r["day"], count=r["n"]) for r in rows),
+            batch_size=BATCH_SIZE,
+        )
+
+
+def count_for(user, day=None):
+    day = day or timezone.localdate()
+    return (ActivityDailyCounter.objects.filter(user=user, day=day)
+            .values_list("count", flat=True).first()) or 0
+
+
+def total_since(days=None):
+    """Сума за останні days днів (включно з сьогодні); None — за весь час."""
+    qs = ActivityDailyCounter.objects.all()
+    if days:
+        qs = qs.filter(day__gt=timezone.localdate() - timedelta(days=days))
+    return qs.aggregate(s=Sum("count"))["s"] or 0
+
+
+def top_active(days=30, limit=5):
+    """[{"user__username", "total"}] — той самий формат, що давав GROUP BY по Activity."""
+    return list(ActivityDailyCounter.objects
+                .filter(day__gt=timezone.localdate() - timedelta(days=days))
+                .values("user__username")
+                .annotate(total=Sum("count"))
+                .filter(total__gt=0)
+                .order_by("-total", "user__username")[:limit])
+
+
+# ---- імпорт ----
+
+def _parse(row, user_ids, default_user_id):
+    """Один JSON-об'єкт → Activity (без збереження); ValueError з поясненням на сміття."""
+    if not isinstance(row, dict):
+        raise ValueError("очікується JSON-об'єкт")
+    if row.get("user"):
+        user_id = user_ids.get(str(row["user"]))
+        if user_id is None:
+            raise ValueError(f"невідомий користувач: {row['user']}")
+    else:
+        user_id = default_user_id
+
+    kind = row.get("kind") or "call"
+    if kind not in KINDS:
+        raise ValueError(f"невідомий kind: {kind}")
+
+    created_at = timezone.now()
+    if row.get("created_at"):
+        created_at = parse_datetime(str(row["created_at"]))
+        if created_at is None:
+            raise ValueError("некоректний created_at")
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at, timezone.get_current_timezone())
+
+    # телефонія зазвичай дає секунди; округлюємо вгору до хвилини
+    if row.get("duration_sec") is not None:
+        duration_min = math.ceil(int(row["duration_sec"]) / 60)
+    else:
+        duration_min = int(row.get("duration_min") or 0)
+    if duration_min < 0:
+        raise ValueError("від'ємна тривалість")
+
+    return Activity(user_id=user_id, kind=kind, created_at=created_at, duration_min=duration_min,
+                    notes=str(row.get("notes") or "")[:MAX_NOTES])
+
+
+def _import_batch(batch, default_user_id):
+    """batch: [(line_no, dict | ValueError)]. Повертає (створено, [(line_no, помилка)])."""
+    names = {str(row["user"]) for _, row in batch if isinstance(row, dict) and row.get("user")}
+    user_ids = dict(User.objects.filter(username__in=names).values_list("username", "id")) if names else {}
+
+    objs, errors = [], []
+    for line_no, row in batch:
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            objs.append(_parse(row, user_ids, default_user_id))
+        except (ValueError, TypeError) as e:
+            errors.append((line_no, str(e)))
+    if not objs:
+        return 0, errors
+
+    deltas = {}
+    for a in objs:
+        key = counter_key(a.user_id, a.created_at)
+        deltas[key] = deltas.get(key, 0) + 1
+    with transaction.atomic():
+        Activity.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        add_counts(deltas)
+    bump_version("activities")
+    return len(objs), errors
+
+
+def ingest(lines, default_user):
+    """
+    lines — ітерабельне рядків JSON (bytes або str), напр. тіло запиту.
+    {"user": "<username>", "kind": "call", "created_at": ISO, "duration_sec": 95, "notes": "..."}
+    user за замовчуванням — default_user. Рядки з помилками пропускаються, решта пишеться
+    пакетами по BATCH_SIZE (кожен пакет — окрема транзакція).
+    Повертає {"created": n, "failed": n, "errors": [{"line", "error"}, ...]}.
+    """
+    created, failed, errors = 0, 0, []
+    batch = []
+
+    def flush():
+        nonlocal created, failed
+        n, errs = _import_batch(batch, default_user.pk)
+        created += n
+        failed += len(errs)
+        errors.extend({"line": no, "error": msg} for no, msg in errs[:max(0, MAX_ERRORS - len(errors))])
+        batch.clear()
+
+    for line_no, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            batch.append((line_no, json.loads(raw)))
+        except ValueError:
+            batch.append((line_no, ValueError("некоректний JSON")))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    return {"created": created, "failed": failed, "errors": errors}
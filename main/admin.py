@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Employee, Activity, PerformanceReview, Client, Deal, DealAttachment
+from .models import Employee, Activity, ActivityDailyCounter, PerformanceReview, Client, Deal, DealAttachment
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
@@ -14,15 +14,23 @@ class ActivityAdmin(admin.ModelAdmin):
     list_filter = ("kind", "created_at")
     search_fields = ("user__username", "notes")
 
+@admin.register(ActivityDailyCounter)
+class ActivityDailyCounterAdmin(admin.ModelAdmin):
+    list_display = ("user", "day", "count")
+    list_filter = ("day",)
+    search_fields = ("user__username",)
+    readonly_fields = ("user", "day", "count")  # ведуться автоматично (main.activities)
+
 @admin.register(PerformanceReview)
 class PerformanceReviewAdmin(admin.ModelAdmin):
-    list_display = ("user", "period_start", "period_end", "score", "created_at")
-    list_filter = ("score", "period_end")
+    list_display = ("user", "period_start", "period_end", "score", "scale", "created_at")
+    list_filter = ("scale", "score", "period_end")
     search_fields = ("user__username", "comment")
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
-    list_display = ("name", "phone", "email", "deal_status", "created_at", "owner")
+    list_display = ("name", "phone", "email", "deal_status", "closed_amount", "visit_count", "last_booking_at",
+                    "created_at", "owner")
     search_fields = ("name", "phone", "email")
     list_filter = ("deal_status", "created_at")
 
@@ -0,0 +1,123 @@
+"""
+Денормалізовані агрегати клієнта: Client.closed_amount (сума закритих угод), open_deals
+(угод new/in_progress), last_booking_at (початок останнього нескасованого запису, що вже
+почався) і visit_count (таких записів — майбутні візитами не рахуються), щоб список клієнтів
+сортував і фільтрував по них без JOIN + GROUP BY на кожній сторінці.
+
+Оновлюються лише зачеплені клієнти: сигнали Deal/Booking (main.models, beauty.models) і
+пакетні шляхи (recurrence.materialize, beauty.batch, злиття дублікатів) викликають touch()
+з id клієнтів або угод → один UPDATE ... SET колонка = (підзапит) для цих клієнтів.
+Перерахунок, а не +1/−1: не розходиться при зміні статусу, переносі угоди між клієнтами
+чи повторному сигналі. Архівні записи (BookingArchive) теж рахуються — архівування
+агрегатів не змінює. Повний перерахунок — rebuild() (команда rebuild_client_aggregates).
+
+Запис стає візитом, коли настає його час, а сигналу на цю мить немає — тож клієнтів, чиї
+записи почалися за останні години, перераховує refresh_started() (та сама команда з
+--started-hours, cron щогодини).
+"""
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db.models import DateTimeField, DecimalField, F, Func, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.utils import timezone
+
+from .models import DEAL_OPEN_STATUSES, Client, Deal
+from .versioning import bump_version
+
+# поля, зміна яких впливає на агрегати (сигнали з update_fields без них пропускаємо)
+DEAL_FIELDS = {"client", "amount", "status"}
+BOOKING_FIELDS = {"deal", "start_at", "status"}
+
+_pending = threading.local()
+
+
+def _scalar(qs, function, field, output_field):
+    """(SELECT FUNC(field) FROM ...) без GROUP BY — одне значення на зовнішній рядок."""
+    return Subquery(qs.order_by().annotate(v=Func(F(field), function=function, output_field=output_field))
+                    .values("v"))
+
+
+def _values():
+    from beauty.models import Booking, BookingArchive
+
+    deals = Deal.objects.filter(client=OuterRef("pk"))
+    bookings = Booking.objects.active().filter(deal__client=OuterRef("pk"), start_at__lte=Now())
+    archived = (BookingArchive.objects
+                .exclude(status=Booking.CANCELLED)
+                .filter(start_at__lte=Now())
+                .filter(deal_id__in=Deal.objects.filter(client=OuterRef(OuterRef("pk"))).values("pk")))
+    money = DecimalField(max_digits=14, decimal_places=2)
+    last_live = _scalar(bookings, "MAX", "start_at", DateTimeField())
+    last_archived = _scalar(archived, "MAX", "start_at", DateTimeField())
+    return {
+        "closed_amount": Coalesce(_scalar(deals.filter(status="closed"), "SUM", "amount", money),
+                                  Value(0), output_field=money),
+        "open_deals": Coalesce(_scalar(deals.filter(status__in=DEAL_OPEN_STATUSES), "COUNT", "pk", IntegerField()),
+                               Value(0)),
+        # GREATEST з NULL у PostgreSQL і SQLite поводиться по-різному — Coalesce з обох боків
+        "last_booking_at": Greatest(Coalesce(last_live, last_archived), Coalesce(last_archived, last_live)),
+        "visit_count": (Coalesce(_scalar(bookings, "COUNT", "pk", IntegerField()), Value(0))
+                        + Coalesce(_scalar(archived, "COUNT", "pk", IntegerField()), Value(0))),
+    }
+
+
+def refresh(client_ids=(), deal_ids=()):
+    """Один UPDATE для клієнтів client_ids і власників угод deal_ids. Повертає к-сть рядків."""
+    cond = Q()
+    if client_ids:
+        cond |= Q(pk__in=list(client_ids))
+    if deal_ids:
+        cond |= Q(pk__in=Deal.objects.filter(pk__in=list(deal_ids)).values("client_id"))
+    if not cond:
+        return 0
+    updated = Client.objects.filter(cond).update(**_values())
+    bump_version("clients")  # update() сигналів Client не шле, а список клієнтів кешується з версією
+    return updated
+
+
+def rebuild():
+    """Усі клієнти одним set-based UPDATE (після ручних правок у БД / першого заповнення)."""
+    updated = Client.objects.update(**_values())
+    bump_version("clients")
+    return updated
+
+
+def refresh_started(hours):
+    """Клієнти з записами, що почалися за останні hours годин (стали візитами). Повертає к-сть рядків."""
+    from beauty.models import Booking
+
+    now = timezone.now()
+    deal_ids = (Booking.objects.active()
+                .filter(start_at__gt=now - timedelta(hours=hours), start_at__lte=now)
+                .values_list("deal_id", flat=True))
+    return refresh(deal_ids=set(deal_ids))
+
+
+def touch(client_ids=(), deal_ids=()):
+    """Точка входу для сигналів: одразу refresh(), а всередині deferred() — лише запам'ятати."""
+    pending = getattr(_pending, "ids", None)
+    if pending is None:
+        refresh(client_ids, deal_ids)
+    else:
+        pending[0].update(client_ids)
+        pending[1].update(deal_ids)
+
+
+@contextmanager
+def deferred():
+    """
+    Пакетні операції, що шлють сигнали на кожен рядок (видалення QuerySet'ом, цикли save()):
+    зачеплені id збираються, а перерахунок — один UPDATE на виході з блоку.
+    """
+    if getattr(_pending, "ids", None) is not None:  # вкладений блок — збирає зовнішній
+        yield
+        return
+    _pending.ids = (set(), set())
+    try:
+        yield
+        client_ids, deal_ids = _pending.ids
+    finally:
+        _pending.ids = None
+    refresh(client_ids, deal_ids)
@@ -0,0 +1,98 @@
+"""
+Збирання CSS: замість ~10 окремих <link> на сторінку — один мінімізований бандл.
+
+BUNDLES — імена бандлів → вихідні файли зі static/. Бандл сторінки = спільні стилі (CORE)
++ стилі сторінки. Бандли пише сховище (main.storage) під час collectstatic у
+css/bundles/<ім'я>.css, далі ManifestStaticFilesStorage додає хеш до імені, а
+precompress() кладе поруч .gz/.br (віддає main.middleware.StaticFilesMiddleware).
+
+У шаблонах — {% load assets %}{% css_bundle "clients" %}: з CSS_BUNDLES = False (DEBUG)
+тег видає окремі <link> на вихідні файли, тож для розробки collectstatic не потрібен.
+"""
+import gzip
+import os
+import posixpath
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli — необов'язковий: без нього лише .gz
+    brotli = None
+
+BUNDLE_DIR = "css/bundles"
+
+CORE = [
+    "css/base.css",
+    "css/layout.css",
+    "css/utils.css",
+    "css/components/forms.css",
+    "css/components/tables.css",
+    "css/components/buttons.css",
+    "css/components/cards.css",
+    "css/components/tabs.css",
+]
+PAGES = ["dashboard", "clients", "deals", "activity", "admin", "login", "register", "auth-reset"]
+
+BUNDLES = {
+    "core": CORE,
+    **{page: CORE + [f"css/pages/{page}.css"] for page in PAGES},
+    "home": ["css/pages/home.css"],  # home.html — окрема сторінка без base.html
+}
+
+COMPRESS_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".map", ".xml", ".html"}
+COMPRESS_MIN_SIZE = 256   # байт; менші файли стиснення не окупають
+COMPRESS_MIN_RATIO = 0.95  # варіант лишаємо, лише якщо він хоча б на 5% менший
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_URL = re.compile(r"""url\(\s*(['"]?)(?!data:|https?:|/|#)([^'")]+)\1\s*\)""")
+
+
+def bundle_path(name):
+    return f"{BUNDLE_DIR}/{name}.css"
+
+
+def minify_css(text):
+    """Коментарі й зайві пробіли геть. Пробіл перед ":" лишаємо: "a :hover" ≠ "a:hover"."""
+    text = _COMMENT.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def rebase_urls(text, source, target):
+    """Відносні url() з source мають вказувати на той самий файл і з target (css/bundles/)."""
+    src_dir, dst_dir = posixpath.dirname(source), posixpath.dirname(target)
+
+    def fix(m):
+        path = posixpath.normpath(posixpath.join(src_dir, m.group(2)))
+        return f'url("{posixpath.relpath(path, dst_dir)}")'
+
+    return _URL.sub(fix, text)
+
+
+def build_bundle(name, read):
+    """Текст бандла name; read(path) → вміст вихідного файлу (str)."""
+    target = bundle_path(name)
+    parts = [minify_css(rebase_urls(read(src), src, target)) for src in BUNDLES[name]]
+    return "\n".join(parts) + "\n"
+
+
+def precompress(path):
+    """Поруч із файлом — path.gz і path.br (якщо є brotli), коли це має сенс. Повертає створені."""
+    if os.path.splitext(path)[1] not in COMPRESS_EXTENSIONS:
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return []
+    variants = {".gz": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    written = []
+    for ext, blob in variants.items():
+        if len(blob) <= len(data) * COMPRESS_MIN_RATIO:
+            with open(path + ext, "wb") as f:
+                f.write(blob)
+            written.append(path + ext)
+    return written
@@ -0,0 +1,65 @@
+"""
+Умовні GET для важких сторінок і JSON без рендеру: ETag рахується з токенів версій даних
+(main.versioning), а не з хешу тіла — збіг If-None-Match дає 304 ще до виклику view.
+
+@versioned("clients") на view: ETag = хеш(версії, користувач, мова, повний URL, CSRF-cookie);
+відповідь — Cache-Control: private, no-cache (браузер щоразу перепитує, спільні кеші не
+зберігають). Дані без версій (час для дашборду) — hourly=True додає поточну годину.
+Сторінка з неспожитими повідомленнями (django.contrib.messages) завжди рендериться.
+
+З локальним кешем процесу (LocMem) токени бачить лише свій воркер: bump в іншому до нього
+не доходить, тож у ETag додаємо ще й часовий кошик LOCAL_TTL — застарілий 304 можливий
+не довше за нього. Зі спільним кешем (Redis/memcached) ETag залежить лише від версій.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .versioning import LOCAL_TTL, get_version, is_process_local
+
+
+def versions_etag(names, hourly=False):
+    """etag_func для django.views.decorators.http.condition; None — без валідатора."""
+
+    def etag(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+            return None
+        parts = [get_version(name) for name in names]
+        parts += [
+            request.user.pk,
+            getattr(request, "LANGUAGE_CODE", ""),
+            request.get_full_path(),
+            # 304 лишає в браузері сторінку зі старим токеном форми — він має пасувати до cookie
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        ]
+        if hourly:
+            parts.append(timezone.localtime().strftime("%Y%m%d%H"))
+        if is_process_local():
+            parts.append(int(time.time() // LOCAL_TTL))
+        return hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+
+    return etag
+
+
+def versioned(*names, hourly=False):
+    """Декоратор view: ETag з версій names + 304 без рендеру; ставити під @login_required."""
+
+    def decorator(view):
+        conditional = condition(etag_func=versions_etag(names, hourly))(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return inner
+
+    return decorator
@@ -0,0 +1,6 @@
+from .versioning import DataVersions
+
+
+def data_versions(request):
+    """Токени версій даних для ключів {% cache %}: {% cache 600 name user.pk LANGUAGE_CODE data_versions.deals %}."""
+    return {"data_versions": DataVersions()}
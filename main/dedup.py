@@ -0,0 +1,228 @@
+"""
+Пошук і злиття дублікатів клієнтів.
+
+Кандидатів відбираємо блоками (нормалізований телефон, email, триграми імені),
+порівнюємо лише пари всередині блоку, а злиття робимо кількома bulk-UPDATE.
+
+Оцінка пари (поріг DEFAULT_THRESHOLD = 0.75):
+  * однаковий телефон або email — 0.5 кожен, схожість імені (Jaccard триграм) — до 0.6;
+  * слабкі сигнали — 0.25: ті самі останні PHONE_WEAK_DIGITS цифр при різному номері
+    (інший префікс/код країни) або та сама локальна частина email на іншому домені.
+Саме ім'я (навіть однакове) поріг не бере — тезок не зливаємо. Сильний збіг імені
+(схожість ≥ ~0.84) разом зі слабким сигналом — бере: такі пари знаходить лише блок по
+триграмах, бо ні телефон, ні email у них точно не збігаються.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from itertools import combinations
+
+from django.db import transaction
+
+PHONE_KEY_DIGITS = 9      # останні 9 цифр: +420 777 123 456 == 777123456
+PHONE_MIN_DIGITS = 7      # коротші номери не вважаємо ключем
+PHONE_WEAK_DIGITS = 6     # слабкий сигнал: збіг лише хвоста номера
+MAX_NAME_BLOCK = 50       # надто поширені триграми не дають сигналу — пропускаємо
+DEFAULT_THRESHOLD = 0.75
+
+W_PHONE = 0.5
+W_EMAIL = 0.5
+W_NAME = 0.6
+W_WEAK = 0.25
+
+
+# ---- нормалізація ----
+
+def phone_key(phone):
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) < PHONE_MIN_DIGITS:
+        return ""
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+def email_key(email):
+    return (email or "").strip().lower()
+
+
+def name_key(name):
+    """Нижній регістр, без діакритики, токени відсортовані ("Nováková Jana" == "jana novakova")."""
+    s = unicodedata.normalize("NFKD", name or "")
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    tokens = re.findall(r"\w+", s)
+    return " ".join(sorted(tokens))
+
+
+def name_trigrams(key):
+    # як у pg_trgm: кожне слово доповнюємо пробілами
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def name_similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# ---- оцінка пар ----
+
+class ClientKey:
+    __slots__ = ("pk", "phone", "email", "name", "grams")
+
+    def __init__(self, pk, name, phone, email):
+        self.pk = pk
+        self.phone = phone_key(phone)
+        self.email = email_key(email)
+        self.name = name_key(name)
+        self.grams = name_trigrams(self.name)
+
+
+def _weak_match(a: ClientKey, b: ClientKey):
+    """Хвіст номера або локальна частина email збігаються, а повні ключі — ні."""
+    if a.phone and b.phone and a.phone != b.phone and a.phone[-PHONE_WEAK_DIGITS:] == b.phone[-PHONE_WEAK_DIGITS:]:
+        return True
+    if a.email and b.email and a.email != b.email:
+        return a.email.partition("@")[0] == b.email.partition("@")[0]
+    return False
+
+
+def score_pair(a: ClientKey, b: ClientKey):
+    score = 0.0
+    if a.phone and a.phone == b.phone:
+        score += W_PHONE
+    if a.email and a.email == b.email:
+        score += W_EMAIL
+    if _weak_match(a, b):
+        score += W_WEAK
+    score += W_NAME * name_similarity(a.grams, b.grams)
+    return min(score, 1.0)
+
+
+def candidate_pairs(keys):
+    """Блокування: пари лише з клієнтів, що мають спільний телефон, email або триграму імені."""
+    blocks = defaultdict(list)
+    for k in keys:
+        if k.phone:
+            blocks[("p", k.phone)].append(k)
+        if k.email:
+            blocks[("e", k.email)].append(k)
+        for g in k.grams:
+            blocks[("n", g)].append(k)
+
+    seen = set()
+    for (kind, _), members in blocks.items():
+        if len(members) < 2 or (kind == "n" and len(members) > MAX_NAME_BLOCK):
+            continue
+        for a, b in combinations(members, 2):
+            pair = (a.pk, b.pk) if a.pk < b.pk else (b.pk, a.pk)
+            if pair not in seen:
+                seen.add(pair)
+                yield a, b
+
+
+def find_duplicate_groups(keys, threshold=DEFAULT_THRESHOLD):
+    """
+    Повертає список груп [pk, ...] (union-find над парами з score >= threshold).
+    Перший pk у групі — найстаріший клієнт, він і залишиться після злиття.
+    """
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in candidate_pairs(keys):
+        if score_pair(a, b) >= threshold:
+            ra, rb = find(a.pk), find(b.pk)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+    groups = defaultdict(list)
+    for pk in parent:
+        groups[find(pk)].append(pk)
+    return [sorted(g) for g in groups.values() if len(g) > 1]
+
+
+# ---- злиття ----
+
+@transaction.atomic
+def merge_clients(primary, duplicate_ids):
+    """
+    Переносить угоди на primary одним UPDATE, доповнює порожні поля primary (телефон,
+    email, власник, нотатки) і видаляє дублікати. Записи Booking окремо не переносяться:
+    вони висять на Deal (OneToOne), тож ідуть разом з угодою. Серії записів (BookingSeries)
+    посилаються на клієнта напряму — їх переносимо теж, інакше видалення дубліката
+    каскадом знесе серію.
+    """
+    from beauty.models import BookingSeries
+    from . import search
+    from .aggregates import touch
+    from .versioning import bump_version
+    from .models import Client, Deal, recalc_client_deal_status
+
+    duplicate_ids = [pk for pk in duplicate_ids if pk != primary.pk]
+    if not duplicate_ids:
+        return 0
+
+    duplicates = list(Client.objects.filter(pk__in=duplicate_ids).order_by("created_at", "pk"))
+
+    Deal.objects.filter(client_id__in=duplicate_ids).update(client=primary)
+    moved_series = BookingSeries.objects.filter(client_id__in=duplicate_ids).update(client=primary)
+
+    changed = []
+    for field, attr in (("phone", "phone"), ("email", "email"), ("owner", "owner_id")):
+        if not getattr(primary, attr):
+            value = next((getattr(d, attr) for d in duplicates if getattr(d, attr)), None)
+            if value:
+                setattr(primary, attr, value)
+                changed.append(field)
+    notes = [primary.notes] + [d.notes for d in duplicates if d.notes and d.notes not in primary.notes]
+    notes = "\n".join(n for n in notes if n)
+    if notes != primary.notes:
+        primary.notes = notes
+        changed.append("notes")
+    if changed:
+        primary.save(update_fields=changed)
+
+    Client.objects.filter(pk__in=duplicate_ids).delete()
+    recalc_client_deal_status(primary.pk)
+    # угоди перенесено UPDATE'ом, без сигналів
+    touch(client_ids=[primary.pk])
+    search.client_dependents([primary.pk])
+    bump_version("deals")
+    if moved_series:
+        bump_version("bookings")  # календар розгортає серії на льоту
+    return len(duplicates)
+
+
+# ---- точковий пошук (walk-in) ----
+
+def find_matching_client(name, phone="", email="", threshold=DEFAULT_THRESHOLD):
+    """
+    Шукає вже існуючого клієнта для нового запису без client_id.
+    Кандидати — лише за індексованими ключами (phone_norm / email), тож це 1 запит.
+    """
+    from django.db.models import Q
+    from .models import Client
+
+    new = ClientKey(None, name, phone, email)
+    cond = Q()
+    if new.phone:
+        cond |= Q(phone_norm=new.phone)
+    if new.email:
+        cond |= Q(email__iexact=new.email)
+    if not cond:
+        return None
+
+    best, best_score = None, 0.0
+    for c in Client.objects.filter(cond).order_by("created_at")[:20]:
+        s = score_pair(new, ClientKey(c.pk, c.name, c.phone, c.email))
+        if s > best_score:
+            best, best_score = c, s
+    return best if best_score >= threshold else None
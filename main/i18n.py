@@ -0,0 +1,86 @@
+"""
+Перекладені підписи choices і verbose_name — один раз на мову на процес.
+
+get_FOO_display() на кожен виклик будує dict із flatchoices і проганяє (lazy) підпис через
+gettext; у таблицях (активності на дашборді, колонки воронки, пошуковий індекс) це — на
+кожен рядок. Тут підписи для (мова, модель, поле) резолвляться один раз і лежать у dict
+процесу: каталоги .mo незмінні, поки процес живий (після compilemessages — перезапуск).
+У циклах краще один раз взяти choice_labels() і далі лише dict-lookup: навіть
+translation.get_language() (contextvar-local) коштує мікросекунди на виклик.
+
+warmup() викликають crm.wsgi / crm.asgi: каталоги всіх LANGUAGES і підписи всіх полів з
+choices вантажаться ще в майстер-процесі, тож з gunicorn --preload воркери отримують їх
+через fork, а не кожен окремо на першому запиті. Виміряти — команда bench_i18n.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.utils import translation
+from django.utils.translation import trans_real
+
+_labels = {}  # (мова, модель, поле) → {значення: підпис}
+_names = {}   # (мова, модель, поле | None, plural) → verbose_name
+
+
+def _language(language):
+    return language or translation.get_language() or settings.LANGUAGE_CODE
+
+
+def choice_labels(model, field_name, language=None):
+    """{значення: перекладений підпис} для поля з choices (мова — активна, якщо не вказано)."""
+    language = _language(language)
+    key = (language, model, field_name)
+    labels = _labels.get(key)
+    if labels is None:
+        field = model._meta.get_field(field_name)
+        with translation.override(language):
+            labels = {value: str(label) for value, label in field.flatchoices}
+        _labels[key] = labels
+    return labels
+
+
+def label(model, field_name, value, language=None):
+    """Як get_FOO_display(): невідоме значення повертається як є."""
+    return choice_labels(model, field_name, language).get(value, value)
+
+
+def display(obj, field_name, language=None):
+    """label() для значення поля obj: i18n.display(activity, "kind")."""
+    value = getattr(obj, field_name)
+    return choice_labels(type(obj), field_name, language).get(value, value)
+
+
+def verbose_name(model, field_name=None, plural=False, language=None):
+    """verbose_name поля, або моделі (verbose_name / verbose_name_plural) без field_name."""
+    language = _language(language)
+    key = (language, model, field_name, plural)
+    name = _names.get(key)
+    if name is None:
+        opts = model._meta
+        with translation.override(language):
+            if field_name:
+                name = str(opts.get_field(field_name).verbose_name)
+            else:
+                name = str(opts.verbose_name_plural if plural else opts.verbose_name)
+        _names[key] = name
+    return name
+
+
+def clear():
+    _labels.clear()
+    _names.clear()
+
+
+def warmup(languages=None):
+    """Каталоги й підписи для всіх мов (до fork воркерів). Повертає к-сть закешованих підписів."""
+    languages = languages or [code for code, _ in settings.LANGUAGES]
+    models = apps.get_models()
+    for language in languages:
+        trans_real.translation(language)  # парсинг .mo — найдорожча частина першого запиту мовою
+        for model in models:
+            verbose_name(model, language=language)
+            verbose_name(model, plural=True, language=language)
+            for field in model._meta.concrete_fields:
+                verbose_name(model, field.name, language=language)
+                if field.choices:
+                    choice_labels(model, field.name, language)
+    return sum(len(labels) for labels in _labels.values()) + len(_names)
@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+
+from main import i18n
+from main.models import Activity, Deal
+
+
+class Command(BaseCommand):
+    help = ("Заміри перекладів: час і пам'ять завантаження каталогів (main.i18n.warmup) "
+            "і вартість підпису choices на рядок — get_FOO_display() проти кешу main.i18n.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000, help="Підписів на мову (20000)")
+
+    def handle(self, *args, **opts):
+        n = opts["iterations"]
+        if n < 1:
+            raise CommandError("--iterations має бути > 0")
+        languages = [code for code, _ in settings.LANGUAGES]
+
+        # ---- прогрів: каталоги + підписи, по мові ----
+        i18n.clear()
+        tracemalloc.start()
+        total_kib = 0.0
+        for language in languages:
+            before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            count = i18n.warmup([language])
+            ms = (time.perf_counter() - started) * 1000
+            kib = (tracemalloc.get_traced_memory()[0] - before) / 1024
+            total_kib += kib
+            self.stdout.write(f"{language}: прогрів {ms:.1f} ms, +{kib:.1f} KiB")
+        tracemalloc.stop()
+        self.stdout.write(f"усього: +{total_kib:.1f} KiB, підписів у кеші: {count}")
+
+        # ---- підпис на рядок: як у таблицях (Activity.kind, Deal.status) ----
+        rows = [Activity(kind=k) for k, _ in Activity.TYPE_CHOICES] + [Deal(status=s) for s, _ in Deal.STATUS_CHOICES]
+        fields = ["kind" if isinstance(r, Activity) else "status" for r in rows]
+        pairs = [(rows[i % len(rows)], fields[i % len(rows)]) for i in range(n)]
+        for language in languages:
+            with translation.override(language):
+                started = time.perf_counter()
+                for obj, field in pairs:
+                    getattr(obj, f"get_{field}_display")()
+                plain = (time.perf_counter() - started) / n * 1e6
+                started = time.perf_counter()
+                for obj, field in pairs:
+                    i18n.display(obj, field)
+                cached = (time.perf_counter() - started) / n * 1e6
+                # як у циклах (воронка, пошуковий індекс): мапа раз на запит, далі — dict
+                started = time.perf_counter()
+                maps = {(type(obj), field): i18n.choice_labels(type(obj), field) for obj, field in pairs[:len(rows)]}
+                for obj, field in pairs:
+                    maps[type(obj), field].get(getattr(obj, field))
+                mapped = (time.perf_counter() - started) / n * 1e6
+            self.stdout.write(f"{language}: get_FOO_display {plain:.2f} µs, i18n.display {cached:.2f} µs, "
+                              f"choice_labels + dict {mapped:.2f} µs на рядок (×{plain / mapped:.0f})")
+        self.stdout.write(self.style.SUCCESS("Готово."))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from main.dedup import DEFAULT_THRESHOLD, ClientKey, find_duplicate_groups, merge_clients, phone_key
+from main.models import Client
+
+
+class Command(BaseCommand):
+    help = "Шукає дублікати клієнтів (телефон/email/схожість імені) і за --apply зливає їх у найстарішого."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help=f"Мінімальний score пари (0..1), за замовчуванням {DEFAULT_THRESHOLD}")
+        parser.add_argument("--apply", action="store_true", help="Справді злити (без нього — лише звіт)")
+
+    def handle(self, *args, **opts):
+        keys = []
+        names = {}
+        stale_norm = []
+        rows = Client.objects.values_list("id", "name", "phone", "email", "phone_norm").order_by("id")
+        for pk, name, phone, email, norm in rows.iterator(chunk_size=5000):
+            keys.append(ClientKey(pk, name, phone, email))
+            names[pk] = name
+            if norm != phone_key(phone):
+                stale_norm.append(Client(pk=pk, phone_norm=phone_key(phone)))
+
+        # клієнти, створені в обхід save() (bulk/імпорт), не мають ключа — доповнюємо
+        if stale_norm and opts["apply"]:
+            Client.objects.bulk_update(stale_norm, ["phone_norm"], batch_size=2000)
+
+        groups = find_duplicate_groups(keys, threshold=opts["threshold"])
+        total_dupes = sum(len(g) - 1 for g in groups)
+        for group in groups:
+            primary_id, *dupe_ids = group
+            self.stdout.write(
+                f"[=] #{primary_id} {names[primary_id]} ← "
+                + ", ".join(f"#{pk} {names[pk]}" for pk in dupe_ids)
+            )
+
+        if not opts["apply"]:
+            self.stdout.write(self.style.WARNING(
+                f"Знайдено груп: {len(groups)}, дублікатів: {total_dupes}. Запустіть з --apply для злиття."
+            ))
+            return
+
+        merged = 0
+        for primary_id, *dupe_ids in groups:
+            primary = Client.objects.get(pk=primary_id)
+            merged += merge_clients(primary, dupe_ids)
+        self.stdout.write(self.style.SUCCESS(f"Готово: груп {len(groups)}, злито клієнтів {merged}."))
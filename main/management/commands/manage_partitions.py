@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from main import partitioning
+
+
+class Command(BaseCommand):
+    help = ("Обслуговує місячні партиції main_activity: створює майбутні "
+            "і відʼєднує/видаляє старі (для cron, раз на тиждень-місяць). "
+            "Записи (beauty_booking) не партиціюються — для них archive_bookings.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--table", choices=sorted(partitioning.SPECS), action="append",
+                            help="Лише ця таблиця (можна кілька разів); за замовчуванням — усі")
+        parser.add_argument("--ahead", type=int, default=3, help="Скільки місяців наперед мати партиції")
+        parser.add_argument("--retain-months", type=int,
+                            help="Партиції, старші за N місяців, прибрати (див. --mode)")
+        parser.add_argument("--mode", choices=["detach", "drop"], default="detach",
+                            help="detach — лишити окремою таблицею; drop — видалити")
+        parser.add_argument("--dry-run", action="store_true", help="Лише показати план")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("Партиціювання доступне лише на PostgreSQL.")
+        if opts["retain_months"] is not None and opts["retain_months"] < 1:
+            raise CommandError("--retain-months має бути ≥ 1")
+
+        this_month = partitioning.month_start(date.today())
+        last = partitioning.add_months(this_month, opts["ahead"])
+        specs = [partitioning.SPECS[t] for t in (opts["table"] or sorted(partitioning.SPECS))]
+        for spec in specs:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if not partitioning.is_partitioned(cursor, spec.table):
+                    self.stdout.write(self.style.WARNING(f"{spec.table}: не партиційована (міграції не застосовані?)"))
+                    continue
+                self._create(cursor, spec, this_month, last, opts["dry_run"])
+                if opts["retain_months"]:
+                    cutoff = partitioning.add_months(this_month, -opts["retain_months"])
+                    self._retire(cursor, spec, cutoff, opts["mode"], opts["dry_run"])
+
+    def _create(self, cursor, spec, first, last, dry_run):
+        if dry_run:
+            existing = set(partitioning.list_partitions(cursor, spec))
+            month = first
+            while month <= last:
+                name = partitioning.partition_name(spec, month)
+                if name not in existing:
+                    self.stdout.write(f"[dry-run] створити {name}")
+                month = partitioning.add_months(month, 1)
+            return
+        for name in partitioning.ensure_partitions(cursor, spec, first, last):
+            self.stdout.write(self.style.SUCCESS(f"створено {name}"))
+
+    def _retire(self, cursor, spec, cutoff, mode, dry_run):
+        """Партиції, що повністю старші за cutoff (перше число місяця)."""
+        for name in partitioning.list_partitions(cursor, spec):
+            month = partitioning.partition_month(spec, name)
+            if month is None or month >= cutoff:
+                continue
+            if dry_run:
+                self.stdout.write(f"[dry-run] {mode} {name}")
+                continue
+            partitioning.detach_partition(cursor, spec, name, mode)
+            self.stdout.write(self.style.SUCCESS(f"{mode}: {name}"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from main.activities import rebuild_counters
+from main.models import ActivityDailyCounter
+
+
+class Command(BaseCommand):
+    help = "Перераховує денні лічильники активностей з main_activity (після ручних правок у БД)."
+
+    def handle(self, *args, **opts):
+        rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Готово: рядків лічильників {ActivityDailyCounter.objects.count()}."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import aggregates
+
+
+class Command(BaseCommand):
+    help = ("Перераховує денормалізовані агрегати клієнтів (сума закритих угод, відкриті угоди, "
+            "останній запис, к-сть візитів) одним UPDATE з підзапитами. З --started-hours — лише "
+            "клієнтів, чиї записи за цей час стали візитами (для cron щогодини).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--started-hours", type=int, default=None,
+                            help="Лише клієнти з записами, що почалися за останні N годин")
+
+    def handle(self, *args, **opts):
+        hours = opts["started_hours"]
+        if hours is None:
+            updated = aggregates.rebuild()
+        elif hours <= 0:
+            raise CommandError("--started-hours має бути > 0")
+        else:
+            updated = aggregates.refresh_started(hours)
+        self.stdout.write(self.style.SUCCESS(f"Готово: оновлено {updated} клієнтів."))
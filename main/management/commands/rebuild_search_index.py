@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import search
+
+
+class Command(BaseCommand):
+    help = ("Перебудовує індекс глобального пошуку (main.SearchEntry) пакетами; "
+            "без аргументів — усі типи.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("kinds", nargs="*", help=f"Що переіндексувати ({', '.join(search.KINDS)})")
+
+    def handle(self, *args, **opts):
+        unknown = set(opts["kinds"]) - set(search.KINDS)
+        if unknown:
+            raise CommandError(f"Невідомі типи: {', '.join(sorted(unknown))}")
+        search.rebuild(kinds=opts["kinds"] or None, write=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS("Готово."))
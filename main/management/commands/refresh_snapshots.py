@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.snapshots import SNAPSHOTS
+
+
+class Command(BaseCommand):
+    help = "Перераховує знімки статистики (адмін-панель) — для cron, щоб сторінки не чекали."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help=f"Які саме ({', '.join(sorted(SNAPSHOTS))}); за замовчуванням — усі")
+
+    def handle(self, *args, **opts):
+        unknown = set(opts["names"]) - set(SNAPSHOTS)
+        if unknown:
+            raise CommandError(f"Невідомі знімки: {', '.join(sorted(unknown))}")
+        for name in opts["names"] or sorted(SNAPSHOTS):
+            snap = SNAPSHOTS[name].refresh()
+            self.stdout.write(self.style.SUCCESS(f"{name}: {snap['computed_at']:%Y-%m-%d %H:%M:%S}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from main.models import resync_all_deal_statuses
+
+
+class Command(BaseCommand):
+    help = ("Перераховує Client.deal_status з угод одним UPDATE з умовною агрегацією "
+            "(після ручних правок у БД чи масових змін угод без сигналів).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--include-paused", action="store_true",
+                            help='Перерахувати й клієнтів зі статусом "pause" (ставиться вручну)')
+
+    def handle(self, *args, **opts):
+        changed = resync_all_deal_statuses(include_paused=opts["include_paused"])
+        self.stdout.write(self.style.SUCCESS(f"Готово: статус змінено у {changed} клієнтів."))
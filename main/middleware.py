@@ -0,0 +1,169 @@
+"""
+Віддача зібраної статики (STATIC_ROOT) самим Django — без окремого nginx — і стиснення
+динамічних відповідей (CompressionMiddleware, внизу файлу).
+
+Індекс файлів будується один раз при старті процесу (після collectstatic — перезапуск),
+тож запит до статики — пошук у dict без звернень до файлової системи, а шляхи поза
+індексом (../, нові файли) просто йдуть далі по ланцюжку. Хешовані імена з маніфесту
+(staticfiles.json) віддаються з Cache-Control: immutable на рік, решта — на хвилину.
+Якщо клієнт приймає br/gzip і поруч лежить стиснений варіант (main.assets.precompress) —
+віддаємо його. З DEBUG або без STATIC_ROOT middleware вимикається (статику роздає runserver).
+"""
+import json
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags
+
+try:
+    import brotli
+except ImportError:  # без brotli — лише gzip
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DEFAULT_MAX_AGE = 60
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]  # у порядку переваги
+MANIFEST_NAME = "staticfiles.json"
+BROTLI_QUALITY = 5      # на льоту: 5 стискає краще за gzip -6 і ще дешевий на CPU
+MIN_COMPRESS_SIZE = 200  # як у GZipMiddleware
+
+_ACCEPT = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?")
+
+
+class StaticFile:
+    __slots__ = ("path", "size", "mtime", "content_type", "variants", "immutable")
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path, self.size, self.mtime = path, stat.st_size, stat.st_mtime
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type in ("application/javascript",
+                                                                          "application/json",
+                                                                          "image/svg+xml"):
+            self.content_type += "; charset=utf-8"
+        self.immutable = immutable
+        # encoding → (шлях, розмір)
+        self.variants = {enc: (path + ext, os.stat(path + ext).st_size)
+                         for enc, ext in ENCODINGS if os.path.exists(path + ext)}
+
+    def etag(self, encoding):
+        tag = f"{int(self.mtime):x}-{self.size:x}"
+        return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+
+def _accepted(header):
+    """'gzip, br;q=0.5, deflate;q=0' → {"gzip", "br", "deflate"} без q=0."""
+    accepted = set()
+    for part in header.split(","):
+        m = _ACCEPT.match(part)
+        if not m:
+            continue
+        try:
+            weight = float(m.group(2)) if m.group(2) else 1.0
+        except ValueError:
+            weight = 0.0
+        if weight > 0:
+            accepted.add(m.group(1).lower())
+    return accepted
+
+
+def build_index(root):
+    """{відносний url-шлях: StaticFile} для всіх файлів root (без .gz/.br і маніфесту)."""
+    immutable = set()
+    manifest = os.path.join(root, MANIFEST_NAME)
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as f:
+            immutable = set(json.load(f).get("paths", {}).values())
+    skip = tuple(ext for _, ext in ENCODINGS)
+    index = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(skip) or filename == MANIFEST_NAME:
+                continue
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, root).replace(os.sep, "/")
+            index[name] = StaticFile(path, name in immutable)
+    return index
+
+
+class StaticFilesMiddleware:
+    """Ставити одразу після SecurityMiddleware: статиці не потрібні сесії, мова, CSRF."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        root, url = settings.STATIC_ROOT, settings.STATIC_URL
+        if settings.DEBUG or not root or not url or not url.startswith("/"):
+            raise MiddlewareNotUsed  # STATIC_URL на CDN — не наша справа
+        self.prefix = url
+        self.files = build_index(str(root))
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix):
+            static_file = self.files.get(request.path_info[len(self.prefix):])
+            if static_file is not None and request.method in ("GET", "HEAD"):
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        accepted = _accepted(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        encoding = next((enc for enc, _ in ENCODINGS if enc in accepted and enc in static_file.variants), None)
+        path, size = static_file.variants[encoding] if encoding else (static_file.path, static_file.size)
+        etag = static_file.etag(encoding)
+
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        elif request.method == "HEAD":
+            response = HttpResponse(content_type=static_file.content_type)
+        else:
+            response = FileResponse(open(path, "rb"), content_type=static_file.content_type)
+            response.headers.pop("Content-Disposition", None)
+        if response.status_code == 200:
+            response["Content-Length"] = str(size)
+            response["Last-Modified"] = http_date(static_file.mtime)
+        response["ETag"] = etag
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if static_file.variants:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        if static_file.immutable:
+            response["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={DEFAULT_MAX_AGE}"
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware + brotli (якщо пакет встановлено й клієнт приймає br) з урахуванням BREACH.
+
+    Сторінки з CSRF-токеном (шаблон викликав get_token → CSRF_COOKIE_NEEDS_UPDATE) стискаємо
+    лише gzip'ом Django: він додає випадкову к-сть байтів у заголовок, а сам токен маскується
+    заново на кожен запит. Brotli такого доповнення не має — ним стискаємо тільки відповіді
+    без токена (JSON API, сторінки без форм). Статику віддає StaticFilesMiddleware вище.
+    """
+
+    def process_response(self, request, response):
+        if (brotli is None or response.streaming or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+                or "br" not in _accepted(request.META.get("HTTP_ACCEPT_ENCODING", ""))):
+            return super().process_response(request, response)
+        if len(response.content) < MIN_COMPRESS_SIZE or response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        # тіло інше — сильний ETag стає слабким (як у GZipMiddleware)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
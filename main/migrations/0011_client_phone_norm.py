@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:38
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_phone_norm(apps, schema_editor):
+    # копія main.dedup.phone_key — міграція не повинна залежати від живого коду
+    Client = apps.get_model("main", "Client")
+    batch = []
+    for c in Client.objects.only("id", "phone").iterator(chunk_size=2000):
+        digits = re.sub(r"\D", "", c.phone or "")
+        c.phone_norm = digits[-9:] if len(digits) >= 7 else ""
+        if c.phone_norm:
+            batch.append(c)
+        if len(batch) >= 2000:
+            Client.objects.bulk_update(batch, ["phone_norm"])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, ["phone_norm"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0010_alter_employee_services"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="client",
+            name="phone_norm",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=16
+            ),
+        ),
+        migrations.RunPython(fill_phone_norm, migrations.RunPython.noop),
+    ]
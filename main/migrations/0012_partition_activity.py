@@ -0,0 +1,100 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:00
+
+import re
+
+from django.db import migrations
+
+# DDL заморожено тут, а не імпортовано з main.partitioning: міграція мусить робити те саме,
+# що й у день написання, хоч би як потім змінився модуль.
+TABLE = "main_activity"
+KEY = "created_at"
+LEGACY = "main_activity_legacy"
+MONTHS_AHEAD = 3
+
+
+def add_months(d, n):
+    y, m = divmod(d.month - 1 + n, 12)
+    return d.replace(year=d.year + y, month=m + 1, day=1)
+
+
+def bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def unique_columns(definition):
+    m = re.search(r"UNIQUE \(([^)]*)\)", definition)
+    return [c.strip().strip('"') for c in m.group(1).split(",")] if m else []
+
+
+def partition_activities(apps, schema_editor):
+    """
+    main_activity → партиційована по місяцях created_at (UTC): rename → CREATE ... PARTITION BY RANGE →
+    партиції на весь діапазон даних + default → копія → DROP старої → sequence, PK (id, created_at),
+    індекси й констрейнти з тими ж іменами. Стан моделей Django не змінюється (ORM бачить ту саму таблицю).
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s AND relnamespace = 'public'::regnamespace",
+                       [TABLE])
+        if cursor.fetchone()[0] == "p":
+            return
+
+        # що відтворити: індекси без констрейнтів і констрейнти (PK — свій, з ключем)
+        cursor.execute(
+            "SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = %s::regclass "
+            "AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('u', 'f', 'x')",
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        lost = [name for name, contype, definition in constraints
+                if contype == "x" or (contype == "u" and KEY not in unique_columns(definition))]
+        if lost:
+            raise ValueError(f"{TABLE}: партиціювання по {KEY} зняло б констрейнти {', '.join(lost)}")
+        cursor.execute(f"SELECT min({KEY}), COALESCE(max(id), 0) + 1, CURRENT_DATE FROM {TABLE}")
+        oldest, next_id, today = cursor.fetchone()
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({KEY})"
+        )
+        month = (oldest.date() if oldest else today).replace(day=1)
+        last = add_months(today, MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ({bound(month)}) TO ({bound(add_months(month, 1))})"
+            )
+            month = add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY}")
+        cursor.execute(f"DROP TABLE {LEGACY}")
+
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq START WITH {int(next_id)} OWNED BY {TABLE}.id")
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, {KEY})")
+
+        for name, definition in indexes:
+            cursor.execute(re.sub(r" ON (ONLY )?\S+ USING ", f" ON {TABLE} USING ", definition, count=1))
+        for name, contype, definition in constraints:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0011_client_phone_norm"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_activities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_counters(apps, schema_editor):
+    Activity = apps.get_model("main", "Activity")
+    ActivityDailyCounter = apps.get_model("main", "ActivityDailyCounter")
+    rows = (
+        Activity.objects.order_by()
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("user_id", "day")
+        .annotate(n=Count("id"))
+    )
+    ActivityDailyCounter.objects.bulk_create(
+        (
+            ActivityDailyCounter(user_id=r["user_id"], day=r["day"], count=r["n"])
+            for r in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0012_partition_activity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activity",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name="ActivityDailyCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_counters",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="activity_counter_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "day"), name="activity_counter_user_day_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
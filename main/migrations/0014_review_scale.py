@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def detect_scale(apps, schema_editor):
+    # старі оцінки без шкали: усе, що більше 10, — явно 0..100
+    PerformanceReview = apps.get_model("main", "PerformanceReview")
+    PerformanceReview.objects.filter(score__gt=10).update(scale=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0013_activity_daily_counter"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performancereview",
+            name="scale",
+            field=models.PositiveSmallIntegerField(
+                choices=[(10, "1..10"), (100, "0..100")], default=10
+            ),
+        ),
+        migrations.RunPython(detect_scale, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="performancereview",
+            index=models.Index(
+                fields=["user", "period_end"], name="review_user_period_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="performancereview",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("score__lte", models.F("scale"))),
+                name="review_score_within_scale",
+            ),
+        ),
+    ]
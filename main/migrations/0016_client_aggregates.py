@@ -0,0 +1,98 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def _scalar(qs, function, field, output_field):
+    return Subquery(
+        qs.order_by()
+        .annotate(v=Func(F(field), function=function, output_field=output_field))
+        .values("v")
+    )
+
+
+def backfill_aggregates(apps, schema_editor):
+    Client = apps.get_model("main", "Client")
+    Deal = apps.get_model("main", "Deal")
+    Booking = apps.get_model("beauty", "Booking")
+    BookingArchive = apps.get_model("beauty", "BookingArchive")
+
+    deals = Deal.objects.filter(client=OuterRef("pk"))
+    bookings = Booking.objects.exclude(status="cancelled").filter(
+        deal__client=OuterRef("pk")
+    )
+    archived = BookingArchive.objects.exclude(status="cancelled").filter(
+        deal_id__in=Deal.objects.filter(client=OuterRef(OuterRef("pk"))).values("pk")
+    )
+    money = models.DecimalField(max_digits=14, decimal_places=2)
+    last_live = _scalar(bookings, "MAX", "start_at", models.DateTimeField())
+    last_archived = _scalar(archived, "MAX", "start_at", models.DateTimeField())
+    count = models.IntegerField()
+    Client.objects.update(
+        closed_amount=Coalesce(
+            _scalar(deals.filter(status="closed"), "SUM", "amount", money),
+            Value(0),
+            output_field=money,
+        ),
+        open_deals=Coalesce(
+            _scalar(
+                deals.filter(status__in=["new", "in_progress"]), "COUNT", "pk", count
+            ),
+            Value(0),
+        ),
+        last_booking_at=Greatest(
+            Coalesce(last_live, last_archived), Coalesce(last_archived, last_live)
+        ),
+        visit_count=Coalesce(_scalar(bookings, "COUNT", "pk", count), Value(0))
+        + Coalesce(_scalar(archived, "COUNT", "pk", count), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0015_client_trigram_indexes"),
+        ("beauty", "0010_booking_active_indexes_archive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="client",
+            name="closed_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=14
+            ),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="last_booking_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="open_deals",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="visit_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                fields=["closed_amount"], name="main_client_closed__53eb5f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                fields=["last_booking_at"], name="main_client_last_bo_e64108_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0016_client_aggregates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="deal",
+            index=models.Index(
+                fields=["status", "-created_at", "-id"],
+                include=("amount",),
+                name="deal_pipeline_idx",
+            ),
+        ),
+    ]
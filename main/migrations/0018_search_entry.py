@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations, models
+
+# simple (без стемера — для чеської й української його нема) + unaccent: Nováková ~ novakova
+CREATE_CONFIG = """
+CREATE TEXT SEARCH CONFIGURATION crm_unaccent (COPY = simple);
+ALTER TEXT SEARCH CONFIGURATION crm_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+"""
+DROP_CONFIG = "DROP TEXT SEARCH CONFIGURATION IF EXISTS crm_unaccent;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0017_deal_pipeline_index"),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_CONFIG, DROP_CONFIG),
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("client", "Клієнт"),
+                            ("deal", "Угода"),
+                            ("service", "Послуга"),
+                            ("booking", "Запис"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("title", models.CharField(max_length=255)),
+                ("subtitle", models.CharField(blank=True, max_length=255)),
+                ("url", models.CharField(blank=True, max_length=200)),
+                ("body", models.TextField(blank=True)),
+                (
+                    "document",
+                    django.contrib.postgres.search.SearchVectorField(
+                        editable=False, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["document"], name="search_entry_document_gin"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"), name="search_entry_unique"
+                    )
+                ],
+            },
+        ),
+    ]
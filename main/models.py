@@ -1,8 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, post_delete
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Case, Count, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Upper
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import os
 
@@ -71,7 +76,8 @@ class Activity(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="activities")
     kind = models.CharField(max_length=20, choices=TYPE_CHOICES)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # не auto_now_add: імпорт (main.activities.ingest) приносить час дзвінка з телефонії
+    created_at = models.DateTimeField(default=timezone.now)
     duration_min = models.PositiveIntegerField(default=0)
     notes = models.TextField(blank=True)
 
@@ -82,17 +88,44 @@ class Activity(models.Model):
         return f"{self.user.username} · {self.get_kind_display()} · {self.created_at:%Y-%m-%d %H:%M}"
 
 
+class ActivityDailyCounter(models.Model):
+    """
+    Кількість активностей користувача за локальний день. Ведеться при записі
+    (сигнали нижче + main.activities.ingest), тож лічильники дашборда й топ
+    активних — це кілька рядків на користувача, а не COUNT по всій main_activity.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="activity_counters")
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="activity_counter_user_day_unique"),
+        ]
+        indexes = [models.Index(fields=["day"], name="activity_counter_day_idx")]
+
+    def __str__(self):
+        return f"{self.user_id} · {self.day} · {self.count}"
+
+
 class PerformanceReview(models.Model):
+    SCALE_CHOICES = [(10, "1..10"), (100, "0..100")]
+
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="reviews")
     period_start = models.DateField()
     period_end = models.DateField()
-    score = models.PositiveSmallIntegerField()  # 1..10 або 0..100
+    score = models.PositiveSmallIntegerField()  # у шкалі scale; порівнюємо нормалізоване (main.reviews)
+    scale = models.PositiveSmallIntegerField(choices=SCALE_CHOICES, default=10)
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-period_end"]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(score__lte=models.F("scale")), name="review_score_within_scale"),
+        ]
+        indexes = [models.Index(fields=["user", "period_end"], name="review_user_period_idx")]
 
 
 class Client(models.Model):
@@ -112,15 +145,50 @@ class Client(models.Model):
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="clients")
     deal_status = models.CharField(
         max_length=10, choices=DEAL_CHOICES, default="none")
+    # ключ для пошуку дублікатів: останні цифри телефону без форматування
+    phone_norm = models.CharField(max_length=16, blank=True, db_index=True, editable=False)
+    # денормалізовані агрегати (main.aggregates) — для сортування/фільтрів списку клієнтів
+    closed_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    open_deals = models.PositiveIntegerField(default=0, editable=False)
+    last_booking_at = models.DateTimeField(null=True, blank=True, editable=False)
+    visit_count = models.PositiveIntegerField(default=0, editable=False)
+
+    AGGREGATE_FIELDS = ("closed_amount", "open_deals", "last_booking_at", "visit_count")
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [models.Index(fields=["name"]), models.Index(
-            fields=["phone"]), models.Index(fields=["email"])]
+            fields=["phone"]), models.Index(fields=["email"]),
+            # автопідказки (beauty.autocomplete): icontains/istartswith у PostgreSQL — UPPER(...) LIKE
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="client_name_trgm"),
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="client_email_trgm"),
+            GinIndex(OpClass("phone_norm", name="gin_trgm_ops"), name="client_phone_norm_trgm"),
+            models.Index(fields=["closed_amount"]), models.Index(fields=["last_booking_at"]),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # ім'я клієнта є в пошукових документах його угод і записів (main.search)
+        obj = super().from_db(db, field_names, values)
+        obj._loaded_name = obj.__dict__.get("name")
+        return obj
+
+    def save(self, *args, **kwargs):
+        from .dedup import phone_key
+        self.phone_norm = phone_key(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields and "phone_norm" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "phone_norm"]
+        elif update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            # агрегати веде main.aggregates; повне збереження форми не має затирати їх
+            # значеннями, прочитаними до паралельної зміни угоди
+            kwargs["update_fields"] = [f.name for f in self._meta.concrete_fields
+                                       if not f.primary_key and f.name not in self.AGGREGATE_FIELDS]
+        super().save(*args, **kwargs)
+
 
 class Deal(models.Model):
     STATUS_CHOICES = [
@@ -145,35 +213,221 @@ class Deal(models.Model):
         verbose_name = "Deal_Order"
         verbose_name_plural = "Deal_Orders"   # або _("Замовлення")
         ordering = ["-created_at"]
+        indexes = [
+            # воронка (main.pipeline): GROUP BY status і keyset-сторінки колонок — index-only
+            models.Index(fields=["status", "-created_at", "-id"], include=["amount"], name="deal_pipeline_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} · {self.client.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # угоду можна перенести на іншого клієнта (DealForm) — статус і агрегати перерахуємо обом
+        obj = super().from_db(db, field_names, values)
+        obj._loaded_client_id = obj.__dict__.get("client_id")
+        return obj
+
+
+class SearchEntry(models.Model):
+    """
+    Рядок глобального пошуку (main.search): денормалізований текст об'єкта + tsvector.
+    Ведеться сигналами; повний перерахунок — rebuild_search_index.
+    """
+    KIND_CHOICES = [
+        ("client", _("Клієнт")),
+        ("deal", _("Угода")),
+        ("service", _("Послуга")),
+        ("booking", _("Запис")),
+    ]
 
-def recalc_client_deal_status(client: Client):
-    # якщо є хоча б одна активна угода → "active"
-    if client.deals.filter(status__in=["new", "in_progress"]).exists():
-        new_status = "active"
-    # інакше якщо є хоча б одна закрита → "done"
-    elif client.deals.filter(status="closed").exists():
-        new_status = "done"
-    else:
-        new_status = "none"
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    url = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+    document = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    if client.deal_status != new_status:
-        client.deal_status = new_status
-        client.save(update_fields=["deal_status"])
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["kind", "object_id"], name="search_entry_unique")]
+        indexes = [GinIndex(fields=["document"], name="search_entry_document_gin")]
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id} · {self.title}"
+
+
+# Статус угод клієнта: є new/in_progress → "active", інакше є closed → "done", інакше "none".
+DEAL_OPEN_STATUSES = ("new", "in_progress")
+DEAL_STATUS_FIELDS = {"client", "status"}   # лише від них залежить Client.deal_status
+
+
+def _deal_status_expr():
+    """
+    Корельований підзапит з умовною агрегацією: один прохід по угодах клієнта
+    (COUNT(*) FILTER (WHERE ...) у PostgreSQL) замість окремих EXISTS на кожен статус.
+    """
+    per_client = (Deal.objects
+                  .filter(client=OuterRef("pk"))
+                  .order_by()
+                  .values("client")
+                  .annotate(open=Count("pk", filter=Q(status__in=DEAL_OPEN_STATUSES)),
+                            closed=Count("pk", filter=Q(status="closed")))
+                  .annotate(new_status=Case(When(open__gt=0, then=Value("active")),
+                                            When(closed__gt=0, then=Value("done")),
+                                            default=Value("none")))
+                  .values("new_status"))
+    return Coalesce(Subquery(per_client), Value("none"), output_field=models.CharField())
+
+
+def _sync_deal_status(clients):
+    """Один UPDATE; рядки, де статус уже правильний, не переписуються. Повертає к-сть змінених."""
+    from .versioning import bump_version
+    expr = _deal_status_expr()
+    changed = clients.exclude(deal_status=expr).update(deal_status=expr)
+    if changed:
+        bump_version("clients")  # update() сигналів Client не шле
+    return changed
+
+
+def recalc_client_deal_status(client_ids):
+    """client_ids — id клієнта або ітерабельне id. Без сигналів Client (поле службове)."""
+    if isinstance(client_ids, int):
+        client_ids = [client_ids]
+    client_ids = [pk for pk in client_ids if pk is not None]
+    if not client_ids:
+        return 0
+    return _sync_deal_status(Client.objects.filter(pk__in=client_ids))
+
+
+def resync_all_deal_statuses(include_paused=False):
+    """Усі клієнти одним UPDATE; "pause" (ставиться вручну) за замовчуванням не чіпаємо."""
+    clients = Client.objects.all()
+    if not include_paused:
+        clients = clients.exclude(deal_status="pause")
+    return _sync_deal_status(clients)
 
 
 @receiver(post_save, sender=Deal)
-def on_deal_save(sender, instance, **kwargs):
-    recalc_client_deal_status(instance.client)
+def on_deal_save(sender, instance, update_fields=None, **kwargs):
+    from .aggregates import DEAL_FIELDS, touch
+    fields = None if update_fields is None else set(update_fields)
+    client_ids = {instance.client_id, getattr(instance, "_loaded_client_id", None)} - {None}
+    # напр. DealLine.recalc_total_for зберігає лише amount — статус клієнта від цього не змінюється
+    if fields is None or DEAL_STATUS_FIELDS & fields:
+        recalc_client_deal_status(client_ids)
+    if fields is None or DEAL_FIELDS & fields:
+        touch(client_ids=client_ids)
+    instance._loaded_client_id = instance.client_id
 
 
 @receiver(post_delete, sender=Deal)
-def on_deal_delete(sender, instance, **kwargs):
+def on_deal_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Client):  # каскад від видалення клієнта — перераховувати нікому
+        return
     # після видалення теж перерахувати
-    recalc_client_deal_status(instance.client)
+    recalc_client_deal_status(instance.client_id)
+    from .aggregates import touch
+    touch(client_ids=[instance.client_id])
+
+
+# Лічильники активностей. bulk_create сигналів не шле — імпорт оновлює їх сам.
+
+@receiver(pre_save, sender=Activity)
+def on_activity_pre_save(sender, instance, **kwargs):
+    # редагування (адмінка) може перенести активність на інший день / іншому користувачу
+    instance._counter_key = None
+    if instance.pk:
+        old = Activity.objects.filter(pk=instance.pk).values_list("user_id", "created_at").first()
+        if old:
+            from .activities import counter_key
+            instance._counter_key = counter_key(*old)
+
+
+@receiver(post_save, sender=Activity)
+def on_activity_save(sender, instance, created, **kwargs):
+    from .activities import add_counts, counter_key
+    new_key = counter_key(instance.user_id, instance.created_at)
+    old_key = None if created else getattr(instance, "_counter_key", None)
+    if old_key != new_key:
+        add_counts({new_key: 1, **({old_key: -1} if old_key else {})})
+
+
+@receiver(post_delete, sender=Activity)
+def on_activity_delete(sender, instance, **kwargs):
+    from .activities import add_counts, counter_key
+    add_counts({counter_key(instance.user_id, instance.created_at): -1})
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+def on_activity_change(sender, **kwargs):
+    # ETag дашборду (main.conditional) тримає версію "activities"; імпорт бампає сам
+    from .versioning import bump_version
+    bump_version("activities")
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def on_client_change(sender, **kwargs):
+    # кешовані підказки клієнтів (beauty.autocomplete) і фрагменти шаблонів (список клієнтів,
+    # KPI дашборду) тримають версію "clients" у ключі
+    from .versioning import bump_version
+    bump_version("clients")
+
+
+@receiver(post_save, sender=Deal)
+@receiver(post_delete, sender=Deal)
+def on_deal_change(sender, **kwargs):
+    # KPI і графік дашборду ({% cache %} з версією "deals"); пакетні шляхи бампають самі
+    from .versioning import bump_version
+    bump_version("deals")
+
+
+# ---- глобальний пошук (main.search) ----
+
+CLIENT_SEARCH_FIELDS = {"name", "phone", "email"}
+DEAL_SEARCH_FIELDS = {"title", "notes", "status", "client"}
+
+
+@receiver(post_save, sender=Client)
+def on_client_search(sender, instance, created, update_fields=None, **kwargs):
+    from .search import client_dependents, touch
+    if update_fields is None or CLIENT_SEARCH_FIELDS & set(update_fields):
+        touch("client", [instance.pk])
+    loaded = getattr(instance, "_loaded_name", None)
+    if not created and loaded is not None and loaded != instance.name:
+        client_dependents([instance.pk])
+    instance._loaded_name = instance.name
+
+
+@receiver(post_save, sender=Deal)
+def on_deal_search(sender, instance, update_fields=None, **kwargs):
+    from .search import touch
+    fields = None if update_fields is None else set(update_fields)
+    if fields is None or DEAL_SEARCH_FIELDS & fields:
+        touch("deal", [instance.pk])
+    if fields is None or {"title", "client"} & fields:  # назва угоди й клієнт — у документі запису
+        from beauty.models import Booking
+        touch("booking", Booking.objects.filter(deal_id=instance.pk).values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Deal)
+def on_search_source_delete(sender, instance, **kwargs):
+    from .search import touch
+    touch(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_save, sender=PerformanceReview)
+@receiver(post_delete, sender=PerformanceReview)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def on_review_data_change(sender, **kwargs):
+    # аналітика оцінок групує по Employee.department — зміна профілю теж її інвалідовує
+    from .reviews import invalidate_reviews
+    invalidate_reviews()
 
 
 def deal_upload_path(instance, filename):
@@ -0,0 +1,128 @@
+"""
+Нативне RANGE-партиціювання PostgreSQL по місяцях для main_activity (по created_at):
+журнал лише росте, а читається вікнами за дату.
+
+Партиції звуться main_activity_pYYYYMM, межі — місяці в UTC; плюс main_activity_default
+на все, що не влізло. Запити з діапазоном по самому created_at (не по ::date) відсікають
+зайві партиції (partition pruning), а старі місяці manage_partitions відʼєднує чи видаляє
+цілими таблицями замість DELETE.
+
+Обмеження PostgreSQL: PK і UNIQUE мусять містити ключ партиціювання (PK стає (id, created_at)),
+а EXCLUDE на батьківській таблиці неможливі взагалі. Через це beauty_booking НЕ партиціюється:
+OneToOne на угоду, унікальність (серія, індекс) і заборона перетину записів мають лишатися
+на рівні БД; її розмір тримають часткові індекси по активних записах і archive_bookings.
+
+Сам перехід на партиційовану таблицю — у міграції main/0012 (DDL заморожено там же);
+цей модуль — обслуговування партицій для manage_partitions, без імпорту моделей.
+"""
+import re
+from collections import namedtuple
+from datetime import date
+
+PartitionSpec = namedtuple("PartitionSpec", "table key")
+
+ACTIVITY = PartitionSpec(table="main_activity", key="created_at")
+
+SPECS = {spec.table: spec for spec in (ACTIVITY,)}
+
+_PARTITION_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+# ---- місяці ----
+
+def month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def add_months(d, n):
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(spec, month):
+    return f"{spec.table}_p{month:%Y%m}"
+
+
+def partition_month(spec, name):
+    """YYYYMM з імені партиції → date (перше число); None для default і чужих таблиць."""
+    if not name.startswith(spec.table + "_p"):
+        return None
+    m = _PARTITION_RE.search(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def _bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+# ---- інтроспекція ----
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s AND relnamespace = 'public'::regnamespace",
+                   [table])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions(cursor, spec):
+    """Імена партицій таблиці (включно з default)."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+        [spec.table],
+    )
+    return [r[0] for r in cursor.fetchall()]
+
+
+# ---- створення / відʼєднання партицій ----
+
+def create_default_partition(cursor, spec):
+    cursor.execute(f"CREATE TABLE {spec.table}_default PARTITION OF {spec.table} DEFAULT")
+
+
+def create_month_partition(cursor, spec, month, existing=None):
+    """
+    Створює партицію на місяць, якщо її ще нема. Рядки цього місяця, що вже лежать
+    у default-партиції, переносимо в нову (інакше PostgreSQL відмовить у створенні).
+    Повертає True, якщо партицію створено.
+    """
+    name = partition_name(spec, month)
+    existing = set(list_partitions(cursor, spec)) if existing is None else existing
+    if name in existing:
+        return False
+    lo, hi = _bound(month), _bound(add_months(month, 1))
+    default = f"{spec.table}_default"
+    has_default = default in existing
+    if has_default:
+        cursor.execute(f"CREATE TEMP TABLE _moved_rows (LIKE {spec.table})")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE {spec.key} >= {lo} AND {spec.key} < {hi} RETURNING *) "
+            f"INSERT INTO _moved_rows SELECT * FROM moved"
+        )
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF {spec.table} FOR VALUES FROM ({lo}) TO ({hi})")
+    if has_default:
+        cursor.execute(f"INSERT INTO {spec.table} SELECT * FROM _moved_rows")
+        cursor.execute("DROP TABLE _moved_rows")
+    existing.add(name)
+    return True
+
+
+def ensure_partitions(cursor, spec, first_month, last_month):
+    """Партиції на кожен місяць [first_month, last_month]; повертає імена створених."""
+    existing = set(list_partitions(cursor, spec))
+    created, month = [], month_start(first_month)
+    while month <= last_month:
+        if create_month_partition(cursor, spec, month, existing):
+            created.append(partition_name(spec, month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partition(cursor, spec, partition, mode="detach"):
+    """
+    detach — відʼєднати: таблиця лишається окремо (холодний архів, можна вивантажити й видалити);
+    drop   — просто видалити партицію разом з даними.
+    """
+    cursor.execute(f"ALTER TABLE {spec.table} DETACH PARTITION {partition}")
+    if mode == "drop":
+        cursor.execute(f"DROP TABLE {partition}")
@@ -0,0 +1,133 @@
+"""
+Воронка угод (канбан по Deal.status): підсумки стадій і картки з keyset-пагінацією.
+
+Підсумки — один GROUP BY status (COUNT + SUM(amount)); з покриваючим індексом
+deal_pipeline_idx (status, -created_at, -id) INCLUDE (amount) це index-only scan.
+Картки — по колонці: WHERE status = ... AND (created_at, id) < курсор ORDER BY created_at DESC,
+id DESC LIMIT n — той самий індекс, без OFFSET, тож сторінка 1000 коштує як перша.
+"""
+import base64
+import json
+
+from django.db import connections, transaction
+from django.db.models import BooleanField, Count, Sum
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+
+from . import i18n
+from .models import Deal
+
+STAGES = [status for status, _ in Deal.STATUS_CHOICES]
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+CARD_FIELDS = ("id", "title", "amount", "status", "client_id", "client__name", "owner__username",
+               "created_at", "updated_at")
+
+
+class StaleStatus(Exception):
+    """Угоду вже перемістив хтось інший (статус не той, що бачив клієнт)."""
+
+    def __init__(self, current):
+        super().__init__(current)
+        self.current = current
+
+
+def base_queryset(owner=None):
+    qs = Deal.objects.order_by()
+    if owner is not None:
+        qs = qs.filter(owner=owner)
+    return qs
+
+
+def encode_cursor(created_at, pk):
+    raw = json.dumps([created_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Рядок із encode_cursor → (created_at, pk); ValueError на сміття."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created, pk = json.loads(raw)
+        created_at = parse_datetime(created)
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+    if created_at is None or not isinstance(pk, int):
+        raise ValueError("invalid cursor")
+    return created_at, pk
+
+
+def stage_totals(qs):
+    """{status: {"count", "total"}} для всіх стадій (порожні — нулі) одним GROUP BY."""
+    totals = {s: {"count": 0, "total": 0} for s in STAGES}
+    for row in qs.values("status").annotate(count=Count("pk"), total=Sum("amount")):
+        totals[row["status"]] = {"count": row["count"], "total": row["total"] or 0}
+    return totals
+
+
+def _card(row):
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "amount": str(row["amount"]),
+        "status": row["status"],
+        "client": {"id": row["client_id"], "name": row["client__name"]},
+        "owner": row["owner__username"],
+        "created_at": row["created_at"].isoformat(),
+        "updated_at": row["updated_at"].isoformat(),
+    }
+
+
+def _before(qs, created_at, pk):
+    """
+    (created_at, id) < (курсор) рядковим порівнянням: PostgreSQL кладе його межею скану
+    deal_pipeline_idx, а OR-форму (created_at < x OR created_at = x AND id < y) — лише фільтром.
+    Колонки з іменем таблиці: values() тягне JOIN на клієнта, у якого теж є created_at.
+    """
+    ops = connections[qs.db].ops
+    table = ops.quote_name(Deal._meta.db_table)
+    sql = f"({table}.{ops.quote_name('created_at')}, {table}.{ops.quote_name('id')}) < (%s, %s)"
+    params = [ops.adapt_datetimefield_value(created_at), pk]
+    return qs.filter(RawSQL(sql, params, output_field=BooleanField()))
+
+
+def column(qs, status, after=None, limit=DEFAULT_LIMIT):
+    """(картки, next_cursor | None) — наступні limit угод стадії після курсора."""
+    qs = qs.filter(status=status)
+    if after:
+        qs = _before(qs, *decode_cursor(after))
+    rows = list(qs.order_by("-created_at", "-pk").values(*CARD_FIELDS)[:limit + 1])
+    cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return [_card(r) for r in rows], cursor
+
+
+def board(qs, limit=DEFAULT_LIMIT):
+    """Уся дошка: підсумки (1 запит) + перша сторінка кожної колонки (по запиту на стадію)."""
+    totals = stage_totals(qs)
+    labels = i18n.choice_labels(Deal, "status")
+    stages = []
+    for status in STAGES:
+        deals, cursor = column(qs, status, limit=limit)
+        stages.append({"status": status, "label": labels[status], "count": totals[status]["count"],
+                       "total": str(totals[status]["total"]), "deals": deals, "next": cursor})
+    return stages
+
+
+def move(pk, status, expected=None):
+    """
+    Переводить угоду в status. expected — статус, який бачив клієнт на дошці: якщо угоду
+    вже перетягнули інші, StaleStatus замість тихого перезапису. Зберігаємо через save(),
+    щоб сигнали перерахували статус і агрегати клієнта. Повертає (deal, попередній статус).
+    """
+    with transaction.atomic():
+        deal = Deal.objects.select_for_update().get(pk=pk)
+        previous = deal.status
+        if expected and expected != previous:
+            raise StaleStatus(previous)
+        if status != previous:
+            deal.status = status
+            deal.save(update_fields=["status", "updated_at"])
+    return deal, previous
@@ -0,0 +1,111 @@
+"""
+Аналітика оцінок роботи (PerformanceReview) — один SQL-запит з віконними функціями.
+
+Оцінки бувають у шкалах 1..10 і 0..100 (поле scale), тож усе рахуємо в нормалізованих
+балах 0..100. Для кожного співробітника — остання оцінка, ковзне середнє за останні
+window оцінок, тренд (зміна проти попередньої), середнє за весь час і перцентиль
+ковзного середнього серед колег свого відділу.
+
+Результат кешується з версією "reviews" у ключі; сигнали в main.models бампають її
+при зміні оцінок чи профілів співробітників.
+"""
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+
+from main.versioning import bump_version, get_version
+
+from .models import Employee, PerformanceReview
+
+VERSION_NAME = "reviews"
+DEFAULT_WINDOW = 4          # оцінок у ковзному середньому
+MAX_WINDOW = 24
+CACHE_TTL = 24 * 3600       # інвалідація — версією; TTL лише прибирає сміття
+
+_SQL = """
+WITH r AS (
+    SELECT pr.user_id, u.username, COALESCE(e.department, '') AS department,
+           pr.period_end, pr.score * 100.0 / pr.scale AS norm
+    FROM {review} pr
+    JOIN {user} u ON u.id = pr.user_id
+    LEFT JOIN {employee} e ON e.user_id = pr.user_id
+    WHERE pr.period_end >= %s
+), w AS (
+    SELECT r.*,
+           AVG(norm) OVER (PARTITION BY user_id ORDER BY period_end
+                           ROWS BETWEEN {preceding} PRECEDING AND CURRENT ROW) AS rolling,
+           LAG(norm) OVER (PARTITION BY user_id ORDER BY period_end) AS prev_norm,
+           AVG(norm) OVER (PARTITION BY user_id) AS avg_all,
+           COUNT(*) OVER (PARTITION BY user_id) AS reviews,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY period_end DESC) AS rn
+    FROM r
+)
+SELECT user_id, username, department, period_end, norm, rolling, norm - prev_norm, avg_all, reviews,
+       PERCENT_RANK() OVER (PARTITION BY department ORDER BY rolling) AS dept_percentile,
+       AVG(rolling) OVER (PARTITION BY department) AS dept_avg,
+       COUNT(*) OVER (PARTITION BY department) AS dept_size
+FROM w
+WHERE rn = 1
+ORDER BY department, rolling DESC, username
+"""
+
+FIELDS = ("user_id", "username", "department", "last_period_end", "last_score", "rolling_avg", "trend",
+          "avg_score", "count", "dept_percentile", "dept_avg", "dept_size")
+
+
+def invalidate_reviews():
+    bump_version(VERSION_NAME)
+
+
+def _round(value, digits=1):
+    return None if value is None else round(float(value), digits)
+
+
+def _query(since, window):
+    sql = _SQL.format(review=PerformanceReview._meta.db_table, user=User._meta.db_table,
+                      employee=Employee._meta.db_table, preceding=int(window) - 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [connection.ops.adapt_datefield_value(since)])
+        rows = cursor.fetchall()
+    out = []
+    for row in rows:
+        item = dict(zip(FIELDS, row))
+        for key in ("last_score", "rolling_avg", "trend", "avg_score", "dept_avg"):
+            item[key] = _round(item[key])
+        item["dept_percentile"] = _round(100 * item["dept_percentile"], 0)
+        if isinstance(item["last_period_end"], str):  # SQLite віддає дати рядком
+            item["last_period_end"] = date.fromisoformat(item["last_period_end"])
+        out.append(item)
+    return out
+
+
+def employee_stats(since=None, window=DEFAULT_WINDOW):
+    """
+    [{user_id, username, department, last_period_end, last_score, rolling_avg, trend, avg_score,
+      count, dept_percentile, dept_avg, dept_size}, ...] — по одному рядку на співробітника з оцінками,
+    впорядковано за відділом і ковзним середнім. since — брати лише оцінки з period_end ≥ since.
+    """
+    since = since or date.min
+    window = max(1, min(MAX_WINDOW, int(window)))
+    key = f"crm:reviews:{get_version(VERSION_NAME)}:{since.isoformat()}:{window}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = _query(since, window)
+        cache.set(key, stats, CACHE_TTL)
+    return stats
+
+
+def department_summary(stats):
+    """Зведення по відділах з employee_stats(): розмір, середнє, найкращий, скільки з падінням."""
+    out = {}
+    for s in stats:
+        d = out.setdefault(s["department"], {"department": s["department"], "employees": 0,
+                                             "avg": s["dept_avg"], "best": None, "declining": 0})
+        d["employees"] += 1
+        if d["best"] is None:   # рядки вже відсортовані за rolling_avg DESC у межах відділу
+            d["best"] = s["username"]
+        if s["trend"] is not None and s["trend"] < 0:
+            d["declining"] += 1
+    return list(out.values())
@@ -0,0 +1,182 @@
+"""
+Глобальний пошук по клієнтах, угодах, послугах і записах — PostgreSQL full-text.
+
+Кожен об'єкт має рядок SearchEntry: title (вага A) + body (вага B) → document (tsvector)
+з конфігурацією crm_unaccent (simple + unaccent, міграція main 0018): "Nováková" знаходиться
+за "novakova", "Ґонта" — за "гонта". Стемера для чеської/української в PostgreSQL нема, тож
+слова не змінюємо, а запит шукає префікси ("novak" → "Nováková").
+
+Сигнали (main.models, beauty.models) і пакетні шляхи викликають touch(kind, ids):
+upsert рядків одним INSERT ... ON CONFLICT + один UPDATE document; об'єктів, яких уже нема,
+рядки видаляються. Пошук — один запит по GIN-індексу з ts_rank.
+"""
+import re
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from . import i18n
+from .models import Client, Deal, SearchEntry
+
+CONFIG = "crm_unaccent"
+KINDS = [kind for kind, _ in SearchEntry.KIND_CHOICES]
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+MAX_TERMS = 8
+BATCH_SIZE = 1000
+
+_pending = threading.local()
+
+
+def _join(*parts):
+    return " ".join(str(p) for p in parts if p)
+
+
+# ---- документи: id → SearchEntry (без збереження), один запит на пакет ----
+
+def _clients(ids):
+    for c in Client.objects.filter(pk__in=ids).values("pk", "name", "phone", "phone_norm", "email"):
+        yield SearchEntry(kind="client", object_id=c["pk"], title=c["name"],
+                          subtitle=c["phone"] or c["email"],
+                          url=reverse("client_detail", args=[c["pk"]]),
+                          body=_join(c["phone"], c["phone_norm"], c["email"]))
+
+
+def _deals(ids):
+    # індекс спільний для всіх: мова сайту, а не того, чий запит зачепив touch()
+    labels = i18n.choice_labels(Deal, "status", language=settings.LANGUAGE_CODE)
+    for d in Deal.objects.filter(pk__in=ids).values("pk", "title", "notes", "status", "client__name"):
+        yield SearchEntry(kind="deal", object_id=d["pk"], title=d["title"],
+                          subtitle=_join(d["client__name"], "·", labels.get(d["status"], d["status"])),
+                          url=reverse("deal_detail", args=[d["pk"]]),
+                          body=_join(d["client__name"], d["notes"]))
+
+
+def _services(ids):
+    from beauty.models import Service
+    groups = i18n.choice_labels(Service, "group", language=settings.LANGUAGE_CODE)
+    for s in Service.objects.filter(pk__in=ids).values("pk", "name", "code", "group"):
+        yield SearchEntry(kind="service", object_id=s["pk"], title=s["name"],
+                          subtitle=_join(s["code"], groups.get(s["group"], "")),
+                          url=reverse("admin:beauty_service_change", args=[s["pk"]]),
+                          body=_join(s["code"], groups.get(s["group"], "")))
+
+
+def _bookings(ids):
+    from beauty.models import Booking
+    rows = Booking.objects.filter(pk__in=ids).values("pk", "note", "start_at", "status", "deal_id",
+                                                     "deal__title", "deal__client__name")
+    for b in rows:
+        start = timezone.localtime(b["start_at"])
+        yield SearchEntry(kind="booking", object_id=b["pk"],
+                          title=_join(b["deal__title"], f"{start:%d.%m.%Y %H:%M}"),
+                          subtitle=b["deal__client__name"] or "",
+                          url=reverse("deal_detail", args=[b["deal_id"]]),
+                          # дата окремими словами: парсер PostgreSQL бере "13.10.2026" одним токеном,
+                          # а запит "13.10" / "2026-10-13" ділиться на префікси 13, 10, 2026
+                          body=_join(b["deal__client__name"], b["note"], f"{start:%d %m %Y}"))
+
+
+BUILDERS = {"client": _clients, "deal": _deals, "service": _services, "booking": _bookings}
+
+
+# ---- індексація ----
+
+def refresh(kind, ids):
+    """Перебудовує рядки kind для ids; рядки зниклих об'єктів видаляє."""
+    ids = {int(pk) for pk in ids if pk is not None}
+    if not ids:
+        return
+    entries = list(BUILDERS[kind](ids))
+    if entries:
+        SearchEntry.objects.bulk_create(
+            entries, batch_size=BATCH_SIZE, update_conflicts=True, unique_fields=["kind", "object_id"],
+            update_fields=["title", "subtitle", "url", "body", "updated_at"],
+        )
+        found = [e.object_id for e in entries]
+        (SearchEntry.objects
+         .filter(kind=kind, object_id__in=found)
+         .update(document=SearchVector("title", weight="A", config=CONFIG)
+                 + SearchVector("body", weight="B", config=CONFIG)))
+    gone = ids - {e.object_id for e in entries}
+    if gone:
+        SearchEntry.objects.filter(kind=kind, object_id__in=gone).delete()
+
+
+def touch(kind, ids):
+    """Точка входу для сигналів: одразу refresh(), а всередині deferred() — лише запам'ятати."""
+    pending = getattr(_pending, "ids", None)
+    if pending is None:
+        refresh(kind, ids)
+    else:
+        pending.setdefault(kind, set()).update(ids)
+
+
+@contextmanager
+def deferred():
+    """Пакетні операції з сигналом на кожен рядок: один refresh на kind на виході з блоку."""
+    if getattr(_pending, "ids", None) is not None:
+        yield
+        return
+    _pending.ids = {}
+    try:
+        yield
+        pending = _pending.ids
+    finally:
+        _pending.ids = None
+    for kind, ids in pending.items():
+        refresh(kind, ids)
+
+
+def client_dependents(client_ids):
+    """Угоди й записи, в чиїх документах є ім'я клієнта (перейменування клієнта)."""
+    from beauty.models import Booking
+    deal_ids = list(Deal.objects.filter(client_id__in=client_ids).values_list("pk", flat=True))
+    touch("deal", deal_ids)
+    touch("booking", Booking.objects.filter(deal_id__in=deal_ids).values_list("pk", flat=True))
+
+
+def rebuild(kinds=None, write=None):
+    """Повна переіндексація пакетами по BATCH_SIZE; рядки видалених об'єктів прибирає."""
+    from beauty.models import Booking, Service
+    sources = {"client": Client, "deal": Deal, "service": Service, "booking": Booking}
+    for kind in kinds or KINDS:
+        ids = list(sources[kind].objects.order_by("pk").values_list("pk", flat=True))
+        for i in range(0, len(ids), BATCH_SIZE):
+            refresh(kind, ids[i:i + BATCH_SIZE])
+        SearchEntry.objects.filter(kind=kind).exclude(object_id__in=sources[kind].objects.values("pk")).delete()
+        if write:
+            write(f"{kind}: {len(ids)}")
+
+
+# ---- пошук ----
+
+def build_query(q):
+    """'Novák фарбув' → 'novák:* & фарбув:*' (raw tsquery з префіксами) або None."""
+    terms = re.findall(r"[^\W_]+", q.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return SearchQuery(" & ".join(f"{t}:*" for t in terms), config=CONFIG, search_type="raw")
+
+
+def search(q, kinds=None, limit=DEFAULT_LIMIT):
+    """[{kind, id, title, subtitle, url, rank}] — усі типи разом, за релевантністю, одним запитом."""
+    query = build_query(q)
+    if query is None:
+        return []
+    qs = SearchEntry.objects.filter(document=query)
+    if kinds:
+        qs = qs.filter(kind__in=kinds)
+    rows = (qs.annotate(rank=SearchRank(F("document"), query))
+            .order_by("-rank", "-updated_at")
+            .values("kind", "object_id", "title", "subtitle", "url", "rank")[:limit])
+    return [
+        {"kind": r["kind"], "id": r["object_id"], "title": r["title"], "subtitle": r["subtitle"],
+         "url": r["url"], "rank": round(float(r["rank"]), 4)}
+        for r in rows
+    ]
@@ -0,0 +1,84 @@
+"""
+Знімки дорогої статистики (адмін-панель) у спільному кеші з stale-while-revalidate.
+Аналітика оцінок кешується окремо, з версією (main.reviews).
+
+Знімок — {"data": ..., "computed_at": datetime}. Поки він свіжий (fresh_for) — віддаємо як є;
+застарілий — теж віддаємо, але запускаємо перерахунок у фоновому потоці (один на всі
+процеси: замок через cache.add); знімка нема взагалі — рахуємо синхронно.
+Примусово: Snapshot.refresh() (кнопка в адмін-панелі, команда refresh_snapshots для cron).
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from . import activities
+from .models import Employee
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "crm:snapshot:"
+LOCK_TTL = 300             # секунд; якщо потік помер, замок відпаде сам
+KEEP_FOR = 7 * 24 * 3600   # скільки кеш тримає знімок (застарілий теж корисний)
+
+
+class Snapshot:
+    def __init__(self, name, build, fresh_for):
+        self.name = name
+        self.build = build
+        self.fresh_for = timedelta(seconds=fresh_for)
+        self.key = KEY_PREFIX + name
+        self.lock_key = self.key + ":lock"
+
+    def refresh(self):
+        """Синхронний перерахунок; повертає новий знімок."""
+        snap = {"data": self.build(), "computed_at": timezone.now()}
+        cache.set(self.key, snap, KEEP_FOR)
+        return snap
+
+    def _refresh_in_background(self):
+        if not cache.add(self.lock_key, 1, LOCK_TTL):
+            return  # уже рахує інший потік/процес
+
+        def run():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("snapshot %s refresh failed", self.name)
+            finally:
+                cache.delete(self.lock_key)
+                connections.close_all()  # з'єднання цього потоку
+
+        threading.Thread(target=run, name=f"snapshot-{self.name}", daemon=True).start()
+
+    def get(self):
+        """(data, computed_at, stale). stale=True — віддано застаріле, оновлення вже йде у фоні."""
+        snap = cache.get(self.key)
+        if snap is None:
+            snap = self.refresh()
+        stale = timezone.now() - snap["computed_at"] > self.fresh_for
+        if stale:
+            self._refresh_in_background()
+        return snap["data"], snap["computed_at"], stale
+
+
+# ---- адмін-панель ----
+
+def build_admin_stats():
+    return {
+        "total_users": User.objects.count(),
+        "staff_count": User.objects.filter(is_staff=True).count(),
+        "active_employees": Employee.objects.filter(is_active=True).count(),
+        "activities_last_week": activities.total_since(days=7),
+        # Топ активних співробітників за 30 днів (денні лічильники)
+        "top_active": activities.top_active(days=30, limit=5),
+    }
+
+
+ADMIN_STATS = Snapshot("admin_stats", build_admin_stats, fresh_for=5 * 60)
+
+SNAPSHOTS = {s.name: s for s in (ADMIN_STATS,)}
@@ -0,0 +1,43 @@
+"""
+Сховище статики для collectstatic: бандли CSS (main.assets) → хеші в іменах
+(ManifestStaticFilesStorage) → стиснені .gz/.br варіанти хешованих файлів.
+"""
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from . import assets
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # файл поза маніфестом (новий файл до деплою) — Django хешує його з STATIC_ROOT на льоту
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # нема й у STATIC_ROOT (тести з DEBUG=False без collectstatic) — нехешоване ім'я,
+        # а не ValueError і 500 на всю сторінку через один {% static %}
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            # вихідні файли collectstatic уже скопіював у STATIC_ROOT — читаємо звідти
+            for name in assets.BUNDLES:
+                path = assets.bundle_path(name)
+                content = assets.build_bundle(name, self._read)
+                if self.exists(path):
+                    self.delete(path)
+                self._save(path, ContentFile(content.encode()))
+                paths[path] = (self, path)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        if not dry_run:
+            # лише хешовані імена: їх віддаємо з immutable, і саме вони в {% static %}
+            for hashed in set(self.hashed_files.values()):
+                assets.precompress(self.path(hashed))
+
+    def _read(self, path):
+        with self.open(path) as f:
+            return f.read().decode()
@@ -0,0 +1,18 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from main.assets import BUNDLES, bundle_path
+
+register = template.Library()
+
+
+@register.simple_tag
+def css_bundle(name):
+    """{% css_bundle "clients" %} → один <link> на хешований бандл або (розробка) окремі файли."""
+    if name not in BUNDLES:
+        raise template.TemplateSyntaxError(f"css_bundle: невідомий бандл {name!r}")
+    if getattr(settings, "CSS_BUNDLES", not settings.DEBUG):
+        return format_html('<link rel="stylesheet" href="{}">', static(bundle_path(name)))
+    return format_html_join("\n", '<link rel="stylesheet" href="{}">', ((static(p),) for p in BUNDLES[name]))
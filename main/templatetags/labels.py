@@ -0,0 +1,11 @@
+from django import template
+
+from main import i18n
+
+register = template.Library()
+
+
+@register.filter
+def choice_label(obj, field_name):
+    """{{ a|choice_label:"kind" }} — як a.get_kind_display, але з кешу підписів main.i18n."""
+    return i18n.display(obj, field_name)
@@ -1,3 +1,426 @@
-from django.test import TestCase
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone, translation
+
+from beauty.models import Booking, BookingSeries, Service, WorkSchedule
+from main import activities, aggregates, dedup, i18n, partitioning, pipeline, reviews, search
+from main.conditional import versions_etag
+from main.middleware import CompressionMiddleware
+from main.models import (Activity, ActivityDailyCounter, Client, Deal, Employee, PerformanceReview, SearchEntry,
+                         recalc_client_deal_status)
+from main.snapshots import Snapshot
+from main.storage import BundledManifestStaticFilesStorage
+from main.versioning import LOCAL_TTL, get_version
+
+
+class VersionBumpOnCommitTests(TestCase):
+    """Сигнали бампають версії лише після коміту: відкат не інвалідовує кеші інших воркерів."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("anna")
+
+    def assert_bumped_on_commit(self, name, write):
+        before = get_version(name)
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+            self.assertEqual(get_version(name), before)
+        self.assertNotEqual(get_version(name), before)
+
+    def test_review_change(self):
+        self.assert_bumped_on_commit("reviews", lambda: PerformanceReview.objects.create(
+            user=self.user, period_start=date(2026, 1, 1), period_end=date(2026, 3, 31), score=8))
+
+    def test_employee_change(self):
+        # аналітика групує по Employee.department
+        self.assert_bumped_on_commit("reviews", lambda: Employee.objects.create(user=self.user, department="Nails"))
+
+    def test_client_change(self):
+        # підказки клієнтів (beauty.autocomplete) і фрагменти списку клієнтів
+        self.assert_bumped_on_commit("clients", lambda: Client.objects.create(name="Olena"))
+
+    def test_deal_change(self):
+        client = Client.objects.create(name="Olena")
+        self.assert_bumped_on_commit("deals", lambda: Deal.objects.create(client=client, title="Манікюр"))
+
+    def test_activity_change(self):
+        # ETag дашборду (main.conditional)
+        self.assert_bumped_on_commit("activities", lambda: Activity.objects.create(user=self.user, kind="call"))
+
+
+class VersionsEtagTests(TestCase):
+    def etag(self, now):
+        request = RequestFactory().get("/clients/")
+        request.user = AnonymousUser()
+        request._messages = []
+        with mock.patch("main.conditional.time.time", return_value=now):
+            return versions_etag(["clients"])(request)
+
+    def test_process_local_tokens_expire_with_time_bucket(self):
+        # LocMem: bump з іншого воркера сюди не дійде — ETag мусить застаріти сам
+        self.assertEqual(self.etag(LOCAL_TTL * 10), self.etag(LOCAL_TTL * 10 + 1))
+        self.assertNotEqual(self.etag(LOCAL_TTL * 10), self.etag(LOCAL_TTL * 11))
+
+
+class PartitionNamingTests(TestCase):
+    def test_month_names_round_trip(self):
+        spec = partitioning.ACTIVITY
+        month = partitioning.add_months(date(2026, 11, 1), 2)
+        self.assertEqual(month, date(2027, 1, 1))
+        self.assertEqual(partitioning.partition_name(spec, month), "main_activity_p202701")
+        self.assertEqual(partitioning.partition_month(spec, "main_activity_p202701"), month)
+        self.assertIsNone(partitioning.partition_month(spec, "main_activity_default"))
+        self.assertIsNone(partitioning.partition_month(spec, "beauty_booking_p202701"))
+
+
+class StaticStorageTests(TestCase):
+    def test_file_outside_manifest_and_static_root(self):
+        # тести йдуть з DEBUG=False без collectstatic — {% static %} не має падати
+        storage = BundledManifestStaticFilesStorage(location="/nonexistent", base_url="/static/")
+        self.assertEqual(storage.url("css/base.css"), "/static/css/base.css")
+
+
+class CompressionTests(TestCase):
+    body = "<form>" + "рядок таблиці клієнтів " * 50 + "</form>"
+
+    def encoding(self, **meta):
+        request = RequestFactory().get("/clients/", HTTP_ACCEPT_ENCODING="br, gzip", **meta)
+        middleware = CompressionMiddleware(lambda r: HttpResponse(self.body))
+        # справжній пакет brotli не потрібен: перевіряємо вибір кодування, а не стиснення
+        with mock.patch("main.middleware.brotli") as brotli:
+            brotli.compress.return_value = b"br"
+            return middleware(request).get("Content-Encoding")
+
+    def test_csrf_page_is_gzipped_not_brotli(self):
+        # BREACH: br не маскує довжину, тож сторінки з CSRF-токеном — лише gzip
+        self.assertEqual(self.encoding(CSRF_COOKIE_NEEDS_UPDATE=True), "gzip")
+        self.assertEqual(self.encoding(), "br")
+
+
+class VersionedViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("anna", is_staff=True))
+        patcher = mock.patch("main.conditional.time.time", return_value=LOCAL_TTL * 10)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_modified_until_version_changes(self):
+        self.client.get("/clients/")  # перший рендер ставить CSRF-cookie — вона теж в ETag
+        etag = self.client.get("/clients/")["ETag"]
+        response = self.client.get("/clients/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(name="Olena")
+        response = self.client.get("/clients/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class ClientAggregatesTests(TestCase):
+    def setUp(self):
+        self.a = Client.objects.create(name="Olena")
+        self.b = Client.objects.create(name="Iryna")
+        self.deal = Deal.objects.create(client=self.a, title="Фарбування", amount=Decimal("100"), status="closed")
+        self.start = timezone.now() - timedelta(days=3)
+        Booking.objects.create(deal=self.deal, start_at=self.start, end_at=self.start + timedelta(hours=1))
+
+    def assert_owner(self, owner, other):
+        owner.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((owner.closed_amount, owner.visit_count, owner.last_booking_at),
+                         (Decimal("100"), 1, self.start))
+        self.assertEqual((other.closed_amount, other.visit_count, other.last_booking_at), (0, 0, None))
+
+    def test_signal_moves_totals_with_deal(self):
+        self.assert_owner(self.a, self.b)
+        self.deal.client = self.b
+        self.deal.save()
+        self.assert_owner(self.b, self.a)
+
+    def test_refresh_after_update(self):
+        Deal.objects.filter(pk=self.deal.pk).update(client=self.b)  # update() сигналів не шле
+        self.assertEqual(aggregates.refresh(client_ids=[self.a.pk, self.b.pk]), 2)
+        self.assert_owner(self.b, self.a)
+
+    def test_future_booking_is_not_a_visit_until_it_starts(self):
+        deal = Deal.objects.create(client=self.a, title="Стрижка")
+        soon = timezone.now() + timedelta(hours=2)
+        booking = Booking.objects.create(deal=deal, start_at=soon, end_at=soon + timedelta(hours=1))
+        self.assert_owner(self.a, self.b)
+        # час настав — сигналу немає, підхоплює cron (rebuild_client_aggregates --started-hours)
+        started = timezone.now() - timedelta(minutes=5)
+        Booking.objects.filter(pk=booking.pk).update(start_at=started, end_at=started + timedelta(hours=1))
+        self.assertEqual(aggregates.refresh_started(hours=1), 1)
+        self.a.refresh_from_db()
+        self.assertEqual((self.a.visit_count, self.a.last_booking_at), (2, started))
+
+    def test_refresh_by_deal_touches_current_owner(self):
+        Deal.objects.filter(pk=self.deal.pk).update(amount=Decimal("250"))
+        self.assertEqual(aggregates.refresh(deal_ids=[self.deal.pk]), 1)
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.closed_amount, Decimal("250"))
+
+
+class DealStatusTests(TestCase):
+    def setUp(self):
+        self.client_obj = Client.objects.create(name="Olena")
+
+    def status(self):
+        self.client_obj.refresh_from_db()
+        return self.client_obj.deal_status
+
+    def test_recalc(self):
+        # bulk_create і update() сигналів не шлють — перерахунок вручну
+        deals = Deal.objects.bulk_create([Deal(client=self.client_obj, title=t, status="new") for t in "ab"])
+        self.assertEqual(recalc_client_deal_status(self.client_obj.pk), 1)
+        self.assertEqual(self.status(), "active")
+        self.assertEqual(recalc_client_deal_status([self.client_obj.pk]), 0)  # уже правильний
+
+        Deal.objects.filter(pk__in=[d.pk for d in deals]).update(status="closed")
+        recalc_client_deal_status([self.client_obj.pk, None])
+        self.assertEqual(self.status(), "done")
+
+        Deal.objects.filter(client=self.client_obj).delete()
+        self.assertEqual(self.status(), "none")
+        self.assertEqual(recalc_client_deal_status([]), 0)
+
+    def test_signal_recalcs_both_clients_on_move(self):
+        other = Client.objects.create(name="Iryna")
+        deal = Deal.objects.create(client=self.client_obj, title="a", status="new")
+        deal.client = other
+        deal.save()
+        self.assertEqual(self.status(), "none")
+        other.refresh_from_db()
+        self.assertEqual(other.deal_status, "active")
+
+
+class PipelineColumnTests(TestCase):
+    def setUp(self):
+        client = Client.objects.create(name="Olena")
+        deals = Deal.objects.bulk_create([Deal(client=client, title=f"d{i}", status="new") for i in range(7)]
+                                         + [Deal(client=client, title="x", status="closed")])
+        self.ids = sorted((d.pk for d in deals if d.status == "new"), reverse=True)
+        # однаковий created_at — порядок і курсор тримаються на id
+        Deal.objects.update(created_at=timezone.now())
+
+    def test_cursor_pages_without_gaps_or_repeats(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            cards, cursor = pipeline.column(pipeline.base_queryset(), "new", after=cursor, limit=3)
+            seen += [c["id"] for c in cards]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.ids)
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            pipeline.column(pipeline.base_queryset(), "new", after="garbage")
+
+
+class SearchTests(TestCase):
+    def test_build_query(self):
+        self.assertEqual(search.build_query("Novák  фарбув!"),
+                         SearchQuery("novák:* & фарбув:*", config=search.CONFIG, search_type="raw"))
+        self.assertIsNone(search.build_query(" _-! "))
+
+    def test_refresh_upserts_and_removes(self):
+        client = Client.objects.create(name="Olena", phone="777 000 111")
+        Client.objects.filter(pk=client.pk).update(name="Olena Nováková")  # без сигналу
+        SearchEntry.objects.create(kind="client", object_id=client.pk + 1000, title="зник")
+        search.refresh("client", [client.pk, client.pk + 1000])
+        entry = SearchEntry.objects.get(kind="client", object_id=client.pk)
+        self.assertEqual((entry.title, entry.subtitle), ("Olena Nováková", "777 000 111"))
+        self.assertFalse(SearchEntry.objects.filter(kind="client", object_id=client.pk + 1000).exists())
+
+    def test_deal_entry_follows_client_rename(self):
+        client = Client.objects.create(name="Olena")
+        deal = Deal.objects.create(client=client, title="Фарбування")
+        client.name = "Iryna"
+        client.save()
+        self.assertIn("Iryna", SearchEntry.objects.get(kind="deal", object_id=deal.pk).subtitle)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "tsvector — лише PostgreSQL")
+    def test_search_prefix_without_accents(self):
+        client = Client.objects.create(name="Jana Nováková")
+        Client.objects.create(name="Petr Svoboda")
+        results = search.search("novak", kinds=["client"])
+        self.assertEqual([r["id"] for r in results], [client.pk])
+
+
+class DedupTests(TestCase):
+    def groups(self, *rows):
+        return dedup.find_duplicate_groups([dedup.ClientKey(pk, *row) for pk, row in enumerate(rows, 1)])
+
+    def test_scoring(self):
+        key = dedup.ClientKey
+        same_phone = dedup.score_pair(key(1, "Jana Nováková", "+420 777 123 456", ""),
+                                      key(2, "nováková jana", "777123456", ""))
+        self.assertGreaterEqual(same_phone, dedup.DEFAULT_THRESHOLD)
+        # однакове ім'я без контактів — тезки, не дублікати
+        self.assertLess(dedup.score_pair(key(1, "Jana Nováková", "", ""), key(2, "Jana Novakova", "", "")),
+                        dedup.DEFAULT_THRESHOLD)
+
+    def test_name_block_with_weak_signal(self):
+        # ні телефон, ні email точно не збігаються — пару знаходить лише блок по триграмах імені
+        self.assertEqual(self.groups(("Jana Nováková", "+420 777 123 456", ""),
+                                     ("Jana Novakova", "+421 905 123 456", ""),
+                                     ("Petr Svoboda", "", "petr@seznam.cz"),
+                                     ("Svoboda Petr", "", "petr@gmail.com"),
+                                     ("Pavel Svoboda", "", "petr@centrum.cz")),
+                         [[1, 2], [3, 4]])
+        self.assertEqual(self.groups(("Jana Nováková", "", ""), ("Jana Nováková", "", "")), [])
+
+    def test_merge_moves_deals_and_fills_blanks(self):
+        owner = User.objects.create_user("anna")
+        primary = Client.objects.create(name="Jana Nováková", phone="777123456")
+        dupe = Client.objects.create(name="Jana Novakova", email="jana@example.com", owner=owner, notes="VIP")
+        deal = Deal.objects.create(client=dupe, title="Фарбування", amount=Decimal("100"), status="closed")
+        start = timezone.now() - timedelta(days=1)
+        booking = Booking.objects.create(deal=deal, start_at=start, end_at=start + timedelta(hours=1))
+
+        self.assertEqual(dedup.merge_clients(primary, [dupe.pk, primary.pk]), 1)
+        self.assertFalse(Client.objects.filter(pk=dupe.pk).exists())
+        primary.refresh_from_db()
+        self.assertEqual((primary.email, primary.owner, primary.notes), ("jana@example.com", owner, "VIP"))
+        self.assertEqual((primary.closed_amount, primary.deal_status), (Decimal("100"), "done"))
+        booking.refresh_from_db()
+        self.assertEqual(booking.deal.client, primary)  # запис іде разом з угодою
+
+    def test_merge_keeps_duplicate_series(self):
+        primary = Client.objects.create(name="Jana Nováková")
+        dupe = Client.objects.create(name="Jana Novakova")
+        series = BookingSeries.objects.create(client=dupe, service=Service.objects.create(name="Манікюр"),
+                                              start_at=timezone.now(), count=4)
+        dedup.merge_clients(primary, [dupe.pk])
+        series.refresh_from_db()  # без переносу видалення дубліката знесло б серію каскадом
+        self.assertEqual(series.client, primary)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.builds = 0
+
+        def build():
+            self.builds += 1
+            return self.builds
+
+        self.snapshot = Snapshot("test_counter", build, fresh_for=60)
+        self.addCleanup(lambda: cache.delete_many([self.snapshot.key, self.snapshot.lock_key]))
+
+    def test_stale_served_while_refreshing(self):
+        self.assertEqual(self.snapshot.get()[::2], (1, False))  # знімка нема — синхронно
+        self.assertEqual(self.snapshot.get()[::2], (1, False))
+        later = timezone.now() + timedelta(minutes=2)
+        with mock.patch("main.snapshots.timezone.now", return_value=later), \
+                mock.patch.object(Snapshot, "_refresh_in_background") as background:
+            self.assertEqual(self.snapshot.get()[::2], (1, True))
+        background.assert_called_once()
+        self.assertEqual(self.builds, 1)
+
+
+class ReviewStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        anna, bob = User.objects.create_user("anna"), User.objects.create_user("bob")
+        for user in (anna, bob):
+            Employee.objects.create(user=user, department="Nails")
+        for user, end, score, scale in ((anna, date(2026, 3, 31), 6, 10), (anna, date(2026, 6, 30), 8, 10),
+                                        (anna, date(2026, 9, 30), 80, 100), (bob, date(2026, 9, 30), 9, 10)):
+            PerformanceReview.objects.create(user=user, period_start=end - timedelta(days=90), period_end=end,
+                                             score=score, scale=scale)
+
+    def test_window_functions_over_normalized_scores(self):
+        bob, anna = reviews._query(date.min, window=2)
+        self.assertEqual((anna["last_score"], anna["rolling_avg"], anna["trend"], anna["avg_score"], anna["count"]),
+                         (80.0, 80.0, 0.0, 73.3, 3))
+        self.assertEqual(anna["last_period_end"], date(2026, 9, 30))
+        self.assertEqual((bob["rolling_avg"], bob["trend"], bob["dept_percentile"], anna["dept_percentile"]),
+                         (90.0, None, 100, 0))
+        self.assertEqual((anna["dept_avg"], anna["dept_size"]), (85.0, 2))
+
+    def test_since_and_cache_version(self):
+        stats = reviews.employee_stats(since=date(2026, 6, 1), window=4)
+        self.assertEqual([(s["username"], s["count"]) for s in stats], [("bob", 1), ("anna", 2)])
+        PerformanceReview.objects.filter(user__username="bob").update(score=5)  # update() сигналів не шле
+        self.assertEqual(reviews.employee_stats(since=date(2026, 6, 1), window=4), stats)
+        with self.captureOnCommitCallbacks(execute=True):
+            reviews.invalidate_reviews()
+        self.assertEqual(reviews.employee_stats(since=date(2026, 6, 1), window=4)[0]["username"], "anna")
+
+
+class ActivityImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.anna, cls.bob = User.objects.create_user("anna"), User.objects.create_user("bob")
+
+    def counts(self):
+        return dict(ActivityDailyCounter.objects.filter(count__gt=0).values_list("user__username", "count"))
+
+    def test_ingest_skips_bad_lines_and_counts_per_day(self):
+        now = timezone.now().isoformat()
+        result = activities.ingest([
+            f'{{"kind": "call", "created_at": "{now}", "duration_sec": 95}}',
+            b'{"user": "bob", "kind": "meet"}',
+            "",
+            '{"user": "nobody"}',
+            "not json",
+            '{"kind": "fax"}',
+        ], default_user=self.anna)
+        self.assertEqual((result["created"], result["failed"]), (2, 3))
+        self.assertEqual([e["line"] for e in result["errors"]], [4, 5, 6])
+        self.assertEqual(Activity.objects.get(user=self.anna).duration_min, 2)  # секунди → хвилини вгору
+        self.assertEqual(self.counts(), {"anna": 1, "bob": 1})
+
+        Activity.objects.create(user=self.anna, kind="task")
+        self.assertEqual(activities.count_for(self.anna), 2)
+        self.assertEqual(activities.top_active(), [{"user__username": "anna", "total": 2},
+                                                   {"user__username": "bob", "total": 1}])
+        Activity.objects.filter(user=self.bob).get().delete()
+        self.assertEqual(self.counts(), {"anna": 2})
+
+    def test_edit_moves_count_to_new_day(self):
+        activity = Activity.objects.create(user=self.anna, kind="call")
+        activity.created_at -= timedelta(days=3)
+        activity.save()
+        self.assertEqual(activities.count_for(self.anna), 0)
+        self.assertEqual(activities.total_since(days=7), 1)
+        ActivityDailyCounter.objects.update(count=99)  # ручна правка — перерахунок з нуля
+        activities.rebuild_counters()
+        self.assertEqual(activities.total_since(), 1)
+
+
+class I18nLabelTests(TestCase):
+    def setUp(self):
+        i18n.clear()
+        self.addCleanup(i18n.clear)
+
+    def test_labels_cached_per_language(self):
+        self.assertEqual(i18n.verbose_name(Service, "name", language="cs"), "Název")
+        self.assertEqual(i18n.verbose_name(Service, "name", language="en"), "Title")
+        with translation.override("de"):
+            self.assertEqual(i18n.verbose_name(Service, "name"), "Titel")
+            monday = WorkSchedule(weekday=0)
+            self.assertEqual(i18n.display(monday, "weekday"), monday.get_weekday_display())
+        self.assertEqual(i18n.label(Deal, "status", "closed"), Deal(status="closed").get_status_display())
+        self.assertEqual(i18n.label(Deal, "status", "legacy"), "legacy")  # невідоме — як є
+
+    def test_warmup_fills_cache_for_all_languages(self):
+        self.assertGreater(i18n.warmup(), 0)
+        with mock.patch("main.i18n.translation.override") as override:
+            for language in ("cs", "en", "de", "uk"):
+                i18n.choice_labels(Deal, "status", language)
+                i18n.verbose_name(Service, "name", language=language)
+        override.assert_not_called()
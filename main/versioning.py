@@ -0,0 +1,77 @@
+"""
+Версії даних для кешів.
+
+Кожен простір імен ("refdata", "clients", ...) має короткий токен у спільному кеші.
+Хто кешує похідні дані — кладе токен у ключ або порівнює з ним; сигнали на запис
+викликають bump_version(), і всі процеси бачать нову версію при наступному get_version().
+
+Новий токен пишеться лише після коміту транзакції (transaction.on_commit): інакше інший
+запит міг би перебудувати кеш з ще не закомічених даних під новим токеном, а відкат
+лишав би зайву інвалідацію. Поза транзакцією — одразу.
+
+З локальним кешем процесу (LocMemCache, за замовчуванням) bump видно лише цьому процесу,
+тож токени там живуть DATA_VERSION_TTL секунд (LOCAL_TTL): інші воркери побачать зміну
+не пізніше ніж за цей час. Зі спільним кешем (Redis/memcached) токени безстрокові.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+KEY_PREFIX = "crm:version:"
+LOCAL_TTL = 60  # секунд: межа застарілості між воркерами з локальним кешем
+
+
+def is_process_local(alias="default"):
+    """Кеш aliasа не спільний між процесами (LocMem / Dummy)."""
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def _timeout():
+    ttl = getattr(settings, "DATA_VERSION_TTL", None)
+    if ttl is not None:
+        return ttl or None  # 0 → безстроково
+    return LOCAL_TTL if is_process_local() else None
+
+
+def _new_token():
+    return uuid.uuid4().hex[:12]
+
+
+def get_version(name):
+    key = KEY_PREFIX + name
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_token(), _timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_version(*names):
+    """
+    Ставить нові токени (після коміту, якщо йде транзакція); повертає {name: token}, щоб
+    процес міг одразу позначити свій знімок.
+    """
+    tokens = {name: _new_token() for name in names}
+    values = {KEY_PREFIX + name: token for name, token in tokens.items()}
+    transaction.on_commit(lambda: cache.set_many(values, _timeout()))
+    return tokens
+
+
+class DataVersions:
+    """
+    Для шаблонів: {{ data_versions.deals }} → get_version("deals"). Лінива й з пам'яттю на
+    один рендер — токени читаються з кешу лише ті й лише раз, які шаблон справді спитав
+    (ключі {% cache %}-фрагментів, див. main.context_processors).
+    """
+
+    def __init__(self):
+        self._tokens = {}
+
+    def __getitem__(self, name):
+        if name not in self._tokens:
+            self._tokens[name] = get_version(name)
+        return self._tokens[name]
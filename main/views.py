@@ -1,20 +1,30 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import redirect, render, get_object_or_404
-from django.views.decorators.http import require_http_methods, require_POST
-from django.contrib.auth.models import User
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from django.http import JsonResponse
 from django.contrib import messages
-from django.db.models import Avg, Count, Q, Sum
+from django.db.models import Count, F, Q, Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django import forms
 from django.core.paginator import Paginator
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
 from .forms import ActivityForm, ClientForm, DealForm, EmployeeForm
-from .models import Activity, Employee, PerformanceReview, Client, Deal, DealAttachment
+from .models import Activity, Employee, Client, Deal, DealAttachment
+from . import activities, pipeline, reviews, search
+from .conditional import versioned
+from .snapshots import ADMIN_STATS
 import json
-from beauty.models import DealLine, Booking, Service, Resource
+from beauty.models import DealLine, Booking
+from beauty.refdata import get_refdata
 from beauty.forms import DealLineForm, BookingForm, BookingQuickForm
-from beauty.utils import free_slots_for_employee
+from beauty.utils import free_slots_for_employees
+
+
+MAX_IDLE_DAYS = 36500  # ~100 років: більше timedelta/datetime не віднімуть (OverflowError)
 
 
 # ---- helpers ----
@@ -25,49 +35,55 @@ def is_superuser(user):
 # ---- admin panel (superuser only) ----
 @user_passes_test(is_superuser)
 def admin_panel(request):
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-
-    # Загальна статистика
-    total_users = User.objects.count()
-    staff_count = User.objects.filter(is_staff=True).count()
-    active_employees = Employee.objects.filter(is_active=True).count()
-    activities_last_week = Activity.objects.filter(created_at__gte=week_ago).count()
-
-    # Топ активних співробітників за 30 днів
-    top_active = (
-        Activity.objects.filter(created_at__gte=month_ago)
-        .values("user__username")
-        .annotate(total=Count("id"))
-        .order_by("-total")[:5]
-    )
-
-    # Середній скор по оцінках (по користувачу)
-    latest_reviews = (
-        PerformanceReview.objects
-        .values("user__username")
-        .annotate(avg_score=Avg("score"), count=Count("id"))
-        .order_by("-avg_score")
-    )
-
-    # Список співробітників
-    employees = (
-        Employee.objects.select_related("user")
-        .order_by("department", "user__username")
-    )
+    # Статистика — зі знімка (main.snapshots): застарілий віддаємо одразу й оновлюємо у фоні
+    if request.method == "POST" and request.POST.get("refresh"):
+        ADMIN_STATS.refresh()
+        return redirect("admin_panel")
+    stats, stats_at, stats_stale = ADMIN_STATS.get()
+    # Оцінки: нормалізовані бали, ковзне середнє, тренд, перцентиль у відділі (кеш з версією)
+    review_stats = reviews.employee_stats()
+
+    # Список співробітників: пошук + пагінація (по 25)
+    q = request.GET.get("q", "").strip()
+    employees = Employee.objects.select_related("user").order_by("department", "user__username")
+    if q:
+        employees = employees.filter(
+            Q(user__username__icontains=q) |
+            Q(first_name__icontains=q) |
+            Q(last_name__icontains=q) |
+            Q(department__icontains=q) |
+            Q(position__icontains=q)
+        )
+    page_obj = Paginator(employees, 25).get_page(request.GET.get("page"))
 
     context = {
-        "total_users": total_users,
-        "staff_count": staff_count,
-        "active_employees": active_employees,
-        "activities_last_week": activities_last_week,
-        "top_active": top_active,
-        "latest_reviews": latest_reviews,
-        "employees": employees,
+        **stats,
+        "stats_at": stats_at,
+        "stats_stale": stats_stale,
+        "review_stats": review_stats,
+        "page_obj": page_obj,
+        "q": q,
     }
     return render(request, "admin_panel.html", context)
 
+@user_passes_test(is_superuser)
+def review_analytics(request):
+    """
+    GET /admin-panel/reviews/?since=YYYY-MM-DD&window=4 — JSON для HR-дашбордів.
+    """
+    since = request.GET.get("since")
+    try:
+        since = datetime.strptime(since, "%Y-%m-%d").date() if since else None
+        window = int(request.GET.get("window") or reviews.DEFAULT_WINDOW)
+    except ValueError:
+        return JsonResponse({"error": "invalid", "message": "since=YYYY-MM-DD, window — число"}, status=400)
+    stats = reviews.employee_stats(since=since, window=window)
+    return JsonResponse({
+        "window": max(1, min(reviews.MAX_WINDOW, window)),
+        "employees": stats,
+        "departments": reviews.department_summary(stats),
+    })
+
 @user_passes_test(is_superuser)
 @login_required
 def employee_detail(request, user_id):
@@ -93,8 +109,66 @@ def home(request):
     return render(request, "home.html")
 
 
+# ---- dashboard: важкі блоки — рахуються лише при промаху {% cache %} у шаблоні ----
+
+def _dashboard_kpi():
+    now = timezone.now()
+    today = timezone.localtime(now).date()
+    yesterday = today - timedelta(days=1)
+    month_start = today.replace(day=1)
+    closed = Deal.objects.filter(status="closed")
+    return {
+        # клієнтів за місяць; угоди і сума продажів (усі угоди і сума по "closed")
+        "clients_last_month": Client.objects.filter(created_at__gte=now - timedelta(days=30)).count(),
+        "deals_total": Deal.objects.count(),
+        "sales_sum": closed.aggregate(total=Sum("amount"))["total"] or 0,
+        "bookings_today_count": Booking.objects.active().filter(start_at__date=today).count(),
+        # виручка за вчора/місяць (сума Deal.amount)
+        "revenue_yesterday": closed.filter(updated_at__date=yesterday).aggregate(s=Sum("amount"))["s"] or 0,
+        "revenue_month": closed.filter(updated_at__date__gte=month_start).aggregate(s=Sum("amount"))["s"] or 0,
+    }
+
+
+def _dashboard_charts():
+    """Дані для графіка за місяцями (останні 6 міс.) — JSON-масиви для Chart.js."""
+    six_months_ago = (timezone.now() - timedelta(days=180)).replace(day=1)
+    clients_by_month = (
+        Client.objects.filter(created_at__gte=six_months_ago)
+        .annotate(m=TruncMonth("created_at"))
+        .values("m").annotate(c=Count("id")).order_by("m")
+    )
+    deals_closed_by_month = (
+        Deal.objects.filter(status="closed", created_at__gte=six_months_ago)
+        .annotate(m=TruncMonth("created_at"))
+        .values("m").annotate(s=Sum("amount")).order_by("m")
+    )
+
+    # Звести у паралельні масиви (мітки + значення)
+    # Переконаємось, що в обох наборах однакові місяці
+    months = sorted({row["m"].date() for row in clients_by_month} | {row["m"].date() for row in deals_closed_by_month})
+    map_clients = {row["m"].date(): row["c"] for row in clients_by_month}
+    map_sales = {row["m"].date(): float(row["s"] or 0) for row in deals_closed_by_month}
+    return {
+        "labels_json": json.dumps([d.strftime("%Y-%m") for d in months]),
+        "clients_json": json.dumps([map_clients.get(d, 0) for d in months]),
+        "sales_json": json.dumps([map_sales.get(d, 0) for d in months]),
+    }
+
+
+def _dashboard_free_slots():
+    """Вільні слоти по кожному майстру: {ім'я: ["HH:MM", ...]}."""
+    masters = get_refdata().master_list()
+    slots_by_master = free_slots_for_employees(timezone.now(), masters, slot_min=60)
+    return {
+        emp.full_name if hasattr(emp, "full_name") else emp.user.username:
+            [s.strftime("%H:%M") for s in slots_by_master[emp.pk]]
+        for emp in masters
+    }
+
+
 # ---- dashboard (with filters & sorting) ----
 @login_required
+@versioned("activities", "deals", "clients", "bookings", "schedule", "refdata", hourly=True)
 def dashboard(request):
     # Фільтри з GET
     kind = request.GET.get("kind")                 # call/meet/deal/task/other
@@ -131,8 +205,7 @@ def dashboard(request):
     qs_my = qs_my.order_by(sort)
 
     # Сьогоднішній лічильник
-    start_today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    my_today_count = Activity.objects.filter(user=request.user, created_at__gte=start_today).count()
+    my_today_count = activities.count_for(request.user)
 
     # Результати: перші 10 після фільтрів
     latest_my = qs_my.select_related("user")[:10]
@@ -149,96 +222,25 @@ def dashboard(request):
 
     # Додаткова зведена статистика для суперюзера
     if request.user.is_superuser:
-        last_7 = timezone.now() - timedelta(days=7)
         ctx.update({
-            "all_week_count": Activity.objects.filter(created_at__gte=last_7).count(),
-            "all_total": Activity.objects.count(),
+            "all_week_count": activities.total_since(days=7),
+            "all_total": activities.total_since(),
         })
 
 
-    # ==== ЗВІТИ / KPI ====
-    now = timezone.now()
-    month_ago = now - timedelta(days=30)
-    six_months_ago = (now - timedelta(days=180)).replace(day=1)
-
-    # 1) Кількість клієнтів за місяць
-    clients_last_month = Client.objects.filter(created_at__gte=month_ago).count()
-
-    # 2) Кількість угод і сума продажів (усі угоди і сума по "closed")
-    deals_total = Deal.objects.count()
-    sales_sum = Deal.objects.filter(status="closed").aggregate(total=Sum("amount"))["total"] or 0
-
-    # 3) Дані для графіка за місяцями (останні 6 міс.)
-    clients_by_month = (
-        Client.objects.filter(created_at__gte=six_months_ago)
-        .annotate(m=TruncMonth("created_at"))
-        .values("m").annotate(c=Count("id")).order_by("m")
-    )
-    deals_closed_by_month = (
-        Deal.objects.filter(status="closed", created_at__gte=six_months_ago)
-        .annotate(m=TruncMonth("created_at"))
-        .values("m").annotate(s=Sum("amount")).order_by("m")
-    )
-
-    # Звести у паралельні масиви (мітки + значення)
-    # Переконаємось, що в обох наборах однакові місяці
-    months = sorted({row["m"].date() for row in clients_by_month} | {row["m"].date() for row in deals_closed_by_month})
-    labels = [d.strftime("%Y-%m") for d in months]
-    map_clients = {row["m"].date(): row["c"] for row in clients_by_month}
-    map_sales = {row["m"].date(): float(row["s"] or 0) for row in deals_closed_by_month}
-    data_clients = [map_clients.get(d, 0) for d in months]
-    data_sales = [map_sales.get(d, 0) for d in months]
-
-    ctx_reports = {
-        "greet_name": request.user.get_username(),
-        "clients_last_month": clients_last_month,
-        "deals_total": deals_total,
-        "sales_sum": sales_sum,
-        "chart_labels_json": json.dumps(labels),
-        "chart_clients_json": json.dumps(data_clients),
-        "chart_sales_json": json.dumps(data_sales),
-    }
-    ctx.update(ctx_reports)
-
-
+    # KPI, графік і вільні слоти рахуються лише якщо фрагмент {% cache %} у шаблоні промахнувся
+    # (ключ — користувач, мова, версії даних і день/година; див. main.context_processors)
     tznow = timezone.localtime()
-    today = tznow.date()
-    yesterday = today - timedelta(days=1)
-    month_start = today.replace(day=1)
-
-    # 1) Записів сьогодні
-    bookings_today_count = Booking.objects.filter(start_at__date=today).count()
-
-    # 2) Вільні слоти (по кожному майстру)
-    free_slots = {}
-    for emp in Employee.objects.filter(is_active=True):
-        slots = free_slots_for_employee(timezone.now(), emp, start_hour=9, end_hour=18, slot_min=60)
-        # для компактності перетворимо в "HH:MM"
-        free_slots[emp.full_name if hasattr(emp, "full_name") else emp.user.username] = [
-            s.strftime("%H:%M") for s in slots
-        ]
-
-    # 3) Виручка за вчора/місяць (сума Deal.amount)
-    revenue_yesterday = Deal.objects.filter(updated_at__date=yesterday, status="closed").aggregate(
-        s=Sum("amount")
-    )["s"] or 0
-    revenue_month = Deal.objects.filter(updated_at__date__gte=month_start, status="closed").aggregate(
-        s=Sum("amount")
-    )["s"] or 0
-
     ctx.update({
-    "bookings_today_count": bookings_today_count,
-    "free_slots": free_slots,
-    "revenue_yesterday": revenue_yesterday,
-    "revenue_month": revenue_month,
+        "greet_name": request.user.get_username(),
+        "kpi": SimpleLazyObject(_dashboard_kpi),
+        "charts": SimpleLazyObject(_dashboard_charts),
+        "free_slots": SimpleLazyObject(_dashboard_free_slots),
+        "cache_day": tznow.strftime("%Y%m%d"),
+        "cache_hour": tznow.strftime("%Y%m%d%H"),
     })
 
-    ctx.update({
-    "masters": Employee.objects.filter(is_active=True).select_related("user"),
-    "services": Service.objects.all().order_by("name"),
-    "clients": Client.objects.order_by("-created_at")[:200],  # топ-200 останніх (щоб не довго)
-    "resources": Resource.objects.all().order_by("name"),
-})
+    # клієнтів/послуги/майстрів/ресурси форма запису бере з /api/autocomplete/ (не вантажимо зі сторінкою)
     return render(request, "main/dashboard.html", ctx)
 
 
@@ -262,6 +264,19 @@ def activity_create(request):
     return render(request, "activity_form.html", {"form": form, "title": "Нова активність"})
 
 
+# ---- bulk import (JSON lines) ----
+@require_POST
+@login_required
+@user_passes_test(lambda u: u.is_staff or u.is_superuser)
+def activity_import(request):
+    """
+    POST /activities/import/  (тіло — JSON lines, напр. експорт дзвінків з телефонії)
+    Тіло читаємо потоково, по рядку; без "user" у рядку автор — поточний користувач.
+    """
+    result = activities.ingest(request, default_user=request.user)
+    return JsonResponse(result, status=201 if result["created"] else 400)
+
+
 # ---- edit activity ----
 @require_http_methods(["GET", "POST"])
 @login_required
@@ -292,6 +307,7 @@ def activity_delete(request, pk):
 
 
 @login_required
+@versioned("clients")
 def client_list(request):
     q = request.GET.get("q", "").strip()
     sort = request.GET.get("sort", "-created_at")
@@ -306,6 +322,25 @@ def client_list(request):
             Q(email__icontains=q)
         )
 
+    # фільтри по денормалізованих агрегатах (main.aggregates) — звичайні WHERE по колонках Client
+    filters = {}
+    min_amount = request.GET.get("min_amount", "").strip().replace(",", ".")
+    try:
+        min_value = Decimal(min_amount) if min_amount else None
+    except InvalidOperation:
+        min_value = None
+    if min_value is not None and min_value.is_finite():
+        qs = qs.filter(closed_amount__gte=min_value)
+        filters["min_amount"] = min_amount
+    idle_days = request.GET.get("idle_days", "").strip()
+    if idle_days.isdecimal():
+        cutoff = timezone.now() - timedelta(days=min(int(idle_days), MAX_IDLE_DAYS))
+        qs = qs.filter(Q(last_booking_at__lt=cutoff) | Q(last_booking_at__isnull=True))
+        filters["idle_days"] = idle_days
+    if request.GET.get("has_open") == "1":
+        qs = qs.filter(open_deals__gt=0)
+        filters["has_open"] = "1"
+
     allowed_sorts = {
         "name": "name",
         "-name": "-name",
@@ -317,11 +352,19 @@ def client_list(request):
         "-deal": "-deal_status",
         "created_at": "created_at",
         "-created_at": "-created_at",
-    }        
+        "amount": "closed_amount",
+        "-amount": "-closed_amount",
+        "open": "open_deals",
+        "-open": "-open_deals",
+        "last_visit": F("last_booking_at").asc(nulls_first=True),
+        "-last_visit": F("last_booking_at").desc(nulls_last=True),
+        "visits": "visit_count",
+        "-visits": "-visit_count",
+    }
 
     if sort not in allowed_sorts:
         sort = "-created_at"
-    qs = qs.order_by(allowed_sorts[sort])
+    qs = qs.order_by(allowed_sorts[sort], "-pk")
 
     # Пагінація (по 10)
     paginator = Paginator(qs, 10)
@@ -331,7 +374,7 @@ def client_list(request):
     return render(
         request,
         "clients/list.html",
-        {"page_obj": page_obj, "q": q, "sort": sort},
+        {"page_obj": page_obj, "q": q, "sort": sort, "filters": filters, "filter_qs": urlencode(filters)},
     )
 
 
@@ -422,6 +465,8 @@ def deal_create(request, client_pk=None):
                     booking.client = deal.client  # корисно для фільтрів
                     booking.created_by = request.user if hasattr(booking, "created_by") else None
                     booking.save()
+            elif booking_form.has_error("master", "conflict") or booking_form.has_error("resource", "conflict"):
+                messages.warning(request, "Запис не створено: майстер або ресурс зайнятий у цей час")
 
             messages.success(request, "Угоду створено ✅")
             return redirect("client_detail", pk=deal.client.pk)
@@ -582,4 +627,85 @@ def deal_change_status(request, pk):
     deal.status = status
     deal.save(update_fields=["status"])
     messages.success(request, "Статус оновлено ✅")
-    return redirect("client_detail", pk=deal.client.pk)
\ No newline at end of file
+    return redirect("client_detail", pk=deal.client.pk)
+
+# ---- воронка угод (JSON для канбан-дошки) ----
+
+def _pipeline_qs(request):
+    return pipeline.base_queryset(owner=request.user if request.GET.get("mine") in ("1", "true") else None)
+
+
+def _pipeline_limit(request):
+    try:
+        limit = int(request.GET.get("limit") or pipeline.DEFAULT_LIMIT)
+    except ValueError:
+        limit = pipeline.DEFAULT_LIMIT
+    return max(1, min(pipeline.MAX_LIMIT, limit))
+
+
+@require_GET
+@login_required
+def pipeline_board(request):
+    """
+    GET /deals/pipeline/?limit=20[&mine=1]
+    {"stages": [{"status", "label", "count", "total", "deals": [...], "next": cursor | null}, ...]}
+    """
+    return JsonResponse({"stages": pipeline.board(_pipeline_qs(request), limit=_pipeline_limit(request))})
+
+
+@require_GET
+@login_required
+def pipeline_column(request, status):
+    """GET /deals/pipeline/<status>/?after=<cursor>&limit=20[&mine=1] — наступна сторінка колонки."""
+    if status not in pipeline.STAGES:
+        return JsonResponse({"error": "invalid", "message": "Невідомий статус"}, status=404)
+    try:
+        deals, cursor = pipeline.column(_pipeline_qs(request), status, after=request.GET.get("after"),
+                                        limit=_pipeline_limit(request))
+    except ValueError:
+        return JsonResponse({"error": "invalid", "message": "Некоректний курсор"}, status=400)
+    return JsonResponse({"status": status, "deals": deals, "next": cursor})
+
+
+@require_POST
+@login_required
+def deal_move(request, pk):
+    """
+    POST /deals/<id>/move/  {"status": "closed", "from": "in_progress"}
+    "from" (необов'язково) — статус, з якого тягнули картку; якщо угоду вже перемістили — 409.
+    """
+    # не only_staff: fetch() з дошки чекає JSON, а не 302 на сторінку входу
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({"error": "forbidden", "message": "Недостатньо прав"}, status=403)
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or data.get("status") not in pipeline.STAGES:
+        return JsonResponse({"error": "invalid", "message": "Невалідний статус"}, status=400)
+    try:
+        deal, previous = pipeline.move(pk, data["status"], expected=data.get("from"))
+    except Deal.DoesNotExist:
+        return JsonResponse({"error": "not_found", "message": "Угоду не знайдено"}, status=404)
+    except pipeline.StaleStatus as e:
+        return JsonResponse({"error": "stale", "message": "Угоду вже перемістили", "status": e.current},
+                            status=409)
+    return JsonResponse({"ok": True, "id": deal.pk, "status": deal.status, "from": previous})
+
+
+# ---- глобальний пошук ----
+
+@require_GET
+@login_required
+def global_search(request):
+    """
+    GET /search/?q=novakova фарбування[&kind=client,deal][&limit=20]
+    {"results": [{"kind", "id", "title", "subtitle", "url", "rank"}, ...]} — за релевантністю.
+    """
+    kinds = [k for k in request.GET.get("kind", "").split(",") if k in search.KINDS]
+    try:
+        limit = int(request.GET.get("limit") or search.DEFAULT_LIMIT)
+    except ValueError:
+        limit = search.DEFAULT_LIMIT
+    limit = max(1, min(search.MAX_LIMIT, limit))
+    return JsonResponse({"results": search.search(request.GET.get("q", ""), kinds=kinds, limit=limit)})